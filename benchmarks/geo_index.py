@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""
+Benchmarks the radius and nearest-neighbour queries of GeoIndex
+against a haversine scan of every point
+usage: python3 -m benchmarks.geo_index [sizes...]
+"""
+
+import random
+import sys
+from time import perf_counter
+
+from models.engine.indexes import GeoIndex, haversine
+
+
+class Point:
+    """A bare object holding coordinates"""
+
+    def __init__(self, latitude, longitude):
+        """Sets the coordinates"""
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+def timed(func, queries):
+    """returns the mean time in milliseconds of func over queries"""
+    start = perf_counter()
+    for query in queries:
+        func(*query)
+    return (perf_counter() - start) * 1000 / len(queries)
+
+
+def run(size, rand):
+    """indexes size random points and prints the query times"""
+    points = [Point(rand.uniform(-60, 70), rand.uniform(-180, 180))
+              for _ in range(size)]
+    index = GeoIndex("latitude", "longitude")
+    start = perf_counter()
+    for i, point in enumerate(points):
+        index.add(i, point)
+    build = perf_counter() - start
+    queries = [(rand.uniform(-60, 70), rand.uniform(-180, 180), 5)
+               for _ in range(100)]
+
+    def scan(lat, lon, radius):
+        """returns the points within radius of a full scan"""
+        return [p for p in points
+                if haversine(lat, lon, p.latitude, p.longitude) <= radius]
+
+    near = timed(index.near, queries)
+    nearest = timed(lambda lat, lon, k: index.nearest(lat, lon, k), queries)
+    full = timed(scan, queries[:3])
+    print("{:>9} places  build {:6.2f} s  near(5 km) {:8.3f} ms  "
+          "nearest(5) {:8.3f} ms  scan {:9.1f} ms".format(
+              size, build, near, nearest, full))
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    rand = random.Random(0)
+    for size in sizes:
+        run(size, rand)
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""
+Benchmarks the size, save and reload time of the JSON and binary
+snapshot formats of FileStorage on the same objects
+usage: python3 -m benchmarks.snapshot_format [size]
+"""
+
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+from unittest.mock import patch
+
+import models
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+from models.user import User
+
+
+def populate(size, rand):
+    """creates size objects: users, places and reviews"""
+    FileStorage._FileStorage__objects = {}
+    for i in range(size):
+        if i % 3 == 0:
+            user = User()
+            user.email = "user{}@mail.com".format(i)
+            user.first_name = "Betty"
+        elif i % 3 == 1:
+            place = Place()
+            place.name = "Place {}".format(i)
+            place.price_by_night = rand.randint(20, 400)
+            place.latitude = rand.uniform(-60, 70)
+            place.longitude = rand.uniform(-180, 180)
+        else:
+            review = Review()
+            review.text = "Lovely stay, would come back"
+
+
+def measure(fmt):
+    """returns the size, save time and reload time of one format"""
+    with patch.object(FileStorage, "_FileStorage__format", fmt):
+        FileStorage._FileStorage__encoded = {}
+        start = perf_counter()
+        models.storage.save()
+        save = perf_counter() - start
+    objects = FileStorage._FileStorage__objects
+    FileStorage._FileStorage__objects = {}
+    start = perf_counter()
+    models.storage.reload()
+    reload = perf_counter() - start
+    FileStorage._FileStorage__objects = objects
+    return os.path.getsize("file.json"), save, reload
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    os.chdir(tempfile.mkdtemp())
+    populate(size, random.Random(0))
+    results = {fmt: measure(fmt) for fmt in ("json", "binary")}
+    for fmt, (length, save, reload) in results.items():
+        print("{:>6}  {:>11,} bytes  save {:6.3f} s  reload {:6.3f} s".format(
+            fmt, length, save, reload))
+    json_size, binary_size = results["json"][0], results["binary"][0]
+    print("binary is {:.1f}x smaller".format(json_size / binary_size))
@@ -5,7 +5,7 @@ import re
 from shlex import split
 
 import models
-from models.base_model import BaseModel
+from models.base_model import BaseModel, classes
 from models.user import User
 from models.city import City
 from models.amenity import Amenity
@@ -67,6 +67,11 @@ class HBNBCommand(cmd.Cmd):
     prompt = "(hbnb) "
     storage = models.storage
 
+    def precmd(self, line):
+        """Merges what other processes saved before each command"""
+        self.storage.refresh()
+        return line
+
     def emptyline(self):
         """Command to executed when empty line + <ENTER> key"""
         pass
@@ -79,7 +84,8 @@ class HBNBCommand(cmd.Cmd):
             "destroy": self.do_destroy,
             "count": self.do_count,
             "update": self.do_update,
-            "create": self.do_create
+            "create": self.do_create,
+            "search": self.do_search
         }
 
         match = re.search(r"\.", arg)
@@ -109,7 +115,7 @@ class HBNBCommand(cmd.Cmd):
         and prints the id"""
         args = check_args(argv)
         if args:
-            print(eval(args[0])().id)
+            print(classes[args[0]]().id)
             self.storage.save()
 
     def do_show(self, argv):
@@ -120,25 +126,25 @@ class HBNBCommand(cmd.Cmd):
             if len(args) != 2:
                 print("** instance id missing **")
             else:
-                key = "{}.{}".format(args[0], args[1])
-                if key not in self.storage.all():
+                obj = self.storage.get(args[0], args[1])
+                if obj is None:
                     print("** no instance found **")
                 else:
-                    print(self.storage.all()[key])
+                    print(obj)
 
     def do_all(self, argv):
         """Prints all string representation of all instances based or not
         based on the class name"""
         arg_list = split(argv)
-        objects = self.storage.all().values()
         if not arg_list:
-            print([str(obj) for obj in objects])
+            with self.storage.snapshot() as snapshot:
+                print([str(obj) for key, obj in snapshot.items()])
         else:
             if arg_list[0] not in CLASSES:
                 print("** class doesn't exist **")
             else:
-                print([str(obj) for obj in objects
-                       if arg_list[0] in str(obj)])
+                with self.storage.snapshot(arg_list[0]) as snapshot:
+                    print([str(obj) for key, obj in snapshot.items()])
 
     def do_destroy(self, argv):
         """Delete a class instance based on the name and given id."""
@@ -147,9 +153,9 @@ class HBNBCommand(cmd.Cmd):
             if len(arg_list) == 1:
                 print("** instance id missing **")
             else:
-                key = "{}.{}".format(*arg_list)
-                if key in self.storage.all():
-                    del self.storage.all()[key]
+                obj = self.storage.get(arg_list[0], arg_list[1])
+                if obj is not None:
+                    self.storage.delete(obj)
                     self.storage.save()
                 else:
                     print("** no instance found **")
@@ -162,32 +168,43 @@ class HBNBCommand(cmd.Cmd):
             if len(arg_list) == 1:
                 print("** instance id missing **")
             else:
-                instance_id = "{}.{}".format(arg_list[0], arg_list[1])
-                if instance_id in self.storage.all():
+                obj = self.storage.get(arg_list[0], arg_list[1])
+                if obj is not None:
                     if len(arg_list) == 2:
                         print("** attribute name missing **")
                     elif len(arg_list) == 3:
                         print("** value missing **")
                     else:
-                        obj = self.storage.all()[instance_id]
-                        if arg_list[2] in type(obj).__dict__:
-                            v_type = type(obj.__class__.__dict__[arg_list[2]])
-                            setattr(obj, arg_list[2], v_type(arg_list[3]))
-                        else:
+                        cls = classes[arg_list[0]]
+                        v_type = None
+                        if arg_list[2] in cls.fields:
+                            v_type = cls.fields[arg_list[2]].type
+                        elif arg_list[2] in cls.__dict__:
+                            v_type = type(cls.__dict__[arg_list[2]])
+                        if v_type is None:
                             setattr(obj, arg_list[2], arg_list[3])
+                        else:
+                            setattr(obj, arg_list[2], v_type(arg_list[3]))
+                        obj.save()
                 else:
                     print("** no instance found **")
 
-            self.storage.save()
+    def do_search(self, argv):
+        """Prints the string representation of the instances of a class
+        best matching the given words"""
+        arg_list = check_args(argv)
+        if arg_list:
+            if len(arg_list) == 1:
+                print("** search words missing **")
+            else:
+                words = " ".join(arg_list[1:])
+                print([str(obj) for obj
+                       in self.storage.search(arg_list[0], words)])
 
     def do_count(self, arg):
         """Retrieve the number of instances of a class"""
         arg1 = parse(arg)
-        count = 0
-        for obj in models.storage.all().values():
-            if arg1[0] == type(obj).__name__:
-                count += 1
-        print(count)
+        print(self.storage.count(arg1[0]))
 
 
 if __name__ == "__main__":
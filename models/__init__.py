@@ -2,9 +2,12 @@
 """
 The __init__ dunder method for the models
 Makes the models directory become a package
+HBNB_TYPE_STORAGE selects the storage engine: file (default), wal,
+shard, sqlite, memory or cached, and the other options come from the
+environment or a config file (see models.engine.registry)
 """
 
-from models.engine.file_storage import FileStorage
+from models.engine import registry
 
-storage = FileStorage()
+storage = registry.create()
 storage.reload()
@@ -3,14 +3,45 @@
 Module that implements the base model class
 """
 
+from collections.abc import MutableMapping
 from datetime import datetime
 from uuid import uuid4
 
+import models
+
+classes = {}
+
 
 class BaseModel:
     """
     A class that defines common attr/methods for other classes
+    hash_indexes (tuple): attributes storage keeps a hash index on
+    range_indexes (tuple): numeric attributes storage keeps sorted
+    geo_index (tuple): latitude and longitude attributes storage keeps
+    a geospatial index on
+    text_index (tuple): text attributes storage keeps a full-text
+    index on
+    columns (tuple): numeric attributes storage keeps memory-mapped
+    columns of
+    fields (dict): the Field of each attribute kept in __slots__ by
+    a compact model (see compact()), empty for the others
     """
+    hash_indexes = ()
+    range_indexes = ()
+    geo_index = ()
+    text_index = ()
+    columns = ()
+    fields = {}
+
+    def __init_subclass__(cls, register=True, **kwargs):
+        """
+        Registers every model class in classes, by name, for storage
+        engines to rebuild its instances, unless register is False
+        (see models.engine.lazy)
+        """
+        super().__init_subclass__(**kwargs)
+        if register:
+            classes[cls.__name__] = cls
 
     def __init__(self, *args, **kwargs):
         """
@@ -29,6 +60,17 @@ class BaseModel:
                     else:
                         setattr(self, key, value)
 
+    def __setattr__(self, name, value):
+        """
+        Sets the attribute and marks it as changed in storage
+        """
+        storage = getattr(models, "storage", None)
+        if storage is not None:
+            storage.keep(self)
+        super().__setattr__(name, value)
+        if storage is not None:
+            storage.touch(self, name)
+
     def __str__(self):
         """
         Prints [<class name>] (<self.id>) <self.__dict__>
@@ -42,6 +84,8 @@ class BaseModel:
         """
         from models import storage
         self.updated_at = datetime.now()
+        storage.new(self)
+        storage.touch(self)
         storage.save()
 
     def to_dict(self):
@@ -51,8 +95,248 @@ class BaseModel:
         dictionary = self.__dict__.copy()
         dictionary["__class__"] = self.__class__.__name__
 
-        for key, value in self.__dict__.items():
+        for key, value in dictionary.items():
             if key in ("created_at", "updated_at"):
-                value = self.__dict__[key].isoformat()
+                value = value.isoformat()
                 dictionary[key] = value
         return dictionary
+
+
+classes["BaseModel"] = BaseModel
+_missing = object()
+
+
+class Field:
+    """
+    The descriptor of an attribute a compact model keeps in a slot:
+    read on the class, or on an instance that did not set it, it
+    gives its default, as a class attribute would
+    name (str): the name of the attribute
+    default: its value until set, missing for id and the timestamps
+    type (type): the type of default, values given as text are
+    converted to (see console.py do_update), None without default
+    slot (member descriptor): the slot holding the value
+    """
+
+    def __init__(self, name, default, slot):
+        """
+        Initializes the field name, held by slot
+        """
+        self.name = name
+        self.default = default
+        self.type = None if default is _missing else type(default)
+        self.slot = slot
+
+    def __get__(self, obj, owner=None):
+        """
+        returns the value of the field for obj, or its default
+        """
+        if obj is not None:
+            try:
+                return self.slot.__get__(obj, owner)
+            except AttributeError:
+                pass
+        if self.default is _missing:
+            raise AttributeError(self.name)
+        return self.default
+
+    def __set__(self, obj, value):
+        """
+        sets the value of the field for obj
+        """
+        self.slot.__set__(obj, value)
+
+    def __delete__(self, obj):
+        """
+        forgets the value of the field for obj
+        """
+        self.slot.__delete__(obj)
+
+
+def _others(obj):
+    """
+    returns the dictionary of the attributes of the compact instance
+    obj that are not fields, None until it is given one
+    """
+    try:
+        return type(obj)._others.__get__(obj)
+    except AttributeError:
+        return None
+
+
+def _new_others(obj):
+    """
+    returns the dictionary of the attributes of obj that are not
+    fields, creating it for the first of them
+    """
+    others = _others(obj)
+    if others is None:
+        others = {}
+        object.__setattr__(obj, "_others", others)
+    return others
+
+
+def _get_other(self, name):
+    """
+    returns the attribute name of a compact instance that is not a
+    field, from its _others slot
+    """
+    others = _others(self)
+    if others is None or name not in others:
+        raise AttributeError("{!r} object has no attribute {!r}".format(
+            type(self).__name__, name))
+    return others[name]
+
+
+def _set_attribute(self, name, value):
+    """
+    sets the attribute name of a compact instance, in its _others slot
+    when it is neither a field nor an attribute of its class, and
+    marks it as changed in storage
+    """
+    if name in self.fields or hasattr(type(self), name):
+        BaseModel.__setattr__(self, name, value)
+        return
+    storage = getattr(models, "storage", None)
+    if storage is not None:
+        storage.keep(self)
+    _new_others(self)[name] = value
+    if storage is not None:
+        storage.touch(self, name)
+
+
+def _del_attribute(self, name):
+    """
+    deletes the attribute name of a compact instance
+    """
+    if name in self.fields or hasattr(type(self), name):
+        object.__delattr__(self, name)
+        return
+    others = _others(self)
+    if others is None or name not in others:
+        raise AttributeError(name)
+    del others[name]
+
+
+class Fields(MutableMapping):
+    """
+    The __dict__ of an instance of a compact model: a mapping over the
+    fields it set, then over the other attributes it was given, kept
+    in the _others slot, only filled for the first of them, so that
+    reading it never creates a dictionary per instance.
+    Changing it does not go through BaseModel.__setattr__
+    obj (BaseModel): the instance
+    """
+
+    def __init__(self, obj):
+        """
+        Initializes the mapping of the attributes of obj
+        """
+        self.obj = obj
+
+    def __getitem__(self, name):
+        """
+        returns the attribute name
+        """
+        field = type(self.obj).fields.get(name)
+        if field is None:
+            return (_others(self.obj) or {})[name]
+        try:
+            return field.slot.__get__(self.obj)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name, value):
+        """
+        sets the attribute name
+        """
+        field = type(self.obj).fields.get(name)
+        if field is None:
+            _new_others(self.obj)[name] = value
+        else:
+            field.slot.__set__(self.obj, value)
+
+    def __delitem__(self, name):
+        """
+        deletes the attribute name
+        """
+        field = type(self.obj).fields.get(name)
+        if field is None:
+            del (_others(self.obj) or {})[name]
+            return
+        try:
+            field.slot.__delete__(self.obj)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __iter__(self):
+        """
+        yields the names of the attributes set
+        """
+        for name, field in type(self.obj).fields.items():
+            try:
+                field.slot.__get__(self.obj)
+            except AttributeError:
+                continue
+            yield name
+        others = _others(self.obj)
+        if others:
+            yield from list(others)
+
+    def __len__(self):
+        """
+        returns the number of attributes set
+        """
+        return sum(1 for name in self)
+
+    def copy(self):
+        """
+        returns a dictionary of the attributes
+        """
+        return dict(self)
+
+    def __repr__(self):
+        """
+        shows the attributes as a dictionary
+        """
+        return repr(dict(self))
+
+
+def compact(cls):
+    """
+    Class decorator making the model class cls compact: its instances
+    keep id, the timestamps and the attributes cls and the models it
+    extends declare with their default (e.g. email = "") in __slots__,
+    reached through a Field, instead of in a dictionary each; other
+    attributes go to a dictionary in the _others slot, only created
+    when one is set. __dict__ becomes a Fields, so that to_dict(),
+    __str__ and storage work as for other models. Returns the new
+    class, registered in place of cls
+    """
+    base = cls.__mro__[1]
+    defaults = {"id": _missing, "created_at": _missing,
+                "updated_at": _missing}
+    for model in reversed(cls.__mro__[:cls.__mro__.index(BaseModel)]):
+        for name, value in model.__dict__.items():
+            if (not name.startswith("_") and not hasattr(BaseModel, name)
+                    and not callable(value)
+                    and not hasattr(value, "__get__")):
+                defaults[name] = value
+    names = [name for name in defaults if name not in base.fields]
+    namespace = {k: v for k, v in cls.__dict__.items()
+                 if k not in defaults and k != "__weakref__"}
+    namespace["__slots__"] = tuple(names)
+    namespace["__dict__"] = property(Fields, doc=Fields.__doc__)
+    if not hasattr(base, "_others"):
+        namespace["__slots__"] += ("_others",)
+        namespace.update(__getattr__=_get_other,
+                         __setattr__=_set_attribute,
+                         __delattr__=_del_attribute)
+    new = type(cls)(cls.__name__, cls.__bases__, namespace)
+    fields = dict(base.fields)
+    for name in names:
+        field = Field(name, defaults[name], new.__dict__[name])
+        setattr(new, name, field)
+        fields[name] = field
+    new.fields = fields
+    return new
@@ -5,5 +5,6 @@ from models.base_model import BaseModel
 
 class City(BaseModel):
     """Implements the City class"""
+    hash_indexes = ("state_id",)
     state_id = ""
     name = ""
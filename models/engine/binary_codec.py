@@ -0,0 +1,170 @@
+#!/usr/bin/python3
+"""
+Defines the binary snapshot format of the storage file:
+MAGIC, a version byte, the table of interned strings (class and
+attribute names) and the records, each one prefixed by its length.
+A record holds the index of its class name and its attributes, each
+one as the index of its name, a type tag and a value: timestamps are
+microseconds since the epoch and UUIDs are 16 raw bytes
+"""
+
+import json
+import struct
+from datetime import datetime, timedelta
+
+MAGIC = b"HBNB"
+VERSION = 1
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+(NONE, FALSE, TRUE, INT, FLOAT, STR, SHORT_STR, JSON, DATETIME,
+ UUID16) = range(10)
+
+U8 = struct.Struct("<B")
+U16 = struct.Struct("<H")
+U32 = struct.Struct("<I")
+I64 = struct.Struct("<q")
+F64 = struct.Struct("<d")
+HEADER = struct.Struct("<4sBI")
+
+
+class BinaryCodec:
+    """
+    Encodes objects to binary records and writes and reads snapshots.
+    The table of interned strings only grows, so that records encoded
+    earlier stay valid and can be written again as they are
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty table of interned strings
+        """
+        self.__names = []
+        self.__index = {}
+
+    def intern(self, name):
+        """
+        returns the index of name in the table, adding it if needed
+        """
+        index = self.__index.get(name)
+        if index is None:
+            index = self.__index[name] = len(self.__names)
+            self.__names.append(name)
+        return index
+
+    def encode(self, cls_name, attrs):
+        """
+        returns the record of an object of cls_name holding attrs
+        """
+        out = [U16.pack(self.intern(cls_name)), U16.pack(len(attrs))]
+        for name, value in attrs.items():
+            out.append(U16.pack(self.intern(name)))
+            out.append(encode_value(value))
+        body = b"".join(out)
+        return U32.pack(len(body)) + body
+
+    def write(self, f, records):
+        """
+        writes a snapshot made of the list of encoded records to the
+        binary file f
+        """
+        f.write(HEADER.pack(MAGIC, VERSION, len(self.__names)))
+        for name in self.__names:
+            data = name.encode("utf-8")
+            f.write(U16.pack(len(data)) + data)
+        f.write(U32.pack(len(records)))
+        f.writelines(records)
+
+
+def encode_value(value):
+    """
+    returns the type tag and the encoded bytes of value
+    """
+    kind = type(value)
+    if kind is str:
+        if (len(value) == 36 and value[8] == value[13] == value[18] ==
+                value[23] == "-" and value == value.lower()):
+            try:
+                uuid = bytes.fromhex(value.replace("-", ""))
+            except ValueError:
+                uuid = b""
+            if len(uuid) == 16:
+                return U8.pack(UUID16) + uuid
+        data = value.encode("utf-8")
+        if len(data) < 256:
+            return U8.pack(SHORT_STR) + U8.pack(len(data)) + data
+        return U8.pack(STR) + U32.pack(len(data)) + data
+    if kind is datetime and value.tzinfo is None:
+        return U8.pack(DATETIME) + I64.pack((value - EPOCH) // MICROSECOND)
+    if kind is int and -2 ** 63 <= value < 2 ** 63:
+        return U8.pack(INT) + I64.pack(value)
+    if kind is float:
+        return U8.pack(FLOAT) + F64.pack(value)
+    if kind is bool:
+        return U8.pack(TRUE if value else FALSE)
+    if value is None:
+        return U8.pack(NONE)
+    data = json.dumps(value, default=str).encode("utf-8")
+    return U8.pack(JSON) + U32.pack(len(data)) + data
+
+
+def decode_value(data, pos):
+    """
+    returns the value encoded at pos in data and the position after it
+    """
+    tag = data[pos]
+    pos += 1
+    if tag == SHORT_STR:
+        end = pos + 1 + data[pos]
+        return str(data[pos + 1:end], "utf-8"), end
+    if tag == UUID16:
+        h = data[pos:pos + 16].hex()
+        return "{}-{}-{}-{}-{}".format(h[:8], h[8:12], h[12:16], h[16:20],
+                                       h[20:]), pos + 16
+    if tag == DATETIME:
+        micros = I64.unpack_from(data, pos)[0]
+        return EPOCH + micros * MICROSECOND, pos + 8
+    if tag == INT:
+        return I64.unpack_from(data, pos)[0], pos + 8
+    if tag == FLOAT:
+        return F64.unpack_from(data, pos)[0], pos + 8
+    if tag in (STR, JSON):
+        end = pos + 4 + U32.unpack_from(data, pos)[0]
+        text = str(data[pos + 4:end], "utf-8")
+        return (text if tag == STR else json.loads(text)), end
+    if tag in (NONE, FALSE, TRUE):
+        return (None, False, True)[tag], pos
+    raise ValueError("unknown type tag {}".format(tag))
+
+
+def decode(data, names, pos=0):
+    """
+    returns the class name and the attributes of the record at pos
+    in data (without its length prefix), names being the table of
+    interned strings
+    """
+    cls_name = names[U16.unpack_from(data, pos)[0]]
+    count = U16.unpack_from(data, pos + 2)[0]
+    pos += 4
+    attrs = {}
+    for _ in range(count):
+        name = names[U16.unpack_from(data, pos)[0]]
+        attrs[name], pos = decode_value(data, pos + 2)
+    return cls_name, attrs
+
+
+def read(f):
+    """
+    yields the class name and the attributes of every record of the
+    snapshot in the binary file f
+    """
+    magic, version, count = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a version {} snapshot".format(VERSION))
+    names = []
+    for _ in range(count):
+        size = U16.unpack(f.read(2))[0]
+        names.append(str(f.read(size), "utf-8"))
+    for _ in range(U32.unpack(f.read(4))[0]):
+        size = U32.unpack(f.read(4))[0]
+        yield decode(memoryview(f.read(size)), names)
@@ -0,0 +1,406 @@
+#!/usr/bin/python3
+"""
+Defines a storage engine that:
+Keeps the objects in the JSON file and
+Only holds the ones used last in memory, reading the others back
+through the offset of each object in the file
+"""
+
+import json
+import os
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import datetime
+from models.engine import json_stream, safe_file
+from models.engine.file_storage import BUFFER_SIZE, FileStorage, classes
+
+
+class CachedObjects(Mapping):
+    """
+    The objects of a CachedStorage, or of one of its classes, as a
+    read-only mapping that reads each object when it is accessed:
+    iterating over it does not load them all in memory
+    storage (CachedStorage): the engine holding the objects
+    cls_name (str): the name of their class, None for all of them
+    """
+
+    def __init__(self, storage, cls_name=None):
+        """
+        Initializes the view of the objects of cls_name
+        """
+        self.storage = storage
+        self.cls_name = cls_name
+
+    def __getitem__(self, key):
+        """
+        returns the object of key
+        """
+        obj = None
+        if self.cls_name is None or key.startswith(self.cls_name + "."):
+            obj = self.storage.peek(key)
+        if obj is None:
+            raise KeyError(key)
+        return obj
+
+    def __iter__(self):
+        """
+        returns an iterator over the keys of the objects
+        """
+        return iter(self.storage.keys(self.cls_name))
+
+    def __len__(self):
+        """
+        returns the number of objects
+        """
+        return len(self.storage.keys(self.cls_name))
+
+    def items(self):
+        """
+        yields the (key, object) pairs of the objects, one at a time,
+        leaving out those deleted meanwhile
+        """
+        for key in self:
+            obj = self.storage.peek(key)
+            if obj is not None:
+                yield key, obj
+
+    def values(self):
+        """
+        yields the objects, one at a time
+        """
+        for key, obj in self.items():
+            yield obj
+
+
+class CachedStorage(FileStorage):
+    """
+    Serializes instances to the JSON file and
+    Holds at most __cache_size of them in memory, on top of those with
+    unsaved changes: the ones used least recently are dropped from
+    memory and read back from the file when asked for again. all()
+    returns a CachedObjects, and queries scan the objects since no
+    secondary index is kept
+    __path - private class attribute - path to the file
+    __cache_size - private class attr - number of objects without
+    unsaved changes held in memory at most
+    __offsets - private class attr - the offset and size in the file
+    of the text of each object, by class name then key
+    __reader - private class attr - the file __offsets points into,
+    open for reading
+    __recent - private class attr - keys of the objects in memory
+    without unsaved changes, the one used least recently first
+    __live - private class attr - objects read from the file or
+    dropped from memory that are still used elsewhere, by key, so
+    that they are handed out again rather than read a second time
+    __deleted - private class attr - keys of the objects deleted by
+    the write in progress, still in __offsets until it ends
+    """
+
+    secondary_indexes = False
+
+    __path = "file.json"
+    __cache_size = 10000
+    __offsets = {}
+    __reader = None
+    __recent = OrderedDict()
+    __live = weakref.WeakValueDictionary()
+    __deleted = set()
+
+    def configure(self, path=None, cache_size=None, format=None,
+                  **options):
+        """
+        sets the options of FileStorage.configure(), along with the
+        number of objects without unsaved changes held in memory at
+        most. The file is always JSON
+        """
+        if cache_size is not None and int(cache_size) <= 0:
+            raise ValueError("cache_size must be positive")
+        if format not in (None, "json"):
+            raise ValueError("the cached engine only writes JSON")
+        if path is not None:
+            CachedStorage.__path = path
+        if cache_size is not None:
+            CachedStorage.__cache_size = int(cache_size)
+        super().configure(path=path, **options)
+
+    def all(self, cls=None):
+        """
+        returns the objects, or those of cls, as a CachedObjects
+        """
+        if cls is None:
+            return CachedObjects(self)
+        return CachedObjects(self, cls if isinstance(cls, str)
+                             else cls.__name__)
+
+    def keys(self, cls=None):
+        """
+        returns the list of the keys of the objects, or of those of
+        cls (a class or a class name)
+        """
+        cls_name = cls if cls is None or isinstance(cls, str) \
+            else cls.__name__
+        with self.lock().read():
+            held = super().all(cls_name)
+            dirty = self.dirty()
+            if cls_name is None:
+                stored = self.__offsets.values()
+            else:
+                stored = [self.__offsets.get(cls_name, {})]
+            keys = list(held)
+            for offsets in stored:
+                keys.extend(k for k in offsets if k not in held and
+                            k not in dirty and k not in self.__deleted)
+            return keys
+
+    def get(self, cls, id):
+        """
+        returns the object of cls (a class or a class name) with
+        the given id, or None if there is none, reading it from the
+        file when it is not in memory
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        key = "{}.{}".format(cls_name, id)
+        with self.lock().write():
+            obj = super().peek(key)
+            if obj is None:
+                return self.__hold(key)
+            if key in self.__recent:
+                self.__recent.move_to_end(key)
+            return obj
+
+    def count(self, cls=None):
+        """
+        returns the number of objects, or of objects of cls
+        """
+        return len(self.keys(cls))
+
+    def peek(self, key):
+        """
+        returns the object key holds, or None, reading it from the file
+        without keeping it in memory when it is not there
+        """
+        with self.lock().read():
+            obj = super().peek(key)
+            if obj is not None:
+                return obj
+            if key in self.dirty() or key in self.__deleted:
+                return None
+            offset = self.__offsets.get(key.split(".", 1)[0], {}).get(key)
+            if offset is None:
+                return None
+            obj = self.__live.get(key)
+            if obj is None:
+                obj = self.__read(*offset)
+                self.__live[key] = obj
+            return obj
+
+    def __read(self, offset, size):
+        """
+        returns the object whose text is size bytes at offset in the
+        file, built without going through BaseModel.__setattr__
+        """
+        attrs = json.loads(os.pread(self.__reader.fileno(), size, offset))
+        cls = classes[attrs.pop("__class__")]
+        for name in ("created_at", "updated_at"):
+            if name in attrs:
+                attrs[name] = datetime.fromisoformat(attrs[name])
+        obj = cls.__new__(cls)
+        obj.__dict__.update(attrs)
+        return obj
+
+    def __hold(self, key):
+        """
+        puts the object of key from the file in memory, when it is not
+        there already, dropping the objects used least recently to stay
+        within __cache_size, and returns it, or None
+        """
+        with self.lock().write():
+            obj = super().peek(key)
+            if obj is not None:
+                return obj
+            obj = self.peek(key)
+            if obj is None:
+                return None
+            self.admit(obj)
+            self.__recent[key] = None
+            self.__shrink()
+            return obj
+
+    def __shrink(self):
+        """
+        drops the objects used least recently from memory until at most
+        __cache_size objects without unsaved changes are left
+        """
+        while len(self.__recent) > self.__cache_size:
+            key = self.__recent.popitem(last=False)[0]
+            obj = self.evict(key)
+            if obj is not None:
+                self.__live[key] = obj
+
+    def __changing(self, key):
+        """
+        forgets that key has no unsaved changes, as it is changing
+        """
+        with self.lock().write():
+            self.__recent.pop(key, None)
+
+    def keep(self, obj):
+        """
+        puts obj back in memory when it was dropped from it, for its
+        change to be tracked, then records it (see FileStorage.keep())
+        """
+        key = "{}.{}".format(obj.__class__.__name__, obj.__dict__.get("id"))
+        if self.__live.get(key) is obj:
+            self.__hold(key)
+        super().keep(obj)
+
+    def touch(self, obj, name=None):
+        """
+        marks the attribute name of obj as changed (see
+        FileStorage.touch()), putting obj back in memory when it was
+        dropped from it
+        """
+        key = "{}.{}".format(obj.__class__.__name__, obj.__dict__.get("id"))
+        if self.__live.get(key) is obj:
+            self.__hold(key)
+        super().touch(obj, name)
+        self.__changing(key)
+
+    def new(self, obj):
+        """
+        sets in memory the obj with key <obj class name>.id, replacing
+        the object of the file holding its key
+        """
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__hold(key)
+        super().new(obj)
+        self.__changing(key)
+
+    def delete(self, obj=None):
+        """
+        deletes obj, from memory and from the file on the next save
+        """
+        if obj is not None:
+            key = "{}.{}".format(obj.__class__.__name__, obj.id)
+            self.__hold(key)
+            super().delete(obj)
+            self.__changing(key)
+
+    def write(self):
+        """
+        rewrites the file with the objects changed since the last save
+        and the text of the others copied from the previous file, one
+        object at a time, without holding the lock (see safe_file).
+        The objects written are then dropped from memory as needed
+        """
+        with self.file_lock(self.__path):
+            with self.lock().write():
+                changes = self.take_changes()
+                if not changes and self.__reader is not None:
+                    return
+                offsets = self.__offsets
+                reader = self.__reader
+                CachedStorage.__deleted = {k for k, attrs, names in changes
+                                           if attrs is None}
+            written = {}
+            try:
+                safe_file.write(
+                    self.__path,
+                    lambda f: self.__write_to(f, offsets, reader, changes,
+                                              written),
+                    BUFFER_SIZE)
+                new_reader = open(self.__path, mode="rb")
+            except BaseException:
+                self.restore_changes(changes)
+                CachedStorage.__deleted = set()
+                raise
+            with self.lock().write():
+                CachedStorage.__offsets = written
+                CachedStorage.__reader = new_reader
+                CachedStorage.__deleted = set()
+                held = super().all()
+                for key, attrs, names in changes:
+                    if (attrs is not None and key in held and
+                            key not in self.dirty()):
+                        self.__recent[key] = None
+                self.__shrink()
+        if reader is not None:
+            reader.close()
+
+    def __write_to(self, f, offsets, reader, changes, written):
+        """
+        writes to the binary file f the objects of changes and those
+        of offsets, read from reader, that did not change, recording
+        where each one lands in written
+        """
+        changed = {key: attrs for key, attrs, names in changes}
+        pos = 0
+        separator = b"{"
+        for cls_offsets in offsets.values():
+            for key, (offset, size) in cls_offsets.items():
+                if key not in changed:
+                    data = os.pread(reader.fileno(), size, offset)
+                    pos = self.__put(f, pos, separator, key, data, written)
+                    separator = b", "
+        for key, attrs in changed.items():
+            if attrs is not None:
+                data = json.dumps(attrs).encode()
+                pos = self.__put(f, pos, separator, key, data, written)
+                separator = b", "
+        f.write(b"{}" if separator == b"{" else b"}")
+
+    def __put(self, f, pos, separator, key, data, written):
+        """
+        writes the member key: data to f at pos, records where data
+        lands in written and returns the position after it
+        """
+        head = separator + json.dumps(key).encode() + b": "
+        f.write(head)
+        f.write(data)
+        pos += len(head)
+        written.setdefault(key.split(".", 1)[0], {})[key] = (pos, len(data))
+        return pos + len(data)
+
+    def reload(self):
+        """
+        reads the key of each object of the file and where its text is,
+        without keeping the objects, which are read back on access.
+        The objects in memory are forgotten
+        """
+        with self.file_lock(self.__path):
+            safe_file.recover(self.__path)
+            offsets = {}
+            try:
+                reader = open(self.__path, mode="rb")
+            except FileNotFoundError:
+                reader = None
+            if reader is not None:
+                with open(self.__path, encoding="latin-1") as f:
+                    for key, value, start, end in json_stream.members(f):
+                        offsets.setdefault(key.split(".", 1)[0],
+                                           {})[key] = (start, end - start)
+            with self.lock().write():
+                old = self.__reader
+                CachedStorage.__offsets = offsets
+                CachedStorage.__reader = reader
+                CachedStorage.__deleted = set()
+                self.__recent.clear()
+                self.__live.clear()
+                self.dirty().clear()
+                for key in list(super().all()):
+                    self.evict(key)
+        if old is not None:
+            old.close()
+
+    def catch_up(self):
+        """
+        returns False: the file is only read again by reload()
+        """
+        return False
+
+    def stale(self):
+        """
+        returns False: the file is only read again by reload()
+        """
+        return False
@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+"""
+Defines a side store keeping the numeric attributes of one class
+as typed columns: one file of packed machine values per attribute,
+read back through mmap so that a column is served without copying.
+The files use the layout of NumPy arrays, so numpy.asarray() or
+numpy.frombuffer() wraps a column as it is
+"""
+
+import json
+import mmap
+import os
+import sys
+from array import array
+from datetime import datetime
+from math import isfinite
+
+from models.engine.binary_codec import EPOCH, MICROSECOND
+
+DTYPES = {"q": "i8", "d": "f8"}
+ORDER = "<" if sys.byteorder == "little" else ">"
+
+
+def typecode(cls, attr):
+    """
+    returns the array typecode of the column of attr in cls: float64
+    for attributes defaulting to a float, int64 otherwise (timestamps
+    are microseconds since the epoch)
+    """
+    return "d" if isinstance(getattr(cls, attr, None), float) else "q"
+
+
+def to_number(value, code):
+    """
+    returns value as a number of the type of typecode code. Values
+    that are not numbers become NaN in a float column, 0 otherwise
+    """
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = (value - EPOCH) // MICROSECOND
+    if isinstance(value, (int, float)) and isfinite(value):
+        if code == "d":
+            return float(value)
+        if -2 ** 63 <= value < 2 ** 63:
+            return int(value)
+    return float("nan") if code == "d" else 0
+
+
+class ColumnStore:
+    """
+    Columns of the numeric attributes of the objects of one class,
+    stored under directory as <cls_name>.<attr>.col files along with
+    <cls_name>.json, the manifest listing the keys of the rows
+    directory (str): the directory holding the files
+    cls_name (str): the name of the class
+    columns (dict): the typecode of each attribute
+    """
+
+    def __init__(self, directory, cls_name, columns):
+        """
+        Initializes a store whose files are not written yet
+        """
+        self.directory = directory
+        self.cls_name = cls_name
+        self.columns = dict(columns)
+        self.__keys = []
+        self.__views = {}
+
+    def path(self, attr):
+        """
+        returns the path of the file of the column of attr
+        """
+        return os.path.join(self.directory,
+                            "{}.{}.col".format(self.cls_name, attr))
+
+    def write(self, objects):
+        """
+        rewrites the files from objects, a dictionary of the objects
+        of the class. Each file is replaced as a whole, so columns
+        handed out earlier keep the values they were read with
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        for attr, code in self.columns.items():
+            values = array(code, (to_number(getattr(obj, attr, None), code)
+                                  for obj in objects.values()))
+            self.__replace(self.path(attr), values.tofile)
+        manifest = {"keys": list(objects),
+                    "columns": {attr: ORDER + DTYPES[code]
+                                for attr, code in self.columns.items()}}
+        self.__replace(os.path.join(self.directory, self.cls_name + ".json"),
+                       lambda f: f.write(json.dumps(manifest).encode()))
+        self.__keys = manifest["keys"]
+        self.__views = {}
+
+    def __replace(self, path, write):
+        """
+        writes path through a temporary file renamed over it
+        """
+        tmp = path + ".tmp"
+        with open(tmp, mode="wb") as f:
+            write(f)
+        os.replace(tmp, path)
+
+    def keys(self):
+        """
+        returns the list of the keys of the rows, in column order
+        """
+        return list(self.__keys)
+
+    def column(self, attr):
+        """
+        returns a read-only memoryview of the values of attr, mapped
+        from its file
+        """
+        view = self.__views.get(attr)
+        if view is None:
+            code = self.columns[attr]
+            with open(self.path(attr), mode="rb") as f:
+                if os.fstat(f.fileno()).st_size:
+                    view = memoryview(mmap.mmap(f.fileno(), 0,
+                                                access=mmap.ACCESS_READ))
+                    view = view.cast(code)
+                else:
+                    view = memoryview(array(code)).toreadonly()
+            self.__views[attr] = view
+        return view
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""
+Defines the advisory lock the processes sharing a store take before
+reading or writing its files, so that one of them at a time merges
+the writes of the others and writes its own. The lock is flock(2) on
+a lock file; where fcntl is missing it only locks out the threads of
+the process
+"""
+
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLock:
+    """
+    An exclusive advisory lock on a file, held by one process at a
+    time and reentrant within it, used as a context manager
+    path (str): the lock file, created on first use
+    """
+
+    def __init__(self, path):
+        """
+        Initializes an unlocked lock
+        """
+        self.path = path
+        self.__lock = threading.RLock()
+        self.__depth = 0
+        self.__file = None
+
+    def __enter__(self):
+        """
+        waits until no other process, nor thread, holds the lock, then
+        takes it
+        """
+        self.__lock.acquire()
+        if not self.__depth:
+            try:
+                f = open(self.path, mode="a")
+            except BaseException:
+                self.__lock.release()
+                raise
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+            except BaseException:
+                f.close()
+                self.__lock.release()
+                raise
+            self.__file = f
+        self.__depth += 1
+
+    def __exit__(self, *exc):
+        """
+        gives the lock back, to other processes once it is released
+        as many times as it was taken
+        """
+        self.__depth -= 1
+        if not self.__depth:
+            f, self.__file = self.__file, None
+            f.close()
+        self.__lock.release()
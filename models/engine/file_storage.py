@@ -5,14 +5,23 @@ Serializes instances to JSON file and
 Deserializes JSON file to instances
 """
 
+import io
 import json
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.amenity import Amenity
-from models.city import City
-from models.place import Place
-from models.review import Review
+import os
+import threading
+from contextlib import contextmanager
+from models.engine import binary_codec, json_stream, safe_file
+from models.engine.column_store import ColumnStore, typecode
+from models.engine.file_lock import FileLock
+from models.engine.flusher import Flusher
+from models.engine.indexes import GeoIndex, HashIndex, RangeIndex, TextIndex
+from models.engine.lazy import lazy
+from models.engine.rwlock import RWLock, WriteLock
+from models.engine.snapshot import Snapshot
+from models.base_model import classes
+from models import user, state, amenity, city, place, review
+
+BUFFER_SIZE = 1 << 16
 
 
 class FileStorage:
@@ -21,39 +30,1136 @@ class FileStorage:
     Deserializes JSON file to instances
     __file_path - private class attribute - path to file
     __objects - private class attr - dictionary
+    __dirty - private class attr - objects changed since the last save
+    __encoded - private class attr - JSON text of each object as of
+    the last save, written again as is while the object is unchanged,
+    so that a save only encodes the objects changed since. It holds
+    one text per object, the very one its stand-in holds for an object
+    read from the file and not changed since
+    __by_class - private class attr - the objects of __objects
+    grouped in one dictionary per class name
+    __attr_indexes - private class attr - the secondary indexes of
+    each class name, built on first lookup
+    __text_dir - private class attribute - directory of the saved
+    full-text indexes, one file per class name
+    __text_states - private class attr - the saved full-text index
+    of each class name whose index is not built yet
+    __text_changes - private class attr - the keys of each class name
+    whose full-text index changed since it was last saved, applied to
+    its saved index when it is built
+    __text_built - private class attr - names of the classes whose
+    full-text index was built from their objects and not saved since,
+    left out of the list of the saved ones until it is
+    __format - private class attribute - format of the saved file,
+    json or binary (option format); reload() reads both
+    __columns_dir - private class attribute - directory of the
+    memory-mapped numeric columns
+    __columns - private class attr - the ColumnStore of each class
+    name, created on first access to one of its columns
+    __stale_columns - private class attr - names of the classes whose
+    column files are behind their objects, rewritten on the next
+    access to one of their columns
+    __flush_policy - private class attribute - when saves are written
+    (option flush): immediate, interval:<ms> or count:<n>
+    __lock - private class attr - the WriteLock or, when the option
+    locking is rw, the RWLock guarding the objects: changes hold its
+    write side and queries its read side
+    __batches - private class attr - thread-local list of the undo
+    log of each batch the thread has open, innermost last: the object
+    each key held before the batch and a copy of its attributes
+    __file_locks - private class attr - the FileLock of each lock
+    file, <__file_path>.lock, shared with the other processes
+    __version - private class attr - device, inode, size and
+    modification time of the file as this process last read or wrote
+    it, telling when another process wrote it since
+    __epoch - private class attr - version of __objects, counting
+    the snapshots opened so far
+    __snapshots - private class attr - number of open snapshots of
+    each epoch
+    __history - private class attr - the versions of each key the
+    open snapshots still see: (epoch, obj, copy of its attributes)
+    of what it held before its first change in that epoch
+    secondary_indexes (bool): whether the indexes the models declare
+    are kept in memory; engines holding part of the objects only turn
+    it off, and queries scan the objects instead
     """
 
+    secondary_indexes = True
+
     __file_path = "file.json"
+    __text_dir = "file.json.text"
+    __format = "json"
+    __codec = binary_codec.BinaryCodec()
     __objects = {}
+    __dirty = {}
+    __encoded = {}
+    __by_class = {}
+    __indexed = None
+    __attr_indexes = {}
+    __text_states = {}
+    __text_changes = {}
+    __text_built = set()
+    __columns_dir = "file.json.columns"
+    __columns = {}
+    __stale_columns = set()
+    __flush_policy = "immediate"
+    __lock = WriteLock()
+    __flusher = None
+    __batches = threading.local()
+    __file_locks = {}
+    __version = None
+    __epoch = 0
+    __snapshots = {}
+    __history = {}
+
+    def configure(self, path=None, format=None, flush=None,
+                  locking=None):
+        """
+        sets the options of the engine (see models.engine.registry),
+        shared by its instances: the path of the file, next to which
+        the full-text indexes and the columns are kept, its format
+        (json or binary), the flush policy of this instance (see
+        Flusher) and the locking (write, or rw for a RWLock)
+        """
+        if format not in (None, "json", "binary"):
+            raise ValueError("unknown storage format {!r}".format(format))
+        if locking not in (None, "write", "rw"):
+            raise ValueError("unknown locking {!r}".format(locking))
+        if path is not None:
+            FileStorage.__file_path = path
+            FileStorage.__text_dir = path + ".text"
+            FileStorage.__columns_dir = path + ".columns"
+        if format is not None:
+            FileStorage.__format = format
+        if locking is not None:
+            FileStorage.__lock = RWLock() if locking == "rw" else WriteLock()
+        if flush is not None:
+            self.set_flush_policy(flush)
+
+    def all(self, cls=None):
+        """
+        returns the dictionary __objects (a copy of it under a RWLock,
+        for other threads to change it meanwhile), or only the objects
+        of cls (a class or a class name)
+        """
+        if cls is None:
+            for cls_name in classes:
+                self.load(cls_name)
+            if isinstance(self.__lock, WriteLock):
+                return self.__objects
+            with self.__lock.read():
+                return dict(self.__objects)
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with self.__read(cls_name):
+            return dict(self.__index().get(cls_name, {}))
+
+    def get(self, cls, id):
+        """
+        returns the object of cls (a class or a class name) with
+        the given id, or None if there is none
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        self.load(cls_name)
+        return self.__objects.get("{}.{}".format(cls_name, id))
+
+    def count(self, cls=None):
+        """
+        returns the number of objects, or of objects of cls
+        """
+        if cls is None:
+            return len(self.all())
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with self.__read(cls_name):
+            return len(self.__index().get(cls_name, {}))
+
+    def peek(self, key):
+        """
+        returns the object key holds, or None, without keeping it in
+        memory. FileStorage holds every object, engines holding part
+        of them only read the others back
+        """
+        return self.__objects.get(key)
+
+    def load(self, cls_name):
+        """
+        makes sure the objects of the class named cls_name are in
+        __objects. reload() already reads all of them, so there is
+        nothing to do here; engines reading lazily override it
+        """
+        pass
+
+    def __read(self, cls_name):
+        """
+        loads the objects of the class named cls_name, then returns
+        the read side of the lock, to query them under
+        """
+        self.load(cls_name)
+        return self.__lock.read()
+
+    def lookup(self, cls, attr, value):
+        """
+        returns a dictionary of the objects of cls whose attribute
+        attr equals value, through the hash index of attr when cls
+        declares one in hash_indexes
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with self.__read(cls_name):
+            index = self.__indexes_of(cls_name).get(("hash", attr))
+            if index is None:
+                return {k: v for k, v in self.all(cls_name).items()
+                        if getattr(v, attr, None) == value}
+            return index.lookup(value)
+
+    def between(self, cls, attr, low=None, high=None, limit=None,
+                reverse=False):
+        """
+        returns the list of objects of cls whose numeric attribute attr
+        is between low and high (both included, None for no bound),
+        sorted on attr (descending if reverse) and cut to limit objects.
+        Uses the range index of attr when cls declares one in
+        range_indexes
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with self.__read(cls_name):
+            index = self.__indexes_of(cls_name).get(("range", attr))
+            if index is None:
+                index = RangeIndex(attr)
+                for k, v in self.all(cls_name).items():
+                    index.add(k, v)
+            return index.between(low, high, limit, reverse)
+
+    def near(self, cls, latitude, longitude, radius_km):
+        """
+        returns the list of objects of cls within radius_km kilometers
+        of (latitude, longitude), nearest first
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with self.__read(cls_name):
+            return self.__geo_index(cls_name).near(latitude, longitude,
+                                                   radius_km)
+
+    def nearest(self, cls, latitude, longitude, k=1):
+        """
+        returns the list of the k objects of cls nearest to
+        (latitude, longitude), nearest first
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with self.__read(cls_name):
+            return self.__geo_index(cls_name).nearest(latitude, longitude, k)
+
+    def within(self, cls, south, west, north, east):
+        """
+        returns the list of objects of cls inside the box bounded by
+        the latitudes south and north and the longitudes west and east
+        (west > east for a box crossing the antimeridian)
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with self.__read(cls_name):
+            return self.__geo_index(cls_name).within(south, west, north,
+                                                     east)
+
+    def search(self, cls, query, k=10):
+        """
+        returns the list of the (at most k) objects of cls whose
+        attributes listed in text_index best match the words of
+        query, best first
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        with self.__read(cls_name):
+            index = self.__indexes_of(cls_name).get(("text",))
+            attrs = getattr(classes.get(cls_name), "text_index", ())
+            if index is None and attrs:
+                index = TextIndex(*attrs)
+                for key, obj in self.all(cls_name).items():
+                    index.add(key, obj)
+            if index is None:
+                return []
+            return [self.peek(key) for key in index.search(query, k)]
+
+    def column(self, cls, attr):
+        """
+        returns a read-only memoryview, mapped from disk without
+        copying, of the values of attr (listed in the columns of cls)
+        for every object of cls, in the order of column_keys(cls).
+        NumPy wraps it as it is: numpy.asarray(storage.column(...))
+        """
+        self.load(cls if isinstance(cls, str) else cls.__name__)
+        with self.__lock.write():
+            return self.__column_store(cls).column(attr)
+
+    def column_keys(self, cls):
+        """
+        returns the list of the keys of the objects of cls, in the
+        order of the values of its columns
+        """
+        self.load(cls if isinstance(cls, str) else cls.__name__)
+        with self.__lock.write():
+            return self.__column_store(cls).keys()
+
+    def __column_store(self, cls):
+        """
+        returns the ColumnStore of cls (a class or a class name),
+        rewriting its files first when its objects changed since
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        self.load(cls_name)
+        self.__index()
+        store = self.__columns.get(cls_name)
+        if store is None:
+            model = classes.get(cls_name)
+            store = ColumnStore(self.__columns_dir, cls_name,
+                                {attr: typecode(model, attr)
+                                 for attr in getattr(model, "columns", ())})
+            self.__columns[cls_name] = store
+            self.__stale_columns.add(cls_name)
+        if cls_name in self.__stale_columns:
+            store.write(self.all(cls_name))
+            self.__stale_columns.discard(cls_name)
+        return store
+
+    def lock(self):
+        """
+        returns the lock guarding the objects (see configure()), for
+        engines to guard their own state along with them
+        """
+        return self.__lock
 
-    def all(self):
+    def dirty(self):
         """
-        returns the dictionary __objects
+        returns the dictionary __dirty: <obj class name>.id of every
+        object created, changed or deleted since the last save, mapped
+        to the names of its changed attributes (None for the whole object)
         """
-        return self.__objects
+        return self.__dirty
+
+    def changes(self):
+        """
+        returns the list of (key, obj, names) of the objects created,
+        changed or deleted since the last save: obj is None for a
+        deleted object and names is None for a whole object
+        """
+        return [(k, self.__objects.get(k), names)
+                for k, names in self.__dirty.items()]
+
+    @contextmanager
+    def batch(self):
+        """
+        groups the changes the calling thread makes in the with block:
+        the saves it asks for in it are written once, when its
+        outermost batch ends. When an
+        exception leaves the block, the objects created, changed or
+        deleted in it are put back as they were (values changed in
+        place excepted) and the exception is raised again
+        """
+        undo = {}
+        self.__open_batches().append(undo)
+        try:
+            yield self
+        except BaseException:
+            self.__end_batch(undo)
+            self.__rollback(undo)
+            raise
+        self.__end_batch(undo)
+        if not self.__open_batches() and self.__dirty:
+            self.save()
+
+    def __open_batches(self):
+        """
+        returns the list of the undo logs of the batches the calling
+        thread has open: the changes of other threads are neither
+        logged nor held back by them
+        """
+        batches = getattr(self.__batches, "logs", None)
+        if batches is None:
+            batches = self.__batches.logs = []
+        return batches
+
+    def __end_batch(self, undo):
+        """
+        closes the batch of undo, handing its log to the enclosing one
+        """
+        batches = self.__open_batches()
+        batches.pop()
+        if batches:
+            outer = batches[-1]
+            for key, before in undo.items():
+                outer.setdefault(key, before)
+
+    def __rollback(self, undo):
+        """
+        puts back the objects of the undo log of a batch
+        """
+        with self.__lock.write():
+            for key, (obj, attrs) in undo.items():
+                current = self.__objects.get(key)
+                if current is not None:
+                    self.delete(current)
+                if obj is not None:
+                    obj.__dict__.clear()
+                    obj.__dict__.update(attrs)
+                    self.new(obj)
+
+    def snapshot(self, cls=None):
+        """
+        returns a Snapshot of the objects, or of the objects of cls
+        only, as they are now, which keeps showing them so while they
+        change, until it is closed. The versions it needs are kept from
+        the first change of each object on, and forgotten once no open
+        snapshot needs them. A snapshot of cls only loads cls
+        """
+        self.all(cls)
+        with self.__lock.write():
+            FileStorage.__epoch += 1
+            epoch = self.__epoch
+            self.__snapshots[epoch] = self.__snapshots.get(epoch, 0) + 1
+            keys = list(self.all(cls))
+        return Snapshot(epoch, keys, self.__version_at, self.__release)
+
+    def __version_at(self, key, epoch):
+        """
+        returns a copy of the object key held at epoch, or None
+        """
+        with self.__lock.read():
+            for changed, obj, attrs in self.__history.get(key, ()):
+                if changed >= epoch:
+                    break
+            else:
+                obj = self.peek(key)
+                attrs = None if obj is None else dict(obj.__dict__)
+        if obj is None:
+            return None
+        copy = obj.__class__.__new__(obj.__class__)
+        copy.__dict__.update(attrs)
+        return copy
+
+    def __release(self, epoch):
+        """
+        closes a snapshot of epoch, forgetting the versions no open
+        snapshot needs anymore
+        """
+        with self.__lock.write():
+            self.__snapshots[epoch] -= 1
+            if not self.__snapshots[epoch]:
+                del self.__snapshots[epoch]
+            if not self.__snapshots:
+                self.__history.clear()
+                return
+            oldest = min(self.__snapshots)
+            for key, history in list(self.__history.items()):
+                history[:] = [h for h in history if h[0] >= oldest]
+                if not history:
+                    del self.__history[key]
+
+    def keep(self, obj):
+        """
+        records the attributes of obj in the open batch and for the
+        open snapshots, if any, before they first change in them.
+        Called by BaseModel.__setattr__
+        """
+        if self.__open_batches() or self.__snapshots:
+            key = "{}.{}".format(obj.__class__.__name__,
+                                 obj.__dict__.get("id"))
+            with self.__lock.write():
+                if self.__objects.get(key) is obj:
+                    self.__remember(key)
+
+    def __remember(self, key):
+        """
+        records what key holds before it first changes: in the batch
+        the calling thread has open, if any, and for the newest open
+        snapshot, if any
+        """
+        obj = self.__objects.get(key)
+        batches = self.__open_batches()
+        if batches and key not in batches[-1]:
+            batches[-1][key] = (
+                obj, None if obj is None else dict(obj.__dict__))
+        if self.__snapshots:
+            history = self.__history.setdefault(key, [])
+            if not history or history[-1][0] < max(self.__snapshots):
+                history.append((self.__epoch, obj, None if obj is None
+                                else dict(obj.__dict__)))
 
     def new(self, obj):
         """
         sets in __objects the obj with key <obj class name>.id
         """
-        self.__objects["{}.{}".format(obj.__class__.__name__, obj.id)] = obj
+        self.__put("{}.{}".format(obj.__class__.__name__, obj.id), obj)
+
+    def __put(self, key, obj):
+        """
+        sets in __objects the obj with key key, without reading obj
+        """
+        cls_name = obj.__class__.__name__
+        if self.__objects.get(key) is obj:
+            return
+        with self.__lock.write():
+            self.__remember(key)
+            self.__index().setdefault(cls_name, {})[key] = obj
+            self.__objects[key] = obj
+            self.__dirty[key] = None
+            self.__text_changed(cls_name, key)
+            for index in self.__attr_indexes.get(cls_name, {}).values():
+                index.add(key, obj)
+            if cls_name in self.__columns:
+                self.__stale_columns.add(cls_name)
+
+    def admit(self, obj):
+        """
+        puts obj, read back from disk, in __objects without marking it
+        dirty nor recording it for the open batches and snapshots, and
+        returns it, or the object already holding its key. For engines
+        holding part of the objects in memory
+        """
+        cls_name = obj.__class__.__name__
+        key = "{}.{}".format(cls_name, obj.id)
+        with self.__lock.write():
+            current = self.__objects.get(key)
+            if current is not None:
+                return current
+            self.__index().setdefault(cls_name, {})[key] = obj
+            self.__objects[key] = obj
+            for index in self.__attr_indexes.get(cls_name, {}).values():
+                index.add(key, obj)
+            return obj
+
+    def evict(self, key):
+        """
+        takes the object of key out of __objects, unless it has
+        unsaved changes, without marking it deleted, and returns it,
+        or None when it was kept or not there. For engines holding
+        part of the objects in memory
+        """
+        with self.__lock.write():
+            obj = self.__objects.get(key)
+            if obj is None or key in self.__dirty:
+                return None
+            cls_name = obj.__class__.__name__
+            self.__index()[cls_name].pop(key)
+            del self.__objects[key]
+            self.__encoded.pop(key, None)
+            for index in self.__attr_indexes.get(cls_name, {}).values():
+                index.remove(key)
+            return obj
+
+    def touch(self, obj, name=None):
+        """
+        marks the attribute name of obj as changed since the last save,
+        or the whole object when name is None. Called by
+        BaseModel.__setattr__; values changed in place (e.g. appending
+        to a list) must be touched explicitly, as BaseModel.save() does
+        """
+        cls_name = obj.__class__.__name__
+        key = "{}.{}".format(cls_name, obj.__dict__.get("id"))
+        if self.__objects.get(key) is not obj:
+            return
+        with self.__lock.write():
+            self.__text_changed(cls_name, key, name)
+            for index in self.__attr_indexes.get(cls_name, {}).values():
+                if name is None or name in index.attrs:
+                    index.add(key, obj)
+            store = self.__columns.get(cls_name)
+            if store is not None and (name is None or
+                                      name in store.columns):
+                self.__stale_columns.add(cls_name)
+            fields = self.__dirty.get(key, set())
+            if fields is not None and name is not None:
+                fields.add(name)
+                self.__dirty[key] = fields
+            else:
+                self.__dirty[key] = None
+
+    def delete(self, obj=None):
+        """
+        deletes obj from __objects if it's inside
+        """
+        if obj is not None:
+            cls_name = obj.__class__.__name__
+            key = "{}.{}".format(cls_name, obj.id)
+            if key not in self.__objects:
+                return
+            with self.__lock.write():
+                self.__remember(key)
+                self.__index()[cls_name].pop(key)
+                del self.__objects[key]
+                self.__dirty[key] = None
+                self.__text_changed(cls_name, key)
+                for index in self.__attr_indexes.get(cls_name,
+                                                     {}).values():
+                    index.remove(key)
+                if cls_name in self.__columns:
+                    self.__stale_columns.add(cls_name)
+
+    def __text_changed(self, cls_name, key, name=None):
+        """
+        records that key changed in the full-text index of cls_name,
+        when its attribute name (any of them when None) is indexed
+        """
+        attrs = getattr(classes.get(cls_name), "text_index", ())
+        if attrs and (name is None or name in attrs):
+            self.__text_changes.setdefault(cls_name, set()).add(key)
+
+    def __index(self):
+        """
+        returns __by_class, rebuilding it when __objects was replaced
+        or changed without going through new() and delete()
+        """
+        if (FileStorage.__indexed is not self.__objects or
+                sum(map(len, self.__by_class.values())) !=
+                len(self.__objects)):
+            by_class = {}
+            for k, v in self.__objects.items():
+                by_class.setdefault(v.__class__.__name__, {})[k] = v
+            FileStorage.__by_class = by_class
+            FileStorage.__indexed = self.__objects
+            FileStorage.__attr_indexes = {}
+            self.__stale_columns.update(self.__columns)
+        return self.__by_class
+
+    def __indexes_of(self, cls_name, text_state=None):
+        """
+        returns the secondary indexes of cls_name, building them
+        from its objects on first use. The full-text index starts
+        from text_state, a saved TextIndex.state(), when given, or
+        from the one read by reload()
+        """
+        self.load(cls_name)
+        by_class = self.__index()
+        if not self.secondary_indexes:
+            return {}
+        indexes = self.__attr_indexes.get(cls_name)
+        if indexes is None:
+            if text_state is None:
+                text_state = self.__text_states.pop(cls_name, None)
+            cls = classes.get(cls_name)
+            objects = by_class.get(cls_name, {})
+            indexes = {}
+            for attr in getattr(cls, "hash_indexes", ()):
+                indexes[("hash", attr)] = HashIndex(attr)
+            for attr in getattr(cls, "range_indexes", ()):
+                indexes[("range", attr)] = RangeIndex(attr)
+            if getattr(cls, "geo_index", ()):
+                indexes[("geo",)] = GeoIndex(*cls.geo_index)
+            for key, obj in objects.items():
+                for index in indexes.values():
+                    index.add(key, obj)
+            if getattr(cls, "text_index", ()):
+                text = TextIndex(*cls.text_index)
+                if text_state is None:
+                    for key, obj in objects.items():
+                        text.add(key, obj)
+                    self.__text_built.add(cls_name)
+                else:
+                    self.__restore_index(cls_name, text, text_state)
+                    self.__text_built.discard(cls_name)
+                indexes[("text",)] = text
+            self.__attr_indexes[cls_name] = indexes
+        return indexes
+
+    def __restore_index(self, cls_name, text, text_state):
+        """
+        fills the full-text index text of cls_name from text_state, a
+        saved TextIndex.state(), bringing it up to date with the
+        objects of cls_name and with the keys changed since
+        """
+        objects = self.__index().get(cls_name, {})
+        text.restore(text_state)
+        for key in text.keys():
+            if key not in objects:
+                text.remove(key)
+        for key, obj in objects.items():
+            if key not in text:
+                text.add(key, obj)
+        for key in self.__text_changes.get(cls_name, ()):
+            if key in objects:
+                text.add(key, objects[key])
+
+    def __geo_index(self, cls):
+        """
+        returns the geospatial index of cls, or a throwaway one over
+        its latitude and longitude when cls does not declare geo_index
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        index = self.__indexes_of(cls_name).get(("geo",))
+        if index is None:
+            index = GeoIndex("latitude", "longitude")
+            for k, v in self.all(cls_name).items():
+                index.add(k, v)
+        return index
 
     def save(self):
         """
-        serializes __objects to the JSON file (path: __file_path)
+        writes the changes made since the last write to disk, at once
+        or later as the flush policy tells (see on_flush()), or when
+        the open batch ends
+        """
+        if not self.__open_batches():
+            self.flusher().request()
+
+    def on_flush(self, callback):
+        """
+        calls callback(error) once the saves made so far are written:
+        with None, or with the exception the write failed with
+        """
+        self.flusher().on_flush(callback)
+
+    def flush(self):
+        """
+        writes the saves the flush policy has kept pending, now
+        """
+        self.flusher().flush()
+
+    def flusher(self):
+        """
+        returns the Flusher of the engine, following __flush_policy
+        until set_flush_policy() is called
+        """
+        if self.__flusher is None:
+            self.__flusher = Flusher(lambda: self.write(),
+                                     self.__flush_policy)
+        return self.__flusher
+
+    def set_flush_policy(self, policy):
+        """
+        writes what is pending, then follows policy (see Flusher)
+        """
+        self.flush()
+        self.__flusher = Flusher(lambda: self.write(), policy)
+
+    def write(self):
+        """
+        serializes __objects to the JSON file (path: __file_path), or
+        to a binary snapshot when __format is binary. Only objects that
+        are dirty are encoded again, the others reuse the text or the
+        record cached by the previous save. The objects to encode are
+        picked under the write side of the lock, then encoded as they
+        were at that moment and written one at a time through a buffer
+        of BUFFER_SIZE bytes without holding it, to a temporary file
+        renamed over the previous one (see safe_file).
+        The column files are left to column() to bring up to date.
+        What other processes wrote since is merged first, under the
+        file lock held until the file is replaced
         """
-        with open(self.__file_path, mode="w") as f:
-            dict_storage = {}
+        with self.file_lock():
+            self.catch_up()
+            self.__write()
+
+    def __write(self):
+        """
+        writes __objects to the file, holding the file lock. The
+        objects to encode again are only picked under the lock, along
+        with a snapshot, and encoded as the file is written, as the
+        snapshot shows them
+        """
+        binary = self.__format == "binary"
+        with self.__lock.write():
+            snapshot = self.snapshot()
+            encoded = {}
             for k, v in self.__objects.items():
-                dict_storage[k] = v.to_dict()
-            json.dump(dict_storage, f)
+                cached = self.__encoded.get(k)
+                if (cached is None or cached[0] is not v or
+                        cached[1] is not binary or k in self.__dirty):
+                    cached = (v, binary, None)
+                encoded[k] = cached
+            dirty = dict(self.__dirty)
+            self.__dirty.clear()
+        try:
+            with snapshot:
+                safe_file.write(self.__file_path, lambda f: self.__write_to(
+                    f, encoded, binary, snapshot.epoch), BUFFER_SIZE)
+        except BaseException:
+            self.__mark(dirty.items())
+            raise
+        FileStorage.__encoded = encoded
+        FileStorage.__version = self.__version_of(os.stat(self.__file_path))
+        self.__save_text()
+
+    def write_snapshot(self, snapshot, pace=None, path=None):
+        """
+        writes the objects of snapshot (see snapshot()) to the file, or
+        to path, one at a time and without holding the lock nor the
+        file lock until the file is replaced, so that objects can be
+        read and changed meanwhile. pace(size), when given, is called
+        with the size of each object encoded, to throttle the write
+        """
+        binary = self.__format == "binary"
+
+        def encoded():
+            """
+            yields the key and the text, or record, of each object
+            """
+            for key, obj in snapshot.items():
+                if binary:
+                    data = self.__codec.encode(obj.__class__.__name__,
+                                               obj.__dict__)
+                else:
+                    data = json.dumps(obj.to_dict())
+                if pace is not None:
+                    pace(len(data))
+                yield key, data
+
+        def fill(f):
+            """
+            writes the objects to the binary file f
+            """
+            if binary:
+                self.__codec.write(f, [data for key, data in encoded()])
+            else:
+                text = io.TextIOWrapper(f, encoding="utf-8")
+                json_stream.write(text, encoded())
+                text.detach()
+
+        if path is not None and path != self.__file_path:
+            safe_file.write(path, fill, BUFFER_SIZE, self.file_lock(path))
+            return
+        safe_file.write(self.__file_path, fill, BUFFER_SIZE,
+                        self.__replacing())
+
+    @contextmanager
+    def __replacing(self):
+        """
+        holds the file lock while the file is replaced, and records the
+        version written before releasing it, so that a save made right
+        after does not take this write for one of another process
+        """
+        with self.file_lock():
+            yield
+            FileStorage.__version = self.__version_of(
+                os.stat(self.__file_path))
+
+    def read_snapshot(self, path=None):
+        """
+        yields the objects of the file, or of the file at path, one at
+        a time, once it was checked against its checksums
+        """
+        if path is None:
+            path = self.__file_path
+        with self.file_lock(path):
+            safe_file.recover(path)
+            f = open(path, mode="rb")
+        with f:
+            for key, obj, text in self.__objects_in(f):
+                yield obj
+
+    def take_changes(self):
+        """
+        returns the list of (key, attrs, names) of the objects created,
+        changed or deleted since the last write, attrs being the
+        to_dict() of the object (None for a deleted one), and marks
+        them written, at once. Engines write them without holding the
+        lock and hand them to restore_changes() when that fails
+        """
+        with self.__lock.write():
+            changes = [(k, None if obj is None else obj.to_dict(), names)
+                       for k, obj, names in self.changes()]
+            self.__dirty.clear()
+        return changes
+
+    def restore_changes(self, changes):
+        """
+        marks the changes returned by take_changes() as unwritten again,
+        along with the ones made since
+        """
+        self.__mark((k, names) for k, attrs, names in changes)
+
+    def __mark(self, dirty):
+        """
+        merges the (key, names) pairs of dirty into __dirty
+        """
+        with self.__lock.write():
+            for key, names in dirty:
+                current = self.__dirty.get(key, set())
+                if current is None or names is None:
+                    self.__dirty[key] = None
+                else:
+                    self.__dirty[key] = current | names
+
+    def __write_to(self, f, encoded, binary, epoch):
+        """
+        writes the cached text, or records, of encoded to the binary
+        file f, encoding the missing ones one at a time from the
+        objects as they were at epoch, and caching them in encoded
+        """
+        def records():
+            """
+            yields the key and the text, or record, of each object
+            """
+            for k, (v, binary, data) in encoded.items():
+                if data is None:
+                    obj = self.__version_at(k, epoch)
+                    if binary:
+                        data = self.__codec.encode(obj.__class__.__name__,
+                                                   obj.__dict__)
+                    else:
+                        data = json.dumps(obj.to_dict())
+                    encoded[k] = (v, binary, data)
+                yield k, data
+
+        if binary:
+            self.__codec.write(f, [data for k, data in records()])
+        else:
+            text = io.TextIOWrapper(f, encoding="utf-8")
+            json_stream.write(text, records())
+            text.detach()
+
+    def __signature(self):
+        """
+        returns the size and modification time of the JSON file,
+        telling which version of it the saved text indexes match
+        """
+        try:
+            stat = os.stat(self.__file_path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def __save_text(self):
+        """
+        writes to __text_dir the full-text indexes that changed since
+        they were last saved, then the list of the saved ones along
+        with the signature of the JSON file. The indexes of other
+        classes keep their files
+        """
+        with self.__lock.write():
+            changes = self.__text_changes
+            FileStorage.__text_changes = {}
+            texts = {}
+            for cls_name in changes:
+                index = self.__attr_indexes.get(cls_name, {}).get(("text",))
+                if index is None and cls_name in self.__text_states:
+                    index = TextIndex(*classes[cls_name].text_index)
+                    self.__restore_index(cls_name, index,
+                                         self.__text_states[cls_name])
+                    self.__text_states[cls_name] = index.state()
+                if index is not None:
+                    texts[cls_name] = index.state()
+            built = self.__text_built.difference(texts)
+            saved = sorted(set(self.__text_states).union(
+                cls_name for cls_name, indexes in self.__attr_indexes.items()
+                if ("text",) in indexes and cls_name not in built))
+        if not saved and not os.path.isdir(self.__text_dir):
+            return
+        try:
+            os.makedirs(self.__text_dir, exist_ok=True)
+            for cls_name, state in texts.items():
+                text = json.dumps(state)
+                safe_file.write(self.__text_file(cls_name),
+                                lambda f: f.write(text.encode()))
+            manifest = json.dumps({"data": self.__signature(),
+                                   "classes": saved})
+            safe_file.write(self.__text_file(None),
+                            lambda f: f.write(manifest.encode()))
+        except BaseException:
+            with self.__lock.write():
+                for cls_name, keys in changes.items():
+                    self.__text_changes.setdefault(cls_name,
+                                                   set()).update(keys)
+            raise
+        self.__text_built.difference_update(texts)
+
+    def __text_file(self, cls_name):
+        """
+        returns the path of the saved full-text index of cls_name, or
+        of the list of the saved ones when cls_name is None
+        """
+        return os.path.join(self.__text_dir, "{}.json".format(
+            "manifest" if cls_name is None else cls_name))
+
+    def __restore_text(self):
+        """
+        keeps the full-text indexes saved in __text_dir, when they
+        match the JSON file that was just loaded, for each one to be
+        rebuilt from on first use
+        """
+        FileStorage.__text_states = {}
+        FileStorage.__text_changes = {
+            cls_name: set() for cls_name, indexes in
+            self.__attr_indexes.items() if ("text",) in indexes}
+        saved = self.__read_text(None)
+        if saved is None or saved.get("data") != self.__signature():
+            return
+        for cls_name in saved["classes"]:
+            if cls_name in classes and cls_name not in self.__text_changes:
+                state = self.__read_text(cls_name)
+                if state is not None:
+                    self.__text_states[cls_name] = state
+
+    def __read_text(self, cls_name):
+        """
+        returns what __save_text() wrote to the file of cls_name (see
+        __text_file()), or None when it is missing or does not match
+        its checksums, the index being rebuilt then
+        """
+        path = self.__text_file(cls_name)
+        sums = safe_file.read_sums(path)
+        if (sums is None or
+                not safe_file.matches(safe_file.checksum(path),
+                                      sums["file"])):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def file_lock(self, path=None):
+        """
+        returns the FileLock of the file, or of the file at path
+        (<path>.lock), held while merging the writes of other
+        processes and writing
+        """
+        if path is None:
+            path = self.__file_path
+        path = os.path.abspath(path + ".lock")
+        return self.__file_locks.setdefault(path, FileLock(path))
+
+    def refresh(self):
+        """
+        merges what other processes wrote to the file since this one
+        last read or wrote it (see catch_up()). The file lock is only
+        taken, and its file created, when stale() says so
+        """
+        if self.stale():
+            with self.file_lock():
+                self.catch_up()
+
+    def stale(self):
+        """
+        returns whether the file changed since __version, checked
+        without the file lock: whether catch_up() may have something
+        to merge
+        """
+        try:
+            version = self.__version_of(os.stat(self.__file_path))
+        except FileNotFoundError:
+            return False
+        return version != self.__version
+
+    def catch_up(self):
+        """
+        merges the objects of the file into __objects when it changed
+        since __version, and returns True, or False when it did not.
+        Objects that were not changed here take the content of the
+        file, or leave __objects when they left it; changes not saved
+        yet here win (see merge()). The file is only checked against
+        its checksums (see safe_file.recover()) when its version changed.
+        Called holding the file lock
+        """
+        try:
+            version = self.__version_of(os.stat(self.__file_path))
+        except FileNotFoundError:
+            return False
+        if version == self.__version:
+            return False
+        safe_file.recover(self.__file_path)
+        try:
+            f = open(self.__file_path, mode="rb")
+        except FileNotFoundError:
+            return False
+        with f:
+            version = self.__version_of(os.fstat(f.fileno()))
+            if version == self.__version:
+                return False
+            with self.__lock.write():
+                seen = set()
+                for key, obj, text in self.__objects_in(f):
+                    seen.add(key)
+                    cached = self.__encoded.get(key)
+                    current = self.__objects.get(key)
+                    if (text is not None and cached is not None and
+                            cached[0] is current and cached[2] == text and
+                            key not in self.__dirty):
+                        continue
+                    self.merge(key, obj)
+                    current = self.__objects.get(key)
+                    if (text is not None and current is not None and
+                            key not in self.__dirty):
+                        self.__encoded[key] = (current, False, text)
+                for key in [k for k in self.__objects if k not in seen]:
+                    self.merge(key, None)
+        FileStorage.__version = version
+        return True
+
+    def merge(self, key, obj):
+        """
+        puts what another process saved for key in __objects: the
+        attributes of obj, or nothing when obj is None (it deleted
+        it), without marking key as dirty. Unsaved changes of key win:
+        its attributes changed here are kept over those of obj, and an
+        object deleted or created here stays as it is
+        """
+        with self.__lock.write():
+            names = self.__dirty.get(key, set())
+            if names is None:
+                return
+            current = self.__objects.get(key)
+            if obj is None:
+                if current is not None and not names:
+                    self.delete(current)
+                    self.__dirty.pop(key, None)
+                elif current is not None:
+                    self.__dirty[key] = None
+                return
+            if current is None:
+                self.new(obj)
+                del self.__dirty[key]
+                return
+            attrs = dict(obj.__dict__)
+            for name in names:
+                if name in current.__dict__:
+                    attrs[name] = current.__dict__[name]
+            if attrs == current.__dict__:
+                return
+            self.__remember(key)
+            current.__dict__.clear()
+            current.__dict__.update(attrs)
+            self.__encoded.pop(key, None)
+            self.touch(current)
+            if names:
+                self.__dirty[key] = names
+            else:
+                del self.__dirty[key]
+
+    def __version_of(self, stat):
+        """
+        returns the version of the file stat describes
+        """
+        return [stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    def __objects_in(self, f):
+        """
+        yields the key, the object and the JSON text (None in a binary
+        snapshot) of each object of the JSON file, or binary snapshot,
+        opened as the binary file f, one at a time. The objects of a
+        JSON file are stand-ins, only parsed on first access (see
+        models.engine.lazy)
+        """
+        if f.read(len(binary_codec.MAGIC)) == binary_codec.MAGIC:
+            f.seek(0)
+            for cls_name, attrs in binary_codec.read(f):
+                obj = classes[cls_name].__new__(classes[cls_name])
+                obj.__dict__.update(attrs)
+                yield "{}.{}".format(cls_name, attrs["id"]), obj, None
+        else:
+            f.seek(0)
+            text = io.TextIOWrapper(f, encoding="utf-8")
+            for key, value in json_stream.texts(text):
+                yield key, lazy(classes[key.split(".", 1)[0]], value), value
+            text.detach()
 
     def reload(self):
         """
         deserializes the JSON file to __objects
         (only if the JSON file (__file_path) exists
         otherwise, do nothing. If the file doesn’t exist
-        o exception should be raised)
+        o exception should be raised).
+        A binary snapshot is recognized by its magic bytes. Either
+        format is read one object at a time, so that only the objects
+        built so far are held in memory. The objects of a JSON file
+        are only parsed on first access, and written back as they were
+        read while unchanged. A file that does not match its checksums
+        is replaced by the previous snapshot first. The file lock is
+        not taken, nor its file created, when there is no file yet
         """
         # try:
         #     with open(self.__file_path, encoding="utf-8") as f:
@@ -62,11 +1168,20 @@ class FileStorage:
         # except FileNotFoundError:
         #     return
         try:
-            with open(FileStorage.__file_path) as f:
-                objdict = json.load(f)
-                for o in objdict.values():
-                    cls_name = o["__class__"]
-                    del o["__class__"]
-                    self.new(eval(cls_name)(**o))
+            if not os.path.exists(FileStorage.__file_path):
+                return
+            with self.file_lock():
+                safe_file.recover(FileStorage.__file_path)
+                with open(FileStorage.__file_path, mode="rb") as f, \
+                        self.__lock.write():
+                    for key, obj, text in self.__objects_in(f):
+                        self.__put(key, obj)
+                        if text is not None:
+                            self.__encoded[key] = (obj, False, text)
+                    FileStorage.__version = self.__version_of(
+                        os.fstat(f.fileno()))
         except FileNotFoundError:
             return
+        finally:
+            self.__dirty.clear()
+        self.__restore_text()
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+"""
+Defines when the changes saved to a storage engine reach the disk:
+right away, at most every N milliseconds from a background thread,
+or once every N saves, so that bursts of saves share one write
+"""
+
+import atexit
+import threading
+import time
+
+POLICIES = ("immediate", "interval", "count")
+
+
+class Flusher:
+    """
+    Groups the save requests made to a storage engine into writes,
+    following a flush policy:
+    immediate - every save writes at once (the default)
+    interval:<ms> - a background thread writes at most <ms>
+    milliseconds after the first save left unwritten
+    count:<n> - every <n>th save writes the <n> of them
+    write (callable): writes every pending change to disk
+    policy (str): the flush policy
+    """
+
+    def __init__(self, write, policy="immediate"):
+        """
+        Initializes a flusher with no pending save
+        """
+        kind, _, value = policy.partition(":")
+        number = None
+        if kind != "immediate" or value:
+            try:
+                number = float(value)
+            except ValueError:
+                number = 0
+            if kind not in POLICIES[1:] or number <= 0:
+                raise ValueError("unknown flush policy {!r}".format(policy))
+        self.policy = policy
+        self.interval = number / 1000 if kind == "interval" else None
+        self.count = int(number) if kind == "count" else 1
+        self.__write = write
+        self.__ready = threading.Condition(threading.RLock())
+        self.__pending = 0
+        self.__callbacks = []
+        self.__thread = None
+        if kind != "immediate":
+            atexit.register(self.flush)
+
+    def request(self):
+        """
+        records a save, writing now when the policy says so
+        """
+        with self.__ready:
+            self.__pending += 1
+            if self.interval is not None:
+                if self.__thread is None:
+                    self.__thread = threading.Thread(target=self.__run,
+                                                     daemon=True)
+                    self.__thread.start()
+                self.__ready.notify()
+                return
+            due = self.__pending >= self.count
+        if due:
+            self.flush()
+
+    def on_flush(self, callback):
+        """
+        calls callback(error) once the pending saves are written, with
+        None, or with the exception the write failed with. It is
+        called at once when no save is pending
+        """
+        with self.__ready:
+            if self.__pending:
+                self.__callbacks.append(callback)
+                return
+        callback(None)
+
+    def pending(self):
+        """
+        returns the number of saves not written yet
+        """
+        return self.__pending
+
+    def flush(self):
+        """
+        writes the pending saves now, then calls their callbacks.
+        The exception of a failed write is raised after them. The
+        write is made without the lock, so that saves made meanwhile
+        are recorded at once, for the next write
+        """
+        with self.__ready:
+            if not self.__pending:
+                return
+            callbacks, self.__callbacks = self.__callbacks, []
+            self.__pending = 0
+        try:
+            self.__write()
+        except Exception as error:
+            for callback in callbacks:
+                callback(error)
+            raise
+        for callback in callbacks:
+            callback(None)
+
+    def __run(self):
+        """
+        writes the pending saves interval seconds after the first of
+        them, for as long as the process runs. A failed write is only
+        reported to the callbacks; the changes stay pending in the
+        engine until the next write
+        """
+        while True:
+            with self.__ready:
+                while not self.__pending:
+                    self.__ready.wait()
+                deadline = time.monotonic() + self.interval
+                while self.__pending and time.monotonic() < deadline:
+                    self.__ready.wait(deadline - time.monotonic())
+            try:
+                self.flush()
+            except Exception:
+                pass
@@ -0,0 +1,455 @@
+#!/usr/bin/python3
+"""
+Defines the secondary indexes that storage engines keep over
+the attributes of the objects they hold
+"""
+
+import heapq
+import re
+from bisect import bisect_left, insort
+from itertools import islice
+from math import (asin, ceil, cos, degrees, isfinite, log, pi, radians, sin,
+                  sqrt)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = pi * EARTH_RADIUS_KM / 180
+WORD = re.compile(r"\w+")
+BUCKET_SIZE = 512
+
+
+class HashIndex:
+    """
+    Maps each value of an attribute to the objects holding it
+    attr (str): the indexed attribute
+    """
+
+    def __init__(self, attr):
+        """
+        Initializes an empty index over attr
+        """
+        self.attr = attr
+        self.attrs = (attr,)
+        self.__objects = {}
+        self.__values = {}
+
+    def add(self, key, obj):
+        """
+        indexes obj under key, replacing what key was indexed with
+        """
+        self.remove(key)
+        value = getattr(obj, self.attr, None)
+        try:
+            self.__objects.setdefault(value, {})[key] = obj
+        except TypeError:
+            return
+        self.__values[key] = value
+
+    def remove(self, key):
+        """
+        removes key from the index if it's inside
+        """
+        if key in self.__values:
+            value = self.__values.pop(key)
+            bucket = self.__objects[value]
+            del bucket[key]
+            if not bucket:
+                del self.__objects[value]
+
+    def lookup(self, value):
+        """
+        returns a dictionary of the objects whose attribute is value
+        """
+        try:
+            return dict(self.__objects.get(value, {}))
+        except TypeError:
+            return {}
+
+
+class RangeIndex:
+    """
+    Keeps the objects ordered by the numeric value of an attribute,
+    then by key, as (value, key) entries split in buckets of at most
+    2 * BUCKET_SIZE entries: an entry is found by bisection, even
+    among many objects holding the same value, and adding or removing
+    one only shifts the entries of its bucket
+    attr (str): the indexed attribute
+    """
+
+    def __init__(self, attr):
+        """
+        Initializes an empty index over attr
+        """
+        self.attr = attr
+        self.attrs = (attr,)
+        self.__buckets = []
+        self.__lasts = []
+        self.__objects = {}
+        self.__value_of = {}
+
+    def add(self, key, obj):
+        """
+        indexes obj under key, replacing what key was indexed with.
+        Values that are not numbers are left out of the index
+        """
+        self.remove(key)
+        value = getattr(obj, self.attr, None)
+        if (isinstance(value, bool) or
+                not isinstance(value, (int, float)) or value != value):
+            return
+        entry = (value, key)
+        i = min(bisect_left(self.__lasts, entry), len(self.__buckets) - 1)
+        if i < 0:
+            self.__buckets.append([entry])
+            self.__lasts.append(entry)
+        else:
+            bucket = self.__buckets[i]
+            insort(bucket, entry)
+            self.__lasts[i] = bucket[-1]
+            if len(bucket) > 2 * BUCKET_SIZE:
+                self.__buckets[i:i + 1] = [bucket[:BUCKET_SIZE],
+                                           bucket[BUCKET_SIZE:]]
+                self.__lasts[i:i + 1] = [bucket[BUCKET_SIZE - 1],
+                                         bucket[-1]]
+        self.__objects[key] = obj
+        self.__value_of[key] = value
+
+    def remove(self, key):
+        """
+        removes key from the index if it's inside
+        """
+        if key in self.__value_of:
+            entry = (self.__value_of.pop(key), key)
+            i = bisect_left(self.__lasts, entry)
+            bucket = self.__buckets[i]
+            del bucket[bisect_left(bucket, entry)]
+            if bucket:
+                self.__lasts[i] = bucket[-1]
+            else:
+                del self.__buckets[i]
+                del self.__lasts[i]
+            del self.__objects[key]
+
+    def __find(self, entry):
+        """
+        returns the position, (bucket, offset), entry would be
+        inserted at
+        """
+        i = bisect_left(self.__lasts, entry)
+        if i == len(self.__buckets):
+            return i, 0
+        return i, bisect_left(self.__buckets[i], entry)
+
+    def __walk(self, start, end, reverse):
+        """
+        yields the entries from the position start up to the position
+        end, backwards when reverse
+        """
+        (i, j), (k, m) = start, end
+        numbers = range(i, min(k, len(self.__buckets) - 1) + 1)
+        for n in reversed(numbers) if reverse else numbers:
+            bucket = self.__buckets[n]
+            part = bucket[j if n == i else 0:m if n == k else len(bucket)]
+            yield from reversed(part) if reverse else part
+
+    def between(self, low=None, high=None, limit=None, reverse=False):
+        """
+        returns the list of objects whose value is between low and
+        high (both included, None for no bound) in ascending order,
+        or descending if reverse, with at most limit objects
+        """
+        start = (0, 0) if low is None else self.__find((low,))
+        end = (len(self.__buckets), 0) if high is None \
+            else self.__find((high, AFTER_KEYS))
+        entries = islice(self.__walk(start, end, reverse), limit)
+        return [self.__objects[k] for v, k in entries]
+
+
+class AfterKeys:
+    """
+    Compares greater than any key, so that (value, AFTER_KEYS) comes
+    right after the entries of value in a RangeIndex
+    """
+
+    def __lt__(self, other):
+        """
+        returns False: nothing is greater
+        """
+        return False
+
+    def __gt__(self, other):
+        """
+        returns True: everything else is smaller
+        """
+        return True
+
+
+AFTER_KEYS = AfterKeys()
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    returns the great-circle distance in kilometers between two points
+    """
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = (sin((lat2 - lat1) / 2) ** 2 +
+         cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+class GeoIndex:
+    """
+    Buckets the objects in a grid of cell_size x cell_size degree cells
+    by the coordinates held in two attributes, so that a query only
+    looks at the cells it overlaps
+    lat_attr (str): the attribute holding the latitude
+    lon_attr (str): the attribute holding the longitude
+    cell_size (float): the side of a cell, in degrees
+    """
+
+    def __init__(self, lat_attr, lon_attr, cell_size=0.1):
+        """
+        Initializes an empty index over lat_attr and lon_attr
+        """
+        self.attrs = (lat_attr, lon_attr)
+        self.__cell_size = cell_size
+        self.__rows = ceil(180 / cell_size)
+        self.__cols = ceil(360 / cell_size)
+        self.__cells = {}
+        self.__cell_of = {}
+
+    def add(self, key, obj):
+        """
+        indexes obj under key, replacing what key was indexed with.
+        Objects without valid coordinates are left out of the index
+        """
+        self.remove(key)
+        lat, lon = (getattr(obj, attr, None) for attr in self.attrs)
+        for value in (lat, lon):
+            if (isinstance(value, bool) or
+                    not isinstance(value, (int, float)) or
+                    not isfinite(value)):
+                return
+        if not -90 <= lat <= 90:
+            return
+        cell = (self.__row(lat), self.__col(lon))
+        self.__cells.setdefault(cell, {})[key] = (lat, lon, obj)
+        self.__cell_of[key] = cell
+
+    def remove(self, key):
+        """
+        removes key from the index if it's inside
+        """
+        if key in self.__cell_of:
+            cell = self.__cell_of.pop(key)
+            del self.__cells[cell][key]
+            if not self.__cells[cell]:
+                del self.__cells[cell]
+
+    def within(self, south, west, north, east):
+        """
+        returns the list of objects inside the box bounded by the
+        latitudes south and north and the longitudes west and east
+        """
+        span = east - west if west <= east else east - west + 360
+        col_lo = self.__col(west)
+        col_hi = col_lo + int(span // self.__cell_size) + 1
+        found = []
+        for lat, lon, obj in self.__candidates(self.__row(south),
+                                               self.__row(north),
+                                               col_lo, col_hi):
+            if south <= lat <= north and (
+                    west <= lon <= east if west <= east
+                    else lon >= west or lon <= east):
+                found.append(obj)
+        return found
+
+    def near(self, lat, lon, radius_km):
+        """
+        returns the list of objects within radius_km kilometers of
+        (lat, lon), nearest first
+        """
+        return [obj for distance, obj in self.__near(lat, lon, radius_km)]
+
+    def nearest(self, lat, lon, k=1):
+        """
+        returns the list of the k objects nearest to (lat, lon),
+        nearest first. The search radius doubles until it holds k
+        objects, so the cost follows the density around (lat, lon)
+        """
+        radius = self.__cell_size * KM_PER_DEGREE
+        while True:
+            found = self.__near(lat, lon, radius)
+            if len(found) >= k or radius >= pi * EARTH_RADIUS_KM:
+                return [obj for distance, obj in found[:k]]
+            radius *= 2
+
+    def __near(self, lat, lon, radius_km):
+        """
+        returns the sorted list of (distance, object) within
+        radius_km kilometers of (lat, lon)
+        """
+        dlat = degrees(radius_km / EARTH_RADIUS_KM)
+        dlon = 180
+        if -90 < lat - dlat and lat + dlat < 90:
+            ratio = sin(radians(dlat)) / cos(radians(lat))
+            if ratio < 1:
+                dlon = degrees(asin(ratio))
+        col_lo = self.__col(lon - dlon)
+        col_hi = col_lo + int(2 * dlon // self.__cell_size) + 1
+        found = []
+        for c_lat, c_lon, obj in self.__candidates(
+                self.__row(max(-90, lat - dlat)),
+                self.__row(min(90, lat + dlat)), col_lo, col_hi):
+            distance = haversine(lat, lon, c_lat, c_lon)
+            if distance <= radius_km:
+                found.append((distance, obj))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def __row(self, lat):
+        """
+        returns the grid row of a latitude
+        """
+        return min(int((lat + 90) // self.__cell_size), self.__rows - 1)
+
+    def __col(self, lon):
+        """
+        returns the grid column of a longitude
+        """
+        return int(((lon + 180) % 360) // self.__cell_size) % self.__cols
+
+    def __candidates(self, row_lo, row_hi, col_lo, col_hi):
+        """
+        yields the (lat, lon, obj) of the cells in rows row_lo to row_hi
+        and columns col_lo to col_hi (wrapping around the antimeridian).
+        When the box has more cells than the grid holds, the occupied
+        cells are filtered instead
+        """
+        width = min(col_hi - col_lo + 1, self.__cols)
+        if (row_hi - row_lo + 1) * width > len(self.__cells):
+            for (row, col), bucket in self.__cells.items():
+                if (row_lo <= row <= row_hi and
+                        (col - col_lo) % self.__cols < width):
+                    yield from bucket.values()
+            return
+        for row in range(row_lo, row_hi + 1):
+            for i in range(width):
+                bucket = self.__cells.get((row, (col_lo + i) % self.__cols))
+                if bucket:
+                    yield from bucket.values()
+
+
+def tokenize(text):
+    """
+    returns the list of lowercase words of text
+    """
+    return WORD.findall(str(text).lower())
+
+
+class TextIndex:
+    """
+    Inverted index over the words of text attributes, ranking the
+    keys that match a query with BM25
+    attrs (str): the indexed attributes
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, *attrs):
+        """
+        Initializes an empty index over attrs
+        """
+        self.attrs = attrs
+        self.__postings = {}
+        self.__lengths = {}
+        self.__terms = {}
+        self.__total = 0
+
+    def __contains__(self, key):
+        """
+        tells if key is indexed
+        """
+        return key in self.__lengths
+
+    def keys(self):
+        """
+        returns the list of the indexed keys
+        """
+        return list(self.__lengths)
+
+    def add(self, key, obj):
+        """
+        indexes the words of obj under key, replacing what key was
+        indexed with
+        """
+        self.remove(key)
+        words = []
+        for attr in self.attrs:
+            value = getattr(obj, attr, None)
+            if isinstance(value, str):
+                words.extend(tokenize(value))
+        counts = {}
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        for word, tf in counts.items():
+            self.__postings.setdefault(word, {})[key] = tf
+        self.__terms[key] = tuple(counts)
+        self.__lengths[key] = len(words)
+        self.__total += len(words)
+
+    def remove(self, key):
+        """
+        removes key from the index if it's inside
+        """
+        if key in self.__lengths:
+            self.__total -= self.__lengths.pop(key)
+            for word in self.__terms.pop(key):
+                postings = self.__postings[word]
+                del postings[key]
+                if not postings:
+                    del self.__postings[word]
+
+    def search(self, query, k=10):
+        """
+        returns the list of the (at most k) keys best matching the
+        words of query, best first
+        """
+        count = len(self.__lengths)
+        if not count:
+            return []
+        average = self.__total / count or 1
+        scores = {}
+        for word in set(tokenize(query)):
+            postings = self.__postings.get(word, {})
+            idf = log(1 + (count - len(postings) + 0.5) /
+                      (len(postings) + 0.5))
+            for key, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b *
+                                  self.__lengths[key] / average)
+                scores[key] = (scores.get(key, 0) +
+                               idf * tf * (self.k1 + 1) / (tf + norm))
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [key for key, score in best]
+
+    def state(self):
+        """
+        returns a JSON serializable copy of the index, which the index
+        can go on changing while the copy is serialized
+        """
+        return {"postings": {word: dict(postings) for word, postings
+                             in self.__postings.items()},
+                "lengths": dict(self.__lengths)}
+
+    def restore(self, state):
+        """
+        replaces the content of the index by a state() dictionary
+        """
+        self.__postings = state["postings"]
+        self.__lengths = state["lengths"]
+        self.__total = sum(self.__lengths.values())
+        terms = {key: [] for key in self.__lengths}
+        for word, postings in self.__postings.items():
+            for key in postings:
+                terms[key].append(word)
+        self.__terms = {key: tuple(words) for key, words in terms.items()}
@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+"""
+Defines an incremental reader and writer of the JSON storage file:
+the top object is parsed, or written, one member at a time, so that
+the whole text and the whole tree never sit in memory together
+"""
+
+import json
+import re
+
+WHITESPACE = " \t\n\r"
+NUMBER = "0123456789+-.eE"
+STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+TOKEN = re.compile(r'[{}[\]"]')
+
+
+class JSONStream:
+    """
+    Reads JSON values one after the other from a text file, keeping
+    in memory the chunk being parsed only
+    f (file): the text file
+    size (int): the number of characters read at once
+    offset (int): the number of characters read before the buffer
+    """
+
+    decoder = json.JSONDecoder()
+
+    def __init__(self, f, size=1 << 16):
+        """
+        Initializes a stream at the start of f
+        """
+        self.f = f
+        self.size = size
+        self.buf = ""
+        self.pos = 0
+        self.offset = 0
+
+    def fill(self):
+        """
+        appends the next chunk of the file to what is left to parse,
+        reading more when a single value outgrows the buffer.
+        Returns False at the end of the file
+        """
+        chunk = self.f.read(max(self.size, len(self.buf) - self.pos))
+        if not chunk:
+            return False
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        skips whitespace and returns the next character, without
+        consuming it, or "" at the end of the file
+        """
+        while True:
+            while self.pos < len(self.buf):
+                if self.buf[self.pos] not in WHITESPACE:
+                    return self.buf[self.pos]
+                self.pos += 1
+            if not self.fill():
+                return ""
+
+    def expect(self, chars):
+        """
+        consumes and returns the next character, which must be one of
+        chars
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError("Expecting one of {!r}".format(chars),
+                                       self.buf, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        parses and returns the next value. A value followed by the end
+        of the buffer, or by what could go on a number, is parsed again
+        with the next chunk, in case a number was cut
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            if (end < len(self.buf) and self.buf[end] not in NUMBER or
+                    not self.fill()):
+                self.pos = end
+                return value
+
+    def skip(self):
+        """
+        consumes the next value without building it, when it is an
+        object, an array or a string: only its brackets and strings
+        are scanned for where it ends, and it is left to be parsed, or
+        found malformed, later. An object holding no other object, nor
+        backslash, ends at its first closing brace out of quotes, the
+        case of every record of the storage file but those with
+        escaped characters. Returns None
+        """
+        char = self.peek()
+        if not char or char not in '{["':
+            self.value()
+            return None
+        if char == "{":
+            end = self.buf.find("}", self.pos)
+            text = self.buf[self.pos:end]
+            if (end != -1 and "\\" not in text and
+                    text.count("{") == 1 and not text.count('"') % 2):
+                self.pos = end + 1
+                return None
+        depth = 0
+        pos = self.pos
+        while True:
+            token = TOKEN.search(self.buf, pos)
+            string = None
+            if token is not None and token.group() == '"':
+                string = STRING.match(self.buf, token.start())
+            if token is None or token.group() == '"' and string is None:
+                pos -= self.pos
+                if not self.fill():
+                    raise json.JSONDecodeError("Unterminated value",
+                                               self.buf, self.pos)
+                pos += self.pos
+                continue
+            if string is not None:
+                pos = string.end()
+            else:
+                pos = token.end()
+                depth += 1 if token.group() in "{[" else -1
+            if not depth:
+                self.pos = pos
+                return None
+
+    def members(self, parse=True):
+        """
+        yields the key, the value and where the value starts and ends
+        (in characters from the start of the file) of each member of
+        the JSON object the file holds, as each one is parsed, or
+        skipped (see skip()) and given as None when parse is False
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name",
+                                           self.buf, self.pos)
+            self.expect(":")
+            self.peek()
+            start = self.offset + self.pos
+            value = self.value() if parse else self.skip()
+            yield key, value, start, self.offset + self.pos
+            if self.expect(",}") == "}":
+                return
+
+
+def read(f, size=1 << 16):
+    """
+    yields the (key, value) pairs of the JSON object held by the text
+    file f, as each one is parsed
+    """
+    for key, value, start, end in members(f, size):
+        yield key, value
+
+
+def members(f, size=1 << 16):
+    """
+    yields the key, the value and where the value starts and ends
+    (in characters from the start of f) of each member of the JSON
+    object held by the text file f, as each one is parsed
+    """
+    return JSONStream(f, size).members()
+
+
+def texts(f, size=1 << 16):
+    """
+    yields the (key, text) pairs of the JSON object held by the text
+    file f, text being the JSON text of the value of key as it is in
+    f, for it to be parsed later or written back as it is. The values
+    are only scanned for where they end, not parsed
+    """
+    stream = JSONStream(f, size)
+    for key, value, start, end in stream.members(parse=False):
+        yield key, stream.buf[start - stream.offset:end - stream.offset]
+
+
+def write(f, pairs):
+    """
+    writes to the text file f the JSON object made of the (key, text)
+    pairs, text being the JSON text of the value of key, one pair at
+    a time
+    """
+    f.write("{")
+    separator = ""
+    for key, text in pairs:
+        f.write(separator)
+        f.write(json.dumps(key))
+        f.write(": ")
+        f.write(text)
+        separator = ", "
+    f.write("}")
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""
+Defines the stand-ins storage engines load objects as: a stand-in
+holds the JSON text of its object only, and becomes an instance of its
+model class, attributes and timestamps parsed, on the first access to
+any of its attributes
+"""
+
+import json
+import threading
+from datetime import datetime
+
+_stand_ins = {}
+_lock = threading.Lock()
+
+
+class Lazy:
+    """
+    Mixed into a stand-in class for each model class (see stand_in()).
+    A stand-in keeps its record in __dict__ until its first attribute
+    access, or change, materializes it; obj.__class__ and type(obj)
+    alone do not.
+    isinstance() and obj.__class__.__name__ see the model class
+    model (class): the model class stood in for
+    """
+
+    def __getattribute__(self, name):
+        """
+        materializes the object, then returns its attribute name
+        """
+        if name != "__class__":
+            materialize(self)
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        """
+        materializes the object, then sets its attribute name
+        """
+        materialize(self)
+        setattr(self, name, value)
+
+    def __delattr__(self, name):
+        """
+        materializes the object, then deletes its attribute name
+        """
+        materialize(self)
+        delattr(self, name)
+
+
+def stand_in(cls):
+    """
+    returns the stand-in class of the model class cls, created on
+    first use: a subclass of cls with the same name, not registered
+    in models.base_model.classes
+    """
+    lazy_cls = _stand_ins.get(cls)
+    if lazy_cls is None:
+        lazy_cls = type(cls.__name__, (Lazy, cls),
+                        {"__slots__": (), "__module__": cls.__module__,
+                         "model": cls}, register=False)
+        _stand_ins[cls] = lazy_cls
+    return lazy_cls
+
+
+def lazy(cls, text):
+    """
+    returns a stand-in for the object of the model class cls whose
+    to_dict() has the JSON text text
+    """
+    obj = object.__new__(stand_in(cls))
+    object.__getattribute__(obj, "__dict__")["__record__"] = text
+    return obj
+
+
+def materialize(obj):
+    """
+    turns the stand-in obj into an instance of its model class, its
+    attributes parsed from its record; does nothing to other objects
+    """
+    with _lock:
+        cls = type(obj)
+        if not issubclass(cls, Lazy):
+            return
+        attrs = object.__getattribute__(obj, "__dict__")
+        record = json.loads(attrs.pop("__record__"))
+        record.pop("__class__", None)
+        for name in ("created_at", "updated_at"):
+            if name in record:
+                record[name] = datetime.fromisoformat(record[name])
+        object.__setattr__(obj, "__class__", cls.model)
+        object.__getattribute__(obj, "__dict__").update(record)
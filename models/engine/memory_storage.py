@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+"""
+Defines a storage engine that:
+Keeps the objects in memory only and
+Writes them to a file when asked, or every few seconds when set to
+"""
+
+import atexit
+import threading
+import time
+from models.engine.file_storage import FileStorage
+
+
+class MemoryStorage(FileStorage):
+    """
+    Holds the instances in memory: saves only mark them written and
+    reload() reads nothing. dump() and restore() write the objects to
+    the file (see FileStorage.configure()) and read them back
+    __snapshot_interval - private class attr - seconds between the
+    background dumps, None for no background dump
+    __saved - private class attr - whether saves were made since the
+    last dump
+    __dumper - private class attr - the thread of the background dumps
+    """
+
+    __snapshot_interval = None
+    __saved = False
+    __dumper = None
+
+    def configure(self, snapshot_interval=None, **options):
+        """
+        sets the options of FileStorage.configure(), along with the
+        seconds between background dumps of the saved objects (0 for
+        none). The objects are dumped at exit too when they are set
+        """
+        if snapshot_interval is not None:
+            interval = float(snapshot_interval)
+            if interval < 0:
+                raise ValueError("snapshot_interval must not be negative")
+            MemoryStorage.__snapshot_interval = interval or None
+            if interval and MemoryStorage.__dumper is None:
+                MemoryStorage.__dumper = threading.Thread(
+                    target=self.__run, daemon=True)
+                MemoryStorage.__dumper.start()
+                atexit.register(self.__dump_saved)
+        super().configure(**options)
+
+    def write(self):
+        """
+        marks the changes made since the last save as written
+        """
+        self.dirty().clear()
+        MemoryStorage.__saved = True
+
+    def reload(self):
+        """
+        does nothing: the objects only come from restore()
+        """
+
+    def catch_up(self):
+        """
+        returns False: nothing is shared with other processes
+        """
+        return False
+
+    def stale(self):
+        """
+        returns False: nothing is shared with other processes
+        """
+        return False
+
+    def dump(self, path=None):
+        """
+        writes the objects as they are now to the file, or to path
+        (see FileStorage.write_snapshot()), while they go on changing
+        """
+        MemoryStorage.__saved = False
+        with self.snapshot() as snapshot:
+            self.write_snapshot(snapshot, path=path)
+
+    def restore(self, path=None):
+        """
+        replaces the objects by those of the file, or of the file at
+        path, written by dump() or by any other engine writing the
+        JSON file or binary snapshots
+        """
+        objects = self.read_snapshot(path)
+        with self.batch():
+            for obj in list(self.all().values()):
+                self.delete(obj)
+            for obj in objects:
+                self.new(obj)
+        self.dirty().clear()
+        MemoryStorage.__saved = False
+
+    def __dump_saved(self):
+        """
+        dumps the objects if saves were made since the last dump
+        """
+        if MemoryStorage.__saved:
+            self.dump()
+
+    def __run(self):
+        """
+        dumps the saved objects every __snapshot_interval seconds, for
+        as long as the process runs. A failed dump is retried at the
+        next interval
+        """
+        while MemoryStorage.__snapshot_interval:
+            time.sleep(MemoryStorage.__snapshot_interval)
+            try:
+                self.__dump_saved()
+            except Exception:
+                MemoryStorage.__saved = True
+        MemoryStorage.__dumper = None
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""
+Defines the registry of storage engines and how the one models uses
+is picked: by name, along with its options, read from the JSON config
+file named by HBNB_STORAGE_CONFIG and from the environment variables
+of OPTIONS, which win
+"""
+
+import importlib
+import json
+import os
+
+ENGINES = {
+    "file": "models.engine.file_storage.FileStorage",
+    "wal": "models.engine.wal_storage.WALStorage",
+    "shard": "models.engine.sharded_storage.ShardedStorage",
+    "sqlite": "models.engine.sqlite_storage.SQLiteStorage",
+    "memory": "models.engine.memory_storage.MemoryStorage",
+    "cached": "models.engine.cached_storage.CachedStorage",
+}
+
+OPTIONS = {
+    "engine": "HBNB_TYPE_STORAGE",
+    "path": "HBNB_STORAGE_PATH",
+    "format": "HBNB_STORAGE_FORMAT",
+    "flush": "HBNB_STORAGE_FLUSH",
+    "locking": "HBNB_STORAGE_LOCKING",
+    "checkpoint_size": "HBNB_STORAGE_CHECKPOINT_SIZE",
+    "checkpoint_rate": "HBNB_STORAGE_CHECKPOINT_RATE",
+    "snapshot_interval": "HBNB_STORAGE_SNAPSHOT_INTERVAL",
+    "cache_size": "HBNB_STORAGE_CACHE_SIZE",
+}
+
+
+def register(name, engine):
+    """
+    registers engine, a FileStorage subclass or its dotted path, under
+    name
+    """
+    ENGINES[name] = engine
+
+
+def engine(name):
+    """
+    returns the engine class registered under name, importing it on
+    first use
+    """
+    try:
+        target = ENGINES[name]
+    except KeyError:
+        raise ValueError("unknown storage engine {!r}".format(name)) from None
+    if isinstance(target, str):
+        module, _, cls_name = target.rpartition(".")
+        target = getattr(importlib.import_module(module), cls_name)
+        ENGINES[name] = target
+    return target
+
+
+def settings(environ=None):
+    """
+    returns the options of the storage engine, engine included: those
+    of the JSON config file named by HBNB_STORAGE_CONFIG, if any,
+    overridden by the environment variables of OPTIONS that are set
+    """
+    environ = os.environ if environ is None else environ
+    options = {}
+    if environ.get("HBNB_STORAGE_CONFIG"):
+        with open(environ["HBNB_STORAGE_CONFIG"]) as f:
+            options.update(json.load(f))
+    for option, variable in OPTIONS.items():
+        if environ.get(variable):
+            options[option] = environ[variable]
+    return options
+
+
+def create(name=None, **options):
+    """
+    returns an instance of the engine registered under name (by
+    default the engine of settings(), else file), configured with the
+    options of settings() overridden by options
+    """
+    merged = settings()
+    merged.update(options)
+    configured = merged.pop("engine", "file")
+    storage = engine(configured if name is None else name)()
+    storage.configure(**merged)
+    return storage
@@ -0,0 +1,151 @@
+#!/usr/bin/python3
+"""
+Defines the locks storage engines guard their objects with.
+Both have a read() and a write() side, used as context managers:
+WriteLock only serializes writers, RWLock also lets any number of
+readers in while no writer holds it
+"""
+
+import threading
+from contextlib import nullcontext
+
+
+class WriteLock:
+    """
+    Serializes writers and lets readers in without locking, for
+    engines used from one thread at a time
+    """
+
+    def __init__(self):
+        """
+        Initializes an unlocked lock
+        """
+        self.__write = threading.RLock()
+        self.__read = nullcontext()
+
+    def read(self):
+        """
+        returns a context manager for reading, which does nothing
+        """
+        return self.__read
+
+    def write(self):
+        """
+        returns a context manager for writing, reentrant
+        """
+        return self.__write
+
+
+class Side:
+    """
+    One side of a RWLock, as a context manager
+    acquire (callable): takes the side
+    release (callable): gives it back
+    """
+
+    def __init__(self, acquire, release):
+        """
+        Initializes a side from its two methods
+        """
+        self.acquire = acquire
+        self.release = release
+
+    def __enter__(self):
+        """
+        takes the side
+        """
+        self.acquire()
+
+    def __exit__(self, *exc):
+        """
+        gives the side back
+        """
+        self.release()
+
+
+class RWLock:
+    """
+    Lets in any number of readers, or one writer. Waiting writers
+    go first, so that a flow of readers cannot starve them. Both
+    sides are reentrant and a writer may read, but a reader cannot
+    become a writer
+    """
+
+    def __init__(self):
+        """
+        Initializes an unlocked lock
+        """
+        self.__changed = threading.Condition(threading.Lock())
+        self.__readers = {}
+        self.__writer = None
+        self.__writes = 0
+        self.__waiting = 0
+        self.__read = Side(self.acquire_read, self.release_read)
+        self.__write = Side(self.acquire_write, self.release_write)
+
+    def read(self):
+        """
+        returns a context manager for reading
+        """
+        return self.__read
+
+    def write(self):
+        """
+        returns a context manager for writing
+        """
+        return self.__write
+
+    def acquire_read(self):
+        """
+        waits until no writer holds or waits for the lock, then
+        takes it for reading
+        """
+        me = threading.get_ident()
+        with self.__changed:
+            if me not in self.__readers and self.__writer != me:
+                while self.__writer is not None or self.__waiting:
+                    self.__changed.wait()
+            self.__readers[me] = self.__readers.get(me, 0) + 1
+
+    def release_read(self):
+        """
+        gives back a read of the lock
+        """
+        me = threading.get_ident()
+        with self.__changed:
+            if self.__readers[me] == 1:
+                del self.__readers[me]
+                self.__changed.notify_all()
+            else:
+                self.__readers[me] -= 1
+
+    def acquire_write(self):
+        """
+        waits until no one else holds the lock, then takes it for
+        writing
+        """
+        me = threading.get_ident()
+        with self.__changed:
+            if self.__writer == me:
+                self.__writes += 1
+                return
+            if me in self.__readers:
+                raise RuntimeError("cannot write while reading")
+            self.__waiting += 1
+            try:
+                while self.__writer is not None or self.__readers:
+                    self.__changed.wait()
+            finally:
+                self.__waiting -= 1
+            self.__writer = me
+            self.__writes = 1
+
+    def release_write(self):
+        """
+        gives back a write of the lock
+        """
+        with self.__changed:
+            self.__writes -= 1
+            if not self.__writes:
+                self.__writer = None
+                self.__changed.notify_all()
@@ -0,0 +1,220 @@
+#!/usr/bin/python3
+"""
+Defines crash-safe writes and reads of the storage files.
+A file is written to a temporary file, flushed to disk and renamed
+over the previous one, which is kept as <path>.bak. <path>.sum holds
+the size and the CRC32 of each BLOCK_SIZE bytes block of both, so
+that a file damaged after it was written is found on read and the
+backup is used in its place
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import zlib
+
+BLOCK_SIZE = 1 << 16
+
+
+class ChecksumWriter(io.RawIOBase):
+    """
+    Passes writes to a binary file, computing the CRC32 of each
+    BLOCK_SIZE bytes block on the way
+    f (file): the binary file
+    """
+
+    def __init__(self, f):
+        """
+        Initializes a writer at the start of f
+        """
+        super().__init__()
+        self.f = f
+        self.size = 0
+        self.blocks = []
+        self.crc = 0
+
+    def writable(self):
+        """
+        tells that the stream can be written
+        """
+        return True
+
+    def write(self, data):
+        """
+        writes data, returning its length
+        """
+        data = memoryview(data).cast("B")
+        self.f.write(data)
+        pos = 0
+        while pos < len(data):
+            end = pos + BLOCK_SIZE - self.size % BLOCK_SIZE
+            chunk = data[pos:end]
+            self.crc = zlib.crc32(chunk, self.crc)
+            self.size += len(chunk)
+            if self.size % BLOCK_SIZE == 0:
+                self.blocks.append(self.crc)
+                self.crc = 0
+            pos = end
+        return len(data)
+
+    def record(self):
+        """
+        returns the checksum record of what was written
+        """
+        blocks = list(self.blocks)
+        if self.size % BLOCK_SIZE:
+            blocks.append(self.crc)
+        return {"size": self.size, "crc32": blocks}
+
+
+def checksum(path):
+    """
+    returns the checksum record of the file path, or None if there is
+    no such file
+    """
+    try:
+        f = open(path, mode="rb")
+    except FileNotFoundError:
+        return None
+    size = 0
+    blocks = []
+    with f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            size += len(block)
+            blocks.append(zlib.crc32(block))
+    return {"size": size, "crc32": blocks}
+
+
+def read_sums(path):
+    """
+    returns the checksum records of path and of its backup, or None
+    when path was not written by write()
+    """
+    try:
+        with open(path + ".sum") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def sync(f):
+    """
+    flushes the file f to disk
+    """
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def sync_dir(path):
+    """
+    flushes to disk the directory entries of the directory of path,
+    where the platform allows it
+    """
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def link(src, dst):
+    """
+    atomically replaces dst by a hard link to src, or by a copy of it
+    where links are not supported
+    """
+    tmp = dst + ".tmp"
+    try:
+        os.remove(tmp)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def write_sums(path, file, backup):
+    """
+    atomically writes the checksum records of path and of its backup,
+    tagging the first one with the identity of the file at path
+    """
+    stat = os.stat(path)
+    file = dict(file, inode=[stat.st_dev, stat.st_ino])
+    with open(path + ".sum.tmp", mode="w") as f:
+        json.dump({"file": file, "backup": backup}, f)
+        sync(f)
+    os.replace(path + ".sum.tmp", path + ".sum")
+
+
+def matches(record, other):
+    """
+    tells if two checksum records describe the same content
+    """
+    return (record is not None and other is not None and
+            record["size"] == other["size"] and
+            record["crc32"] == other["crc32"])
+
+
+def write(path, fill, buffering=BLOCK_SIZE, lock=None):
+    """
+    replaces the file path by what fill(f) writes to the buffered
+    binary file f, so that path holds either the old or the new
+    content whenever the process stops. The old content becomes the
+    backup. lock, when given, is only held while path and its
+    checksums are replaced, fill() writing to a temporary file of
+    this process meanwhile
+    """
+    tmp = path + ".tmp"
+    if lock is not None:
+        tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, mode="wb") as raw:
+        writer = ChecksumWriter(raw)
+        with io.BufferedWriter(writer, buffering) as f:
+            fill(f)
+        sync(raw)
+    with lock or contextlib.nullcontext():
+        sums = read_sums(path)
+        backup = None
+        if os.path.exists(path):
+            backup = checksum(path) if sums is None else sums["file"]
+            link(path, path + ".bak")
+        elif sums is not None:
+            backup = sums["backup"]
+        os.replace(tmp, path)
+        sync_dir(path)
+        write_sums(path, writer.record(), backup)
+
+
+def recover(path):
+    """
+    checks path against its checksums. When the file written last
+    does not match them anymore (it was truncated or damaged in
+    place), it is kept as <path>.corrupt and replaced by its backup.
+    Files not written by write(), or replaced since, are trusted
+    as they are
+    """
+    sums = read_sums(path)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return
+    if (sums is None or
+            sums["file"]["inode"] != [stat.st_dev, stat.st_ino] or
+            matches(checksum(path), sums["file"])):
+        return
+    link(path, path + ".corrupt")
+    backup = checksum(path + ".bak")
+    if not matches(backup, sums["backup"]):
+        raise ValueError("{} is corrupted and has no valid backup"
+                         .format(path))
+    link(path + ".bak", path)
+    sync_dir(path)
+    write_sums(path, backup, backup)
@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+"""
+Defines a storage engine that:
+Keeps one JSON file (shard) per model class and
+Only loads a shard when its class is first accessed
+"""
+
+import io
+import json
+import os
+from models.engine import json_stream, safe_file
+from models.engine.file_storage import BUFFER_SIZE, FileStorage, classes
+
+
+class ShardedStorage(FileStorage):
+    """
+    Serializes instances to one JSON file per class and
+    Deserializes each file lazily
+    __shard_dir - private class attribute - directory of the shards
+    __loaded - private class attr - names of the classes already loaded
+    """
+
+    __shard_dir = "file.json.d"
+    __loaded = set()
+
+    def configure(self, path=None, **options):
+        """
+        sets the options of FileStorage.configure(), path being the
+        directory of the shards
+        """
+        if path is not None:
+            ShardedStorage.__shard_dir = path
+        super().configure(**options)
+
+    def write(self):
+        """
+        rewrites the shards of the classes that have dirty objects,
+        one object at a time and through safe_file. Objects of
+        classes changed once the shards to write are loaded stay dirty
+        for the next write
+        """
+        changed = {key.split(".", 1)[0] for key in list(self.dirty())}
+        for cls_name in changed:
+            self.load(cls_name)
+        changes = self.take_changes()
+        late = [c for c in changes if c[0].split(".", 1)[0] not in changed]
+        if late:
+            self.restore_changes(late)
+        os.makedirs(self.__shard_dir, exist_ok=True)
+        try:
+            for cls_name in changed:
+                objects = dict(super().all(cls_name))
+                safe_file.write(
+                    self.__shard_path(cls_name),
+                    lambda f: self.__write_to(f, objects), BUFFER_SIZE)
+        except BaseException:
+            self.restore_changes(changes)
+            raise
+
+    def __write_to(self, f, objects):
+        """
+        writes the objects of a shard to the binary file f
+        """
+        text = io.TextIOWrapper(f, encoding="utf-8")
+        json_stream.write(text, ((k, json.dumps(v.to_dict()))
+                                 for k, v in objects.items()))
+        text.detach()
+
+    def reload(self):
+        """
+        forgets which shards are loaded, so that each one is read
+        again on the first access to its class
+        """
+        self.__loaded.clear()
+
+    def catch_up(self):
+        """
+        returns False: the shards written by other processes are only
+        read by the classes not loaded yet
+        """
+        return False
+
+    def stale(self):
+        """
+        returns False: catch_up() never merges the shards
+        """
+        return False
+
+    def __shard_path(self, cls_name):
+        """
+        returns the path of the shard of cls_name
+        """
+        return os.path.join(self.__shard_dir, cls_name + ".json")
+
+    def load(self, cls_name):
+        """
+        deserializes the shard of cls_name to __objects, once and one
+        object at a time. Objects already in memory, or deleted from
+        it, are kept as they are
+        """
+        if cls_name in self.__loaded or cls_name not in classes:
+            return
+        self.__loaded.add(cls_name)
+        safe_file.recover(self.__shard_path(cls_name))
+        try:
+            f = open(self.__shard_path(cls_name), encoding="utf-8")
+        except FileNotFoundError:
+            return
+        dirty = self.dirty()
+        with f:
+            for key, o in json_stream.read(f):
+                if key not in dirty:
+                    del o["__class__"]
+                    self.admit(classes[cls_name](**o))
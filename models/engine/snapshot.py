@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""
+Defines the point-in-time views of a storage engine: a snapshot keeps
+showing the objects as they were when it was opened while other code
+goes on creating, changing and deleting them
+"""
+
+
+class Snapshot:
+    """
+    A read-only view of the objects of a storage engine, or of the
+    objects of one class, as of the moment storage.snapshot() opened
+    it, used as a context manager
+    that closes it. Objects are handed out as copies made on access,
+    so that scanning a snapshot does not copy the whole store at once
+    epoch (int): the version of the storage the snapshot shows
+    keys (list): <obj class name>.id of the objects it holds
+    version (callable): version(key, epoch) returns a copy of the
+    object key held at epoch
+    release (callable): release(epoch) tells the storage that the
+    snapshot is closed
+    """
+
+    def __init__(self, epoch, keys, version, release):
+        """
+        Initializes an open snapshot
+        """
+        self.epoch = epoch
+        self.__keys = dict.fromkeys(keys)
+        self.__version = version
+        self.__release = release
+        self.closed = False
+
+    def __enter__(self):
+        """
+        returns the snapshot
+        """
+        return self
+
+    def __exit__(self, *exc):
+        """
+        closes the snapshot
+        """
+        self.close()
+
+    def close(self):
+        """
+        closes the snapshot, letting storage forget the versions kept
+        for it alone
+        """
+        if not self.closed:
+            self.closed = True
+            self.__release(self.epoch)
+
+    def __keys_of(self, cls):
+        """
+        returns the keys of the objects of cls (a class or a class
+        name), or of every object when cls is None
+        """
+        if self.closed:
+            raise ValueError("snapshot is closed")
+        if cls is None:
+            return list(self.__keys)
+        prefix = (cls if isinstance(cls, str) else cls.__name__) + "."
+        return [k for k in self.__keys if k.startswith(prefix)]
+
+    def items(self, cls=None):
+        """
+        yields the (key, object) pairs of the objects, or of the objects
+        of cls, one at a time
+        """
+        for key in self.__keys_of(cls):
+            if self.closed:
+                raise ValueError("snapshot is closed")
+            yield key, self.__version(key, self.epoch)
+
+    def all(self, cls=None):
+        """
+        returns the dictionary of the objects, or of the objects of cls
+        """
+        return dict(self.items(cls))
+
+    def get(self, cls, id):
+        """
+        returns the object of cls with the given id, or None if there
+        was none
+        """
+        if self.closed:
+            raise ValueError("snapshot is closed")
+        key = "{}.{}".format(cls if isinstance(cls, str) else cls.__name__,
+                             id)
+        if key not in self.__keys:
+            return None
+        return self.__version(key, self.epoch)
+
+    def count(self, cls=None):
+        """
+        returns the number of objects, or of objects of cls
+        """
+        return len(self.__keys_of(cls))
@@ -0,0 +1,234 @@
+#!/usr/bin/python3
+"""
+Defines a storage engine that:
+Keeps one SQLite table per model class and
+Writes the changed rows in one transaction on every save
+"""
+
+import json
+import os
+import sqlite3
+from models.engine.file_storage import FileStorage, classes
+from models.engine.indexes import RangeIndex
+
+
+class SQLiteStorage(FileStorage):
+    """
+    Serializes instances to the rows of a SQLite database and
+    Deserializes each table lazily
+    __db_path - private class attribute - path to the database
+    __connections - private class attr - open connections by path
+    __loaded - private class attr - names of the classes already loaded
+    """
+
+    __db_path = "file.db"
+    __connections = {}
+    __loaded = set()
+
+    def configure(self, path=None, **options):
+        """
+        sets the options of FileStorage.configure(), path being the
+        path to the database
+        """
+        if path is not None:
+            SQLiteStorage.__db_path = path
+        super().configure(**options)
+
+    def connection(self):
+        """
+        returns the connection to the database (path: __db_path),
+        opening it in WAL journal mode and creating the tables and
+        the indexes of hash_indexes and range_indexes on first use
+        """
+        path = os.path.abspath(self.__db_path)
+        if path not in self.__connections:
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                for cls_name, cls in classes.items():
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS "{}" ('
+                        'id TEXT PRIMARY KEY, created_at TEXT, '
+                        'updated_at TEXT, data TEXT NOT NULL)'
+                        .format(cls_name))
+                    for attr in cls.hash_indexes + cls.range_indexes:
+                        conn.execute(
+                            'CREATE INDEX IF NOT EXISTS "{0}_{1}" ON "{0}" '
+                            "(json_extract(data, '$.{1}'))"
+                            .format(cls_name, attr))
+            self.__connections[path] = conn
+        return self.__connections[path]
+
+    def close(self):
+        """
+        closes the connection to the database
+        """
+        conn = self.__connections.pop(os.path.abspath(self.__db_path), None)
+        if conn is not None:
+            conn.close()
+
+    def write(self):
+        """
+        writes the rows of the objects created or changed since the
+        last save and deletes the rows of the deleted ones, all in
+        one transaction, without holding the lock
+        """
+        changes = self.take_changes()
+        if not changes:
+            return
+        try:
+            with self.connection() as conn:
+                for key, data, names in changes:
+                    cls_name, obj_id = key.split(".", 1)
+                    if cls_name not in classes:
+                        continue
+                    if data is None:
+                        conn.execute('DELETE FROM "{}" WHERE id = ?'
+                                     .format(cls_name), (obj_id,))
+                        continue
+                    row = (data.pop("id"), data.pop("created_at", None),
+                           data.pop("updated_at", None))
+                    del data["__class__"]
+                    conn.execute(
+                        'INSERT OR REPLACE INTO "{}" VALUES (?, ?, ?, ?)'
+                        .format(cls_name), row + (json.dumps(data),))
+        except BaseException:
+            self.restore_changes(changes)
+            raise
+
+    def reload(self):
+        """
+        forgets which tables are loaded, so that each one is read
+        again on the first access to its class
+        """
+        self.__loaded.clear()
+
+    def catch_up(self):
+        """
+        returns False: the tables written by other processes are only
+        read by the classes not loaded yet
+        """
+        return False
+
+    def stale(self):
+        """
+        returns False: catch_up() never merges the tables
+        """
+        return False
+
+    def load(self, cls_name):
+        """
+        deserializes the table of cls_name to __objects, once.
+        Objects already in memory, or deleted from it, are kept as
+        they are
+        """
+        if cls_name in self.__loaded or cls_name not in classes:
+            return
+        self.__loaded.add(cls_name)
+        self.__select(cls_name, "1")
+
+    def lookup(self, cls, attr, value):
+        """
+        returns a dictionary of the objects of cls whose attribute
+        attr equals value. For a class not loaded yet, attr being in
+        its hash_indexes, only the matching rows are read, through the
+        index of attr, unless value is the default of attr, which the
+        rows do not hold
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        if (cls_name in self.__loaded or attr not in
+                getattr(classes.get(cls_name), "hash_indexes", ()) or
+                getattr(classes[cls_name], attr, None) == value):
+            return super().lookup(cls, attr, value)
+        found = self.__select(
+            cls_name, "json_extract(data, '$.{}') = ?".format(attr),
+            (value,))
+        for key, obj in self.__unsaved(cls_name):
+            if getattr(obj, attr, None) == value:
+                found.append(obj)
+        return {"{}.{}".format(cls_name, obj.id): obj for obj in found}
+
+    def between(self, cls, attr, low=None, high=None, limit=None,
+                reverse=False):
+        """
+        returns the list of objects of cls whose numeric attribute attr
+        is between low and high (see FileStorage.between()). For a
+        class not loaded yet, attr being in its range_indexes, only
+        the matching rows are read, in order, through the index of attr,
+        unless the default of attr, which the rows do not hold, is
+        between low and high
+        """
+        cls_name = cls if isinstance(cls, str) else cls.__name__
+        if (cls_name in self.__loaded or attr not in
+                getattr(classes.get(cls_name), "range_indexes", ()) or
+                self.__in_range(getattr(classes[cls_name], attr, None),
+                                low, high)):
+            return super().between(cls, attr, low, high, limit, reverse)
+        value = "json_extract(data, '$.{}')".format(attr)
+        where = ["json_type(data, '$.{}') IN ('integer', 'real')"
+                 .format(attr)]
+        params = []
+        if low is not None:
+            where.append(value + " >= ?")
+            params.append(low)
+        if high is not None:
+            where.append(value + " <= ?")
+            params.append(high)
+        unsaved = dict(self.__unsaved(cls_name))
+        order = "DESC" if reverse else "ASC"
+        where = "{} ORDER BY {} {}, id {}".format(
+            " AND ".join(where), value, order, order)
+        if limit is not None:
+            where += " LIMIT ?"
+            params.append(limit + len(unsaved))
+        found = RangeIndex(attr)
+        for obj in self.__select(cls_name, where, params):
+            found.add("{}.{}".format(cls_name, obj.id), obj)
+        for key, obj in unsaved.items():
+            found.add(key, obj)
+        return found.between(low, high, limit, reverse)
+
+    @staticmethod
+    def __in_range(value, low, high):
+        """
+        tells if value is a number between low and high (both included,
+        None for no bound)
+        """
+        return (isinstance(value, (int, float)) and
+                not isinstance(value, bool) and
+                (low is None or value >= low) and
+                (high is None or value <= high))
+
+    def __unsaved(self, cls_name):
+        """
+        returns the list of (key, obj) of the objects of cls_name
+        created or changed since the last save
+        """
+        return [(key, obj) for key, obj, names in self.changes()
+                if obj is not None and key.startswith(cls_name + ".")]
+
+    def __select(self, cls_name, where, params=()):
+        """
+        returns the list of the objects of the rows of the table of
+        cls_name matching the SQL condition where, putting them in
+        __objects. Objects already in memory are returned in place of
+        their rows, and the rows of objects changed or deleted since
+        the last save are left out
+        """
+        rows = self.connection().execute(
+            'SELECT id, created_at, updated_at, data FROM "{}" WHERE {}'
+            .format(cls_name, where), params)
+        dirty = self.dirty()
+        found = []
+        for obj_id, created_at, updated_at, data in rows:
+            if "{}.{}".format(cls_name, obj_id) in dirty:
+                continue
+            kwargs = json.loads(data)
+            kwargs["id"] = obj_id
+            if created_at is not None:
+                kwargs["created_at"] = created_at
+            if updated_at is not None:
+                kwargs["updated_at"] = updated_at
+            found.append(self.admit(classes[cls_name](**kwargs)))
+        return found
@@ -0,0 +1,36 @@
+#!/usr/bin/python3
+"""
+Defines the pacing of background writes, so that a checkpoint does
+not take the whole disk bandwidth from the reads and writes of the
+store going on meanwhile
+"""
+
+import time
+
+
+class Throttle:
+    """
+    Paces a stream of writes to at most rate bytes per second,
+    counted from its creation
+    rate (int): bytes per second
+    """
+
+    def __init__(self, rate):
+        """
+        Initializes a throttle with nothing written yet
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.written = 0
+        self.__start = time.monotonic()
+
+    def __call__(self, size):
+        """
+        counts size more bytes written, sleeping for as long as the
+        writes got ahead of rate
+        """
+        self.written += size
+        ahead = self.written / self.rate - (time.monotonic() - self.__start)
+        if ahead > 0:
+            time.sleep(ahead)
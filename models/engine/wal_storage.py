@@ -0,0 +1,338 @@
+#!/usr/bin/python3
+"""
+Defines a storage engine that:
+Keeps the JSON file as a snapshot and
+Appends every mutation to a write-ahead log
+"""
+
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from models.engine import safe_file
+from models.engine.file_lock import FileLock
+from models.engine.file_storage import FileStorage, classes
+from models.engine.throttle import Throttle
+
+
+class WALStorage(FileStorage):
+    """
+    Appends put/delete records to a log instead of rewriting the
+    whole JSON file on every save
+    __wal_path - private class attribute - path to the log
+    __checkpoint_size - private class attr - logged records allowed
+    before a checkpoint starts in the background
+    __checkpoint_rate - private class attr - bytes per second
+    background checkpoints write at most (0 for no limit)
+    __segment - private class attr - inode of the log file this
+    process replayed or wrote last
+    __offset - private class attr - bytes of __segment this process
+    has replayed or written
+    __checkpointer - private class attr - the thread of the running
+    background checkpoint
+    """
+
+    __wal_path = "file.json.wal"
+    __checkpoint_size = 10000
+    __checkpoint_rate = 0
+    __logged = 0
+    __segment = None
+    __offset = 0
+    __checkpointer = None
+    __starting = threading.Lock()
+    __checkpoint_locks = {}
+
+    def configure(self, path=None, checkpoint_size=None,
+                  checkpoint_rate=None, **options):
+        """
+        sets the options of FileStorage.configure(), the log being kept
+        at <path>.wal, along with the number of records that start a
+        checkpoint and the bytes per second it writes (0 for no limit)
+        """
+        if checkpoint_size is not None and int(checkpoint_size) <= 0:
+            raise ValueError("checkpoint_size must be positive")
+        if checkpoint_rate is not None and int(checkpoint_rate) < 0:
+            raise ValueError("checkpoint_rate must not be negative")
+        if path is not None:
+            WALStorage.__wal_path = path + ".wal"
+        if checkpoint_size is not None:
+            WALStorage.__checkpoint_size = int(checkpoint_size)
+        if checkpoint_rate is not None:
+            WALStorage.__checkpoint_rate = int(checkpoint_rate)
+        super().configure(path=path, **options)
+
+    def write(self):
+        """
+        appends one record per dirty object to the log (path:
+        __wal_path) and syncs it to disk. Changed objects only
+        carry their changed attributes. The records other processes
+        appended since are merged first, under the file lock; the
+        changes are taken under the lock of the objects, the log is
+        appended to without holding it. A torn record left at the end
+        of the log by a crash is cut off first. Once __checkpoint_size
+        records are logged, a checkpoint starts in the background
+        """
+        with self.file_lock():
+            self.catch_up()
+            changes = self.take_changes()
+            if not changes:
+                return
+            try:
+                with open(self.__wal_path, mode="ab") as f:
+                    if os.fstat(f.fileno()).st_ino != WALStorage.__segment:
+                        WALStorage.__segment = os.fstat(f.fileno()).st_ino
+                        WALStorage.__offset = 0
+                    if f.seek(0, os.SEEK_END) > WALStorage.__offset:
+                        f.truncate(WALStorage.__offset)
+                    for key, fields, names in changes:
+                        cls_name, obj_id = key.split(".", 1)
+                        record = {"op": "put", "class": cls_name,
+                                  "id": obj_id}
+                        if fields is None:
+                            record["op"] = "delete"
+                        else:
+                            del fields["__class__"]
+                            if names is not None:
+                                fields = {k: fields[k]
+                                          for k in names if k in fields}
+                            record["fields"] = fields
+                        f.write((json.dumps(record) + "\n").encode())
+                    f.flush()
+                    os.fsync(f.fileno())
+                    WALStorage.__offset = f.tell()
+            except BaseException:
+                self.restore_changes(changes)
+                raise
+            WALStorage.__logged += len(changes)
+            if WALStorage.__logged >= self.__checkpoint_size:
+                self.compact()
+
+    def compact(self):
+        """
+        starts a checkpoint in a background thread, throttled to
+        __checkpoint_rate, unless one is running already, and returns
+        its thread
+        """
+        with self.__starting:
+            thread = WALStorage.__checkpointer
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(
+                    target=self.checkpoint,
+                    args=(self.__checkpoint_rate or None,), daemon=True)
+                WALStorage.__checkpointer = thread
+                thread.start()
+        return thread
+
+    def checkpoint(self, rate=None):
+        """
+        rewrites the JSON snapshot and starts the log over. Under the
+        file lock, the log is moved to <__wal_path>.1 and a snapshot
+        of the objects is opened (see snapshot()); the snapshot is
+        then written while reads and writes go on, at most rate bytes
+        per second when given, and <__wal_path>.1 is removed. Objects
+        with unsaved changes, in open batches among others, are written
+        as the log holds them (see Logged). One checkpoint runs at a
+        time among the processes; the log of one that did not finish
+        is folded into the next
+        """
+        old = self.__wal_path + ".1"
+        path = os.path.abspath(self.__wal_path + ".checkpoint.lock")
+        with self.__checkpoint_locks.setdefault(path, FileLock(path)):
+            with self.file_lock():
+                self.catch_up()
+                if os.path.exists(old) and os.path.exists(self.__wal_path):
+                    with open(old, mode="ab") as dst, \
+                            open(self.__wal_path, mode="rb") as src:
+                        shutil.copyfileobj(src, dst)
+                        safe_file.sync(dst)
+                    os.remove(self.__wal_path)
+                elif os.path.exists(self.__wal_path):
+                    os.replace(self.__wal_path, old)
+                with open(self.__wal_path, mode="ab") as f:
+                    WALStorage.__segment = os.fstat(f.fileno()).st_ino
+                safe_file.sync_dir(self.__wal_path)
+                WALStorage.__offset = 0
+                WALStorage.__logged = 0
+                with self.lock().write():
+                    snapshot = self.snapshot()
+                    unsaved = list(self.dirty())
+            with snapshot:
+                logged = Logged(snapshot, self.__logged_versions(unsaved))
+                self.write_snapshot(logged,
+                                    None if rate is None else Throttle(rate))
+            with self.file_lock():
+                if os.path.exists(old):
+                    os.remove(old)
+                    safe_file.sync_dir(old)
+
+    def __logged_versions(self, keys):
+        """
+        returns the objects of keys as the JSON snapshot and the log
+        moved to <__wal_path>.1 hold them, None for those they do not
+        hold. Only other checkpoints change both files, so they are
+        read holding the checkpoint lock alone
+        """
+        logged = dict.fromkeys(keys)
+        if not logged:
+            return logged
+        try:
+            for obj in self.read_snapshot():
+                key = "{}.{}".format(obj.__class__.__name__, obj.id)
+                if key in logged:
+                    logged[key] = obj
+        except FileNotFoundError:
+            pass
+        try:
+            f = open(self.__wal_path + ".1", mode="rb")
+        except FileNotFoundError:
+            return logged
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                key = "{}.{}".format(record["class"], record["id"])
+                if key not in logged:
+                    continue
+                if record["op"] == "delete":
+                    logged[key] = None
+                elif logged[key] is None:
+                    if "id" in record["fields"]:
+                        logged[key] = classes[record["class"]](
+                            **record["fields"])
+                else:
+                    for name, value in record["fields"].items():
+                        if name in ("created_at", "updated_at"):
+                            value = datetime.fromisoformat(value)
+                        logged[key].__dict__[name] = value
+        return logged
+
+    def catch_up(self):
+        """
+        merges the JSON snapshot when another process rewrote it, then
+        the records appended to the log since __offset of __segment:
+        the rest of <__wal_path>.1 when it is __segment, then the log.
+        Returns whether there were any. A torn record at the end of a
+        file (crash mid-append) ends its replay
+        """
+        changed = super().catch_up()
+        segments = []
+        for path in (self.__wal_path + ".1", self.__wal_path):
+            try:
+                segments.append((path, os.stat(path).st_ino))
+            except FileNotFoundError:
+                pass
+        if changed or WALStorage.__segment not in [i for p, i in segments]:
+            WALStorage.__segment = None
+            WALStorage.__logged = 0
+        replaying = WALStorage.__segment is None
+        for path, inode in segments:
+            if inode == WALStorage.__segment:
+                replaying = True
+            elif not replaying:
+                continue
+            else:
+                WALStorage.__segment = inode
+                WALStorage.__offset = 0
+            with open(path, mode="rb") as f:
+                f.seek(WALStorage.__offset)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    self.__replay(record)
+                    WALStorage.__offset += len(line)
+                    WALStorage.__logged += 1
+                    changed = True
+        return changed
+
+    def stale(self):
+        """
+        returns whether the JSON snapshot changed, or the log holds
+        records this process did not replay or write (see catch_up())
+        """
+        if super().stale() or os.path.exists(self.__wal_path + ".1"):
+            return True
+        try:
+            stat = os.stat(self.__wal_path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino != WALStorage.__segment or
+                stat.st_size != WALStorage.__offset)
+
+    def reload(self):
+        """
+        loads the JSON snapshot then replays the log on top of it.
+        Without a log, this is FileStorage.reload(), which does not
+        take the file lock when there is no snapshot either
+        """
+        if not (os.path.exists(self.__wal_path) or
+                os.path.exists(self.__wal_path + ".1")):
+            super().reload()
+            WALStorage.__segment = None
+            WALStorage.__offset = 0
+            WALStorage.__logged = 0
+            return
+        with self.file_lock():
+            super().reload()
+            WALStorage.__segment = None
+            WALStorage.__offset = 0
+            WALStorage.__logged = 0
+            self.catch_up()
+        self.dirty().clear()
+
+    def __replay(self, record):
+        """
+        merges one log record into __objects (see merge()). A record of
+        changed attributes only is skipped when its object is not held:
+        the whole object was logged, or deleted, before it
+        """
+        key = "{}.{}".format(record["class"], record["id"])
+        if record["op"] == "delete":
+            self.merge(key, None)
+            return
+        cls = classes[record["class"]]
+        current = self.get(cls, record["id"])
+        if current is None:
+            if "id" in record["fields"]:
+                self.merge(key, cls(**record["fields"]))
+            return
+        obj = cls.__new__(cls)
+        obj.__dict__.update(current.__dict__)
+        for name, value in record["fields"].items():
+            if name in ("created_at", "updated_at"):
+                value = datetime.fromisoformat(value)
+            obj.__dict__[name] = value
+        self.merge(key, obj)
+
+
+class Logged:
+    """
+    The objects a checkpoint writes: those of a snapshot, the ones
+    with unsaved changes taken as the log holds them instead
+    snapshot (Snapshot): the snapshot of the objects
+    logged (dict): the logged version of each object with unsaved
+    changes, None for those the log does not hold
+    """
+
+    def __init__(self, snapshot, logged):
+        """
+        Initializes the view of snapshot and logged
+        """
+        self.snapshot = snapshot
+        self.logged = logged
+
+    def items(self):
+        """
+        yields the (key, object) pairs of the objects, one at a time
+        """
+        for key, obj in self.snapshot.items():
+            if key in self.logged:
+                continue
+            yield key, obj
+        for key, obj in self.logged.items():
+            if obj is not None:
+                yield key, obj
@@ -19,6 +19,13 @@ class Place(BaseModel):
         longitude (float): The longitude of the place.
         amenity_ids (list): A list of Amenity ids.
     """
+    hash_indexes = ("city_id", "user_id")
+    range_indexes = ("number_rooms", "number_bathrooms", "max_guest",
+                     "price_by_night")
+    geo_index = ("latitude", "longitude")
+    text_index = ("name", "description")
+    columns = ("number_rooms", "number_bathrooms", "max_guest",
+               "price_by_night", "latitude", "longitude")
     city_id = ""
     user_id = ""
     name = ""
@@ -5,6 +5,9 @@ from models.base_model import BaseModel
 
 class Review(BaseModel):
     """Implements the Review model"""
+    hash_indexes = ("place_id", "user_id")
+    text_index = ("text",)
+    columns = ("created_at", "updated_at")
     place_id = ""
     user_id = ""
     text = ""
@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+"""
+Defines the base test cases of the storage test suites: each test
+runs inside an empty temporary directory and, for StorageCase, against
+a new engine patched in as models.storage. Test modules writing to the
+storage otherwise import setUpModule and tearDownModule instead
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from models.engine.file_storage import FileStorage
+
+temp_dirs = []
+
+
+def reset_storage():
+    """Forgets the objects FileStorage holds, along with what it keeps
+    about them, and sets its options back to their defaults"""
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__dirty.clear()
+    FileStorage._FileStorage__encoded = {}
+    FileStorage._FileStorage__attr_indexes = {}
+    FileStorage._FileStorage__text_states = {}
+    FileStorage._FileStorage__text_changes = {}
+    FileStorage._FileStorage__text_built = set()
+    FileStorage._FileStorage__columns = {}
+    FileStorage._FileStorage__stale_columns = set()
+    FileStorage._FileStorage__version = None
+    FileStorage().configure(path="file.json", format="json",
+                            locking="write")
+
+
+def setUpModule():
+    """Runs the tests of a module that imports it, and the storage
+    files they write, inside an empty temporary directory"""
+    cwd = os.getcwd()
+    tmp = tempfile.TemporaryDirectory()
+    os.chdir(tmp.name)
+    temp_dirs.append((cwd, tmp))
+
+
+def tearDownModule():
+    """Restores the working directory of setUpModule() and removes the
+    temporary one"""
+    cwd, tmp = temp_dirs.pop()
+    os.chdir(cwd)
+    tmp.cleanup()
+
+
+class TempDirCase(unittest.TestCase):
+    """Runs every test inside an empty temporary directory"""
+
+    def setUp(self):
+        """Moves to an empty temporary directory"""
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        """Restores the working directory and removes the temporary
+        one"""
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+
+class StorageCase(TempDirCase):
+    """Runs every test inside an empty temporary directory, against an
+    empty engine of the class engine patched in as models.storage
+    engine (class): the engine created by create()
+    """
+
+    engine = FileStorage
+
+    def setUp(self):
+        """Starts every test from an empty storage"""
+        super().setUp()
+        reset_storage()
+        self.storage = self.create()
+        self.storage.dirty().clear()
+        self.storage.reload()
+        self.patcher = patch("models.storage", self.storage)
+        self.patcher.start()
+
+    def tearDown(self):
+        """Restores models.storage, the working directory and the state
+        FileStorage shares"""
+        self.patcher.stop()
+        super().tearDown()
+        reset_storage()
+
+    def create(self):
+        """Returns the engine the tests run against"""
+        return self.engine()
+
+    def restart(self):
+        """Forgets the objects in memory and reloads them, as a new
+        process would"""
+        FileStorage._FileStorage__objects = {}
+        self.storage.dirty().clear()
+        self.storage.reload()
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""Test Suite for the snapshot format in models/engine/binary_codec.py"""
+import io
+import json
+import os
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import models
+from models.engine import binary_codec
+from models.engine.binary_codec import BinaryCodec
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+from storage_case import StorageCase
+
+
+class TestBinaryCodec(unittest.TestCase):
+    """Contains test cases against the binary records"""
+
+    def round_trip(self, records):
+        """Writes then reads records of (class name, attrs)"""
+        codec = BinaryCodec()
+        f = io.BytesIO()
+        codec.write(f, [codec.encode(*record) for record in records])
+        f.seek(0)
+        return list(binary_codec.read(f))
+
+    def test_values_round_trip(self):
+        """Checks that every kind of value comes back unchanged"""
+        attrs = {
+            "id": "0b6a3c4e-7d15-4b0e-9d4c-1c2f7f0e8a11",
+            "created_at": datetime(2023, 5, 17, 8, 30, 1, 123456),
+            "name": "Cozy loft",
+            "description": "é" * 300,
+            "number_rooms": -3,
+            "huge": 2 ** 70,
+            "latitude": 1.25,
+            "flag": True,
+            "other": False,
+            "nothing": None,
+            "amenity_ids": ["a", "b"],
+            "not_a_uuid": "0B6A3C4E-7D15-4B0E-9D4C-1C2F7F0E8A11"
+        }
+        self.assertEqual(self.round_trip([("Place", attrs)]),
+                         [("Place", attrs)])
+
+    def test_names_are_interned(self):
+        """Checks that class and attribute names are stored once"""
+        codec = BinaryCodec()
+        first = codec.encode("User", {"email": "a"})
+        second = codec.encode("User", {"email": "b"})
+        self.assertEqual(len(first), len(second))
+        self.assertNotIn(b"email", first)
+        self.assertEqual(codec.intern("User"), 0)
+
+    def test_bad_header(self):
+        """Checks that another version is refused"""
+        f = io.BytesIO(binary_codec.HEADER.pack(b"HBNB", 99, 0))
+        with self.assertRaises(ValueError):
+            list(binary_codec.read(f))
+
+
+class TestBinarySnapshot(StorageCase):
+    """Contains test cases against binary snapshots of FileStorage"""
+
+    def test_save_and_reload_binary(self):
+        """Checks that reload() detects and reads a binary snapshot"""
+        user = User()
+        user.email = "betty@mail.com"
+        place = Place()
+        place.latitude = -1.28
+        with patch.object(FileStorage, "_FileStorage__format", "binary"):
+            models.storage.save()
+        with open("file.json", "rb") as f:
+            self.assertEqual(f.read(4), binary_codec.MAGIC)
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        loaded = models.storage.get(User, user.id)
+        self.assertIsNot(loaded, user)
+        self.assertEqual(loaded.to_dict(), user.to_dict())
+        self.assertEqual(models.storage.get(Place, place.id).latitude, -1.28)
+
+    def test_binary_is_smaller(self):
+        """Checks that the binary snapshot is several times smaller"""
+        for _ in range(50):
+            User()
+        models.storage.save()
+        size = os.path.getsize("file.json")
+        with patch.object(FileStorage, "_FileStorage__format", "binary"):
+            models.storage.save()
+        self.assertLess(os.path.getsize("file.json") * 3, size)
+
+    def test_switching_back_to_json(self):
+        """Checks that cached binary records are not written as JSON"""
+        user = User()
+        with patch.object(FileStorage, "_FileStorage__format", "binary"):
+            models.storage.save()
+        models.storage.save()
+        with open("file.json") as f:
+            self.assertIn("User." + user.id, json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+#!/usr/bin/python3
+"""Test Suite for CachedStorage in models/engine/cached_storage.py"""
+import gc
+import json
+import unittest
+
+from models.engine.cached_storage import CachedStorage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+from storage_case import StorageCase
+
+
+class TestCachedStorage(StorageCase):
+    """Contains test cases against the engine holding few objects"""
+
+    engine = CachedStorage
+
+    def setUp(self):
+        """Holds three objects in memory at most"""
+        super().setUp()
+        self.storage.configure(cache_size=3)
+
+    def tearDown(self):
+        """Sets the cache size back"""
+        self.storage.configure(cache_size=10000)
+        self.storage.reload()
+        super().tearDown()
+
+    def held(self):
+        """Returns the number of objects in memory"""
+        return len(FileStorage._FileStorage__objects)
+
+    def users(self, n):
+        """Saves n users and returns their ids"""
+        ids = []
+        for i in range(n):
+            user = User()
+            user.first_name = "user{}".format(i)
+            ids.append(user.id)
+        self.storage.save()
+        return ids
+
+    def test_memory_is_bounded(self):
+        """Checks that saved objects beyond cache_size leave memory"""
+        ids = self.users(10)
+        self.assertEqual(self.held(), 3)
+        for i, id in enumerate(ids):
+            self.assertEqual(self.storage.get(User, id).first_name,
+                             "user{}".format(i))
+            self.assertLessEqual(self.held(), 3)
+        self.assertEqual(self.storage.count(User), 10)
+
+    def test_unsaved_objects_stay(self):
+        """Checks that objects with unsaved changes are not dropped"""
+        self.users(5)
+        for i in range(5):
+            User()
+        self.assertEqual(self.held(), 8)
+        self.storage.save()
+        self.assertEqual(self.held(), 3)
+
+    def test_least_recently_used_leaves(self):
+        """Checks that the object used last stays in memory"""
+        ids = self.users(4)
+        self.storage.get(User, ids[0])
+        self.storage.get(User, ids[2])
+        self.storage.get(User, ids[3])
+        self.storage.get(User, ids[1])
+        held = FileStorage._FileStorage__objects
+        self.assertNotIn("User." + ids[0], held)
+        self.assertIn("User." + ids[1], held)
+
+    def test_objects_in_use_are_the_same(self):
+        """Checks that an object dropped from memory while still used
+        is handed out again, and that its changes are saved"""
+        ids = self.users(4)
+        first = self.storage.get(User, ids[0])
+        for id in ids[1:]:
+            self.storage.get(User, id)
+        self.assertNotIn("User." + ids[0], FileStorage._FileStorage__objects)
+        self.assertIs(self.storage.get(User, ids[0]), first)
+        for id in ids[1:]:
+            self.storage.get(User, id)
+        first.first_name = "Betty"
+        self.assertIn("User." + ids[0], self.storage.dirty())
+        self.storage.save()
+        del first
+        gc.collect()
+        self.storage.reload()
+        self.assertEqual(self.storage.get(User, ids[0]).first_name, "Betty")
+
+    def test_all_does_not_load(self):
+        """Checks that going through all() keeps memory bounded"""
+        ids = self.users(10)
+        self.storage.reload()
+        self.assertEqual(self.held(), 0)
+        objects = self.storage.all(User)
+        self.assertEqual(len(objects), 10)
+        self.assertEqual(sorted(obj.id for obj in objects.values()),
+                         sorted(ids))
+        self.assertEqual(self.held(), 0)
+        self.assertIn("User." + ids[0], self.storage.all())
+        with self.assertRaises(KeyError):
+            self.storage.all()["User.missing"]
+
+    def test_deleted_objects(self):
+        """Checks that objects deleted from the file are gone"""
+        ids = self.users(5)
+        self.storage.reload()
+        self.storage.delete(self.storage.all()["User." + ids[0]])
+        self.assertIsNone(self.storage.get(User, ids[0]))
+        self.assertEqual(self.storage.count(), 4)
+        self.storage.save()
+        self.storage.reload()
+        self.assertIsNone(self.storage.get(User, ids[0]))
+        self.assertEqual(self.storage.count(), 4)
+
+    def test_file_format(self):
+        """Checks that the file stays the one of FileStorage"""
+        ids = self.users(5)
+        self.storage.get(User, ids[1]).last_name = "Holberton"
+        self.storage.save()
+        with open("file.json") as f:
+            saved = json.load(f)
+        self.assertEqual(sorted(saved), sorted("User." + id for id in ids))
+        self.assertEqual(saved["User." + ids[1]]["last_name"], "Holberton")
+
+    def test_queries_scan(self):
+        """Checks the queries of objects out of memory"""
+        for rooms in range(6):
+            place = Place()
+            place.city_id = "c{}".format(rooms % 2)
+            place.number_rooms = rooms
+            place.description = "loft {}".format(rooms)
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(len(self.storage.lookup(Place, "city_id", "c1")), 3)
+        self.assertEqual([p.number_rooms for p in
+                          self.storage.between(Place, "number_rooms", 2, 4)],
+                         [2, 3, 4])
+        self.assertEqual(len(self.storage.search(Place, "loft", k=10)), 6)
+        self.assertEqual(self.held(), 0)
+
+    def test_rw_locking(self):
+        """Checks that reads from the file go under a RWLock"""
+        self.storage.configure(locking="rw")
+        ids = self.users(5)
+        self.storage.reload()
+        with self.storage.snapshot() as snapshot:
+            self.storage.get(User, ids[0]).first_name = "Betty"
+            self.assertEqual(snapshot.get(User, ids[0]).first_name, "user0")
+        self.assertEqual(len(self.storage.lookup(User, "first_name",
+                                                 "Betty")), 1)
+
+    def test_options(self):
+        """Checks the options the engine rejects"""
+        with self.assertRaises(ValueError):
+            self.storage.configure(cache_size=0)
+        with self.assertRaises(ValueError):
+            self.storage.configure(format="binary")
+
+
+if __name__ == "__main__":
+    unittest.main()
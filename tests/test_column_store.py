@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+"""Test Suite for the columns in models/engine/column_store.py"""
+import json
+import os
+import unittest
+from datetime import datetime
+from math import isnan
+from unittest.mock import patch
+
+from models.engine.binary_codec import EPOCH, MICROSECOND
+from models.engine.column_store import ColumnStore, to_number, typecode
+from models.place import Place
+from models.review import Review
+from storage_case import StorageCase, TempDirCase
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestColumnStore(TempDirCase):
+    """Contains test cases against the ColumnStore class"""
+
+    def test_typecode(self):
+        """Checks that float attributes get float64 columns"""
+        self.assertEqual(typecode(Place, "latitude"), "d")
+        self.assertEqual(typecode(Place, "max_guest"), "q")
+        self.assertEqual(typecode(Review, "created_at"), "q")
+
+    def test_to_number(self):
+        """Checks the conversion of values to column values"""
+        when = datetime(2024, 1, 2)
+        self.assertEqual(to_number(when, "q"), (when - EPOCH) // MICROSECOND)
+        self.assertEqual(to_number(2.7, "q"), 2)
+        self.assertEqual(to_number("4", "q"), 0)
+        self.assertTrue(isnan(to_number(None, "d")))
+        self.assertEqual(to_number(3, "d"), 3.0)
+
+    def test_write_and_column(self):
+        """Checks that columns are mapped from their files"""
+        store = ColumnStore("cols", "Place", {"max_guest": "q",
+                                              "latitude": "d"})
+        a, b = Place(), Place()
+        a.max_guest, b.max_guest = 4, 2
+        a.latitude, b.latitude = 1.5, -0.5
+        store.write({"Place.a": a, "Place.b": b})
+        guests = store.column("max_guest")
+        self.assertEqual(guests.tolist(), [4, 2])
+        self.assertEqual(guests.format, "q")
+        self.assertTrue(guests.readonly)
+        self.assertEqual(store.column("latitude").tolist(), [1.5, -0.5])
+        self.assertEqual(store.keys(), ["Place.a", "Place.b"])
+        with open(os.path.join("cols", "Place.json")) as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest["keys"], ["Place.a", "Place.b"])
+        self.assertEqual(manifest["columns"]["latitude"][1:], "f8")
+        self.assertEqual(os.path.getsize(store.path("latitude")), 16)
+
+    def test_rewrite_keeps_old_views(self):
+        """Checks that a view handed out earlier is left unchanged"""
+        store = ColumnStore("cols", "Place", {"max_guest": "q"})
+        place = Place()
+        place.max_guest = 1
+        store.write({"Place.a": place})
+        old = store.column("max_guest")
+        place.max_guest = 9
+        store.write({"Place.a": place, "Place.b": place})
+        self.assertEqual(old.tolist(), [1])
+        self.assertEqual(store.column("max_guest").tolist(), [9, 9])
+
+    def test_empty_column(self):
+        """Checks that a class without objects has empty columns"""
+        store = ColumnStore("cols", "Place", {"latitude": "d"})
+        store.write({})
+        self.assertEqual(store.column("latitude").tolist(), [])
+        self.assertEqual(store.keys(), [])
+
+
+class TestStorageColumns(StorageCase):
+    """Contains test cases against FileStorage.column()"""
+
+    def setUp(self):
+        """Starts every test with two places"""
+        super().setUp()
+        self.place = Place()
+        self.place.price_by_night = 120
+        self.other = Place()
+        self.other.price_by_night = 80
+
+    def prices(self):
+        """Returns the prices by key, as the columns tell them"""
+        return dict(zip(self.storage.column_keys(Place),
+                        self.storage.column(Place, "price_by_night")))
+
+    def test_column(self):
+        """Checks that a column holds the values of every object"""
+        self.assertEqual(self.prices(), {"Place." + self.place.id: 120,
+                                         "Place." + self.other.id: 80})
+        view = self.storage.column("Place", "latitude")
+        self.assertEqual(view.format, "d")
+        self.assertEqual(len(view), 2)
+
+    def test_undeclared_column(self):
+        """Checks that only declared attributes have a column"""
+        with self.assertRaises(KeyError):
+            self.storage.column(Place, "name")
+
+    def test_changes_are_followed(self):
+        """Checks that columns follow updates, creations and deletions"""
+        self.prices()
+        self.place.price_by_night = 150
+        extra = Place()
+        self.storage.delete(self.other)
+        self.assertEqual(self.prices(), {"Place." + self.place.id: 150,
+                                         "Place." + extra.id: 0})
+
+    def test_columns_are_rewritten_on_access(self):
+        """Checks that save() leaves the column files alone, and the
+        next access to a column brings them up to date"""
+        self.storage.column(Place, "price_by_night")
+        self.place.price_by_night = 99
+        path = os.path.join("file.json.columns", "Place.price_by_night.col")
+
+        def values():
+            """Returns the values of the price file"""
+            with open(path, mode="rb") as f:
+                return memoryview(f.read()).cast("q").tolist()
+
+        with patch.object(ColumnStore, "write") as write:
+            self.storage.save()
+        write.assert_not_called()
+        self.assertIn(120, values())
+        self.storage.column(Place, "price_by_night")
+        self.assertIn(99, values())
+        self.assertNotIn(120, values())
+
+    def test_other_attributes_keep_columns(self):
+        """Checks that changing an attribute without a column is free"""
+        self.storage.column(Place, "price_by_night")
+        with patch.object(ColumnStore, "write") as write:
+            self.place.name = "Loft"
+            self.storage.column(Place, "price_by_night")
+        write.assert_not_called()
+
+    def test_review_timestamps(self):
+        """Checks that timestamps are microseconds since the epoch"""
+        review = Review()
+        created = self.storage.column(Review, "created_at")
+        self.assertEqual(created.tolist(),
+                         [(review.created_at - EPOCH) // MICROSECOND])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_zero_copy(self):
+        """Checks that NumPy wraps a column without copying it"""
+        prices = numpy.asarray(self.storage.column(Place, "price_by_night"))
+        self.assertEqual(prices.dtype, numpy.int64)
+        self.assertFalse(prices.flags.owndata)
+        self.assertEqual(sorted(prices.tolist()), [80, 120])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+"""Test Suite for the compact models of models/base_model.py"""
+import gc
+import tracemalloc
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from console import HBNBCommand
+from models.base_model import Field, classes, compact
+from models.place import Place
+from models.user import User
+from storage_case import StorageCase
+
+
+class TestCompact(StorageCase):
+    """Contains test cases against models made compact"""
+
+    def setUp(self):
+        """Registers compact subclasses of User and Place"""
+        super().setUp()
+        self.CompactUser = compact(type("CompactUser", (User,), {}))
+        self.CompactPlace = compact(type("CompactPlace", (Place,), {}))
+
+    def tearDown(self):
+        """Restores the registered classes"""
+        super().tearDown()
+        classes.pop("CompactUser", None)
+        classes.pop("CompactPlace", None)
+        classes["Place"] = Place
+
+    def test_fields(self):
+        """Checks that declared attributes become fields with defaults"""
+        CompactUser = self.CompactUser
+        self.assertIs(classes["CompactUser"], CompactUser)
+        self.assertEqual(list(CompactUser.fields),
+                         ["id", "created_at", "updated_at", "email",
+                          "password", "first_name", "last_name"])
+        self.assertIsInstance(CompactUser.__dict__["email"], Field)
+        self.assertEqual(CompactUser.email, "")
+        self.assertIs(self.CompactPlace.fields["number_rooms"].type, int)
+        self.assertIsNone(CompactUser.fields["id"].type)
+        self.assertEqual(User.fields, {})
+
+    def test_attributes(self):
+        """Checks that fields and other attributes read back alike"""
+        user = self.CompactUser()
+        self.assertEqual(user.email, "")
+        self.assertNotIn("email", user.__dict__)
+        user.email = "a@b.c"
+        user.nickname = "Betty"
+        self.assertEqual(user.email, "a@b.c")
+        self.assertEqual(user.nickname, "Betty")
+        self.assertEqual(list(user.__dict__),
+                         ["id", "created_at", "updated_at", "email",
+                          "nickname"])
+        del user.email
+        self.assertEqual(user.email, "")
+        del user.nickname
+        with self.assertRaises(AttributeError):
+            user.nickname
+
+    def test_to_dict_and_str(self):
+        """Checks that to_dict() and __str__ match those of the model"""
+        user = self.CompactUser()
+        user.first_name = "Betty"
+        user.age = 30
+        plain = User(**dict(user.to_dict(), __class__="User"))
+        self.assertEqual(user.to_dict(),
+                         dict(plain.to_dict(), __class__="CompactUser"))
+        self.assertEqual(str(user),
+                         str(plain).replace("[User]", "[CompactUser]"))
+        copy = self.CompactUser(**user.to_dict())
+        self.assertEqual(copy.to_dict(), user.to_dict())
+
+    def test_no_instance_dictionary(self):
+        """Checks that reading the attributes of a compact object does
+        not give it a dictionary, until one is set that is not a field"""
+        user = self.CompactUser()
+        user.email = "a@b.c"
+
+        def dictionaries():
+            """Returns the dictionaries user refers to"""
+            return [r for r in gc.get_referents(user) if type(r) is dict]
+
+        user.to_dict()
+        str(user)
+        list(user.__dict__)
+        self.assertNotIn("nickname", user.__dict__)
+        self.assertEqual(dictionaries(), [])
+        user.nickname = "Betty"
+        self.assertEqual(dictionaries(), [{"nickname": "Betty"}])
+        self.assertEqual(user.to_dict()["nickname"], "Betty")
+
+    def test_save_and_reload(self):
+        """Checks that compact objects are saved, reloaded and
+        tracked like any other"""
+        user = self.CompactUser()
+        user.email = "a@b.c"
+        user.nickname = "Betty"
+        self.storage.save()
+        self.restart()
+        loaded = self.storage.get("CompactUser", user.id)
+        self.assertEqual(loaded.to_dict(), user.to_dict())
+        self.assertIs(type(loaded), self.CompactUser)
+        self.assertEqual(loaded.nickname, "Betty")
+        loaded.email = "d@e.f"
+        self.assertIn("CompactUser." + user.id, self.storage.dirty())
+        self.assertEqual(list(self.storage.lookup(self.CompactUser, "email",
+                                                  "d@e.f").values()),
+                         [loaded])
+
+    def test_update_coerces(self):
+        """Checks that the console converts values to the field type,
+        with Place itself made compact"""
+        CompactPlace = compact(Place)
+        self.assertIs(classes["Place"], CompactPlace)
+        place = CompactPlace()
+        self.storage.save()
+        self.restart()
+        with patch("sys.stdout", new=StringIO()), \
+                patch.object(HBNBCommand, "storage", self.storage):
+            HBNBCommand().onecmd('update Place {} number_rooms "3"'
+                                 .format(place.id))
+            HBNBCommand().onecmd('update Place {} color "red"'
+                                 .format(place.id))
+        place = self.storage.get("Place", place.id)
+        self.assertIs(type(place), CompactPlace)
+        self.assertEqual(place.number_rooms, 3)
+        self.assertEqual(place.color, "red")
+
+    def test_memory(self):
+        """Checks that compact objects take less memory"""
+        attrs = self.CompactUser().to_dict()
+        del attrs["__class__"]
+        attrs.update(first_name="Betty", last_name="Holberton",
+                     email="a@b.c", password="pwd")
+
+        def size(cls):
+            """Returns the memory taken by 1000 objects of cls"""
+            tracemalloc.start()
+            objs = []
+            for i in range(1000):
+                obj = cls.__new__(cls)
+                obj.__dict__.update(attrs)
+                objs.append(obj)
+            used = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return used
+
+        self.assertLess(size(self.CompactUser) * 1.5, size(User))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,256 @@
+#!/usr/bin/python3
+"""Test Suite every storage engine of models/engine/registry.py passes"""
+import json
+import os
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from models.engine import registry
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+from storage_case import StorageCase, TempDirCase
+
+
+class Conformance:
+    """Contains the test cases of the storage interface, run against
+    the engine registered under the name engine, mixed into a
+    StorageCase"""
+
+    engine = None
+    options = {}
+
+    def create(self):
+        """Returns the engine named engine, created with options"""
+        with patch.dict(os.environ, clear=True):
+            return registry.create(self.engine, **self.options)
+
+    def tearDown(self):
+        """Closes the engine when it holds a connection"""
+        if hasattr(self.storage, "close"):
+            self.storage.close()
+        super().tearDown()
+
+    def test_new_all_get_count(self):
+        """Checks that new objects can be listed, fetched and counted"""
+        user, state = User(), State()
+        self.assertEqual(self.storage.all()["User." + user.id], user)
+        self.assertEqual(list(self.storage.all(State)),
+                         ["State." + state.id])
+        self.assertIs(self.storage.get("User", user.id), user)
+        self.assertIsNone(self.storage.get(User, "missing"))
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.count(User), 1)
+
+    def test_save_and_reload(self):
+        """Checks that saved objects come back with their attributes"""
+        place = Place()
+        place.name = "Home"
+        place.number_rooms = 3
+        place.latitude = 12.5
+        place.amenity_ids = ["a", "b"]
+        place.save()
+        self.restart()
+        loaded = self.storage.get(Place, place.id)
+        self.assertIsNot(loaded, place)
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+        self.assertIsInstance(loaded.created_at, datetime)
+
+    def test_changes_and_deletions_are_saved(self):
+        """Checks that updates and deletions reach the store"""
+        kept, deleted = User(), User()
+        self.storage.save()
+        kept.first_name = "Betty"
+        self.storage.delete(deleted)
+        self.assertEqual(set(self.storage.dirty()),
+                         {"User." + kept.id, "User." + deleted.id})
+        self.storage.save()
+        self.assertEqual(self.storage.dirty(), {})
+        self.restart()
+        self.assertEqual(self.storage.get(User, kept.id).first_name,
+                         "Betty")
+        self.assertIsNone(self.storage.get(User, deleted.id))
+
+    def test_save_keeps_changes_made_in_place(self):
+        """Checks that save() writes a list changed in place"""
+        place = Place()
+        place.amenity_ids = []
+        place.save()
+        self.restart()
+        self.storage.get(Place, place.id).amenity_ids.append("a1")
+        self.storage.get(Place, place.id).save()
+        self.restart()
+        self.assertEqual(self.storage.get(Place, place.id).amenity_ids,
+                         ["a1"])
+
+    def test_refresh_without_changes(self):
+        """Checks that refresh() creates no file, such as the lock
+        file, when no other process wrote anything"""
+        files = sorted(os.listdir())
+        self.storage.refresh()
+        self.assertEqual(sorted(os.listdir()), files)
+        User().save()
+        files = sorted(os.listdir())
+        self.storage.refresh()
+        self.assertEqual(sorted(os.listdir()), files)
+
+    def test_queries(self):
+        """Checks the secondary indexes against saved objects"""
+        place = Place()
+        place.city_id = "c1"
+        place.number_rooms = 4
+        place.description = "quiet loft near the park"
+        review = Review()
+        review.text = "lovely park view"
+        self.storage.save()
+        self.restart()
+        self.assertEqual(list(self.storage.lookup(Place, "city_id", "c1")),
+                         ["Place." + place.id])
+        self.assertEqual(len(self.storage.between(Place, "number_rooms",
+                                                  3, 5)), 1)
+        self.assertEqual([obj.id for obj in self.storage.search(Review,
+                                                                "park")],
+                         [review.id])
+
+    def test_batch_rollback(self):
+        """Checks that a failed batch leaves the store as it was"""
+        user = User()
+        self.storage.save()
+        with self.assertRaises(ValueError):
+            with self.storage.batch():
+                user.first_name = "Betty"
+                State().save()
+                raise ValueError
+        self.assertNotIn("first_name", user.__dict__)
+        self.assertEqual(self.storage.count(State), 0)
+
+    def test_snapshot(self):
+        """Checks that a snapshot keeps its point-in-time view"""
+        user = User()
+        with self.storage.snapshot() as snapshot:
+            self.storage.delete(user)
+            User()
+            self.assertEqual(list(snapshot.all()), ["User." + user.id])
+
+    def test_flush_policy(self):
+        """Checks that grouped saves are all written"""
+        with patch("atexit.register"):
+            self.storage.set_flush_policy("count:2")
+            first = User()
+            self.storage.save()
+            second = User()
+            self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.count(User), 2)
+        self.assertIsNotNone(self.storage.get(User, first.id))
+        self.assertIsNotNone(self.storage.get(User, second.id))
+
+
+class TestFileConformance(Conformance, StorageCase):
+    """Runs the conformance tests against the JSON file engine"""
+
+    engine = "file"
+
+
+class TestBinaryConformance(Conformance, StorageCase):
+    """Runs the conformance tests against binary snapshots"""
+
+    engine = "file"
+    options = {"format": "binary"}
+
+
+class TestWALConformance(Conformance, StorageCase):
+    """Runs the conformance tests against the write-ahead log engine"""
+
+    engine = "wal"
+
+
+class TestShardConformance(Conformance, StorageCase):
+    """Runs the conformance tests against the sharded engine"""
+
+    engine = "shard"
+
+
+class TestSQLiteConformance(Conformance, StorageCase):
+    """Runs the conformance tests against the SQLite engine"""
+
+    engine = "sqlite"
+
+
+class TestMemoryConformance(Conformance, StorageCase):
+    """Runs the conformance tests against the in-memory engine, whose
+    objects outlive a restart through dump() and restore()"""
+
+    engine = "memory"
+
+    def restart(self):
+        """Dumps the objects, forgets them and restores them"""
+        self.storage.dump()
+        super().restart()
+        self.storage.restore()
+
+
+class TestCachedConformance(Conformance, StorageCase):
+    """Runs the conformance tests against the cached engine, holding
+    one object in memory at most"""
+
+    engine = "cached"
+    options = {"cache_size": 1}
+
+
+class TestRegistry(TempDirCase):
+    """Contains test cases against the engine registry"""
+
+    def test_engines(self):
+        """Checks that every name resolves to a FileStorage subclass"""
+        for name in ("file", "wal", "shard", "sqlite", "memory",
+                     "cached"):
+            self.assertTrue(issubclass(registry.engine(name), FileStorage))
+        with self.assertRaises(ValueError):
+            registry.engine("db")
+
+    def test_register(self):
+        """Checks that other engines can be registered"""
+        with patch.dict(registry.ENGINES):
+            registry.register("custom", "models.engine.wal_storage."
+                                        "WALStorage")
+            self.assertEqual(registry.engine("custom").__name__,
+                             "WALStorage")
+        self.assertNotIn("custom", registry.ENGINES)
+
+    def test_settings(self):
+        """Checks that the environment overrides the config file"""
+        with open("storage.json", mode="w") as f:
+            json.dump({"engine": "wal", "path": "data.json",
+                       "flush": "count:5"}, f)
+        environ = {"HBNB_STORAGE_CONFIG": "storage.json",
+                   "HBNB_TYPE_STORAGE": "sqlite",
+                   "HBNB_STORAGE_FORMAT": ""}
+        self.assertEqual(registry.settings(environ),
+                         {"engine": "sqlite", "path": "data.json",
+                          "flush": "count:5"})
+        self.assertEqual(registry.settings({}), {})
+
+    def test_create_with_path(self):
+        """Checks that the path option moves the storage file"""
+        with patch.multiple(FileStorage,
+                            _FileStorage__file_path="file.json",
+                            _FileStorage__text_dir="file.json.text",
+                            _FileStorage__columns_dir="file.json.columns"), \
+                patch.dict(os.environ, {"HBNB_STORAGE_PATH": "data.json"}):
+            storage = registry.create()
+            self.assertIs(type(storage), FileStorage)
+            storage.save()
+            self.assertTrue(os.path.exists("data.json"))
+            self.assertFalse(os.path.exists("file.json"))
+        with self.assertRaises(ValueError):
+            storage.configure(format="xml")
+        with self.assertRaises(TypeError):
+            storage.configure(size=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,6 +19,7 @@ from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
 from models.engine.file_storage import FileStorage
+from storage_case import setUpModule, tearDownModule
 
 
 class TestConsole(unittest.TestCase):
@@ -52,7 +53,7 @@ class TestConsole(unittest.TestCase):
     def test_pep8_console(self):
         """Pep8 console.py"""
         style = pep8.StyleGuide(quiet=True)
-        p = style.check_files(["console.py"])
+        p = style.check_files([console.__file__])
         self.assertEqual(p.total_errors, 0, 'fix Pep8')
 
     def test_docstrings(self):
@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+"""Test Suite for processes sharing storage (models/engine/file_lock.py)"""
+import os
+import subprocess
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+from models.engine import file_lock
+from models.engine.file_lock import FileLock
+from models.engine.file_storage import FileStorage
+from models.engine.wal_storage import WALStorage
+from models.user import User
+from storage_case import StorageCase, TempDirCase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(code, engine="file"):
+    """Runs code in another process using the storage of the cwd"""
+    env = dict(os.environ, PYTHONPATH=ROOT, HBNB_TYPE_STORAGE=engine)
+    subprocess.run([sys.executable, "-c", "import models\n" + code],
+                   env=env, check=True)
+
+
+class TestFileLock(TempDirCase):
+    """Contains test cases against the FileLock class"""
+
+    @unittest.skipIf(file_lock.fcntl is None, "no fcntl")
+    def test_excludes_other_processes(self):
+        """Checks that another process cannot take a held lock"""
+        code = ("import fcntl\n"
+                "f = open('data.lock', mode='a')\n"
+                "try:\n"
+                "    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)\n"
+                "except OSError:\n"
+                "    raise SystemExit(1)\n")
+        lock = FileLock("data.lock")
+        with lock:
+            with lock:
+                pass
+            with self.assertRaises(subprocess.CalledProcessError):
+                run(code)
+        run(code)
+
+    def test_excludes_other_threads(self):
+        """Checks that the lock is reentrant for its holder only"""
+        lock = FileLock("data.lock")
+        events = []
+
+        def take():
+            """Takes the lock"""
+            with lock:
+                events.append("thread")
+
+        with lock:
+            with lock:
+                thread = threading.Thread(target=take)
+                thread.start()
+                thread.join(0.05)
+            events.append("main")
+        thread.join(5)
+        self.assertEqual(events, ["main", "thread"])
+
+
+class TestSharedStorage(StorageCase):
+    """Contains test cases against storage shared by processes"""
+
+    def test_save_merges_other_writes(self):
+        """Checks that a save keeps what another process saved"""
+        user = User()
+        self.storage.save()
+        run("from models.user import User\n"
+            "user = models.storage.get(User, {!r})\n"
+            "user.last_name = 'Holberton'\n"
+            "other = User()\n"
+            "other.first_name = 'Other'\n"
+            "models.storage.save()\n".format(user.id))
+        user.first_name = "Betty"
+        self.storage.save()
+        self.assertEqual(self.storage.dirty(), {})
+        self.assertEqual(user.first_name, "Betty")
+        self.assertEqual(user.last_name, "Holberton")
+        self.assertEqual(len(self.storage.lookup(User, "first_name",
+                                                 "Other")), 1)
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        user = self.storage.get(User, user.id)
+        self.assertEqual((user.first_name, user.last_name),
+                         ("Betty", "Holberton"))
+        self.assertEqual(self.storage.count(User), 2)
+
+    def test_reload_without_file(self):
+        """Checks that reloading a missing file leaves no lock file"""
+        self.storage.reload()
+        self.assertEqual(os.listdir(), [])
+        User().save()
+        self.assertIn("file.json.lock", os.listdir())
+
+    def test_refresh(self):
+        """Checks that refresh() merges deletions and keeps changes"""
+        kept, deleted = User(), User()
+        self.storage.save()
+        run("from models.user import User\n"
+            "for user in list(models.storage.all(User).values()):\n"
+            "    user.first_name = 'Other'\n"
+            "models.storage.delete(models.storage.get(User, {!r}))\n"
+            "models.storage.save()\n".format(deleted.id))
+        kept.first_name = "Betty"
+        self.storage.refresh()
+        self.assertIsNone(self.storage.get(User, deleted.id))
+        self.assertEqual(kept.first_name, "Betty")
+        self.assertEqual(self.storage.dirty(),
+                         {"User." + kept.id: {"first_name"}})
+        with patch("models.engine.json_stream.read") as read, \
+                patch("models.engine.safe_file.checksum") as checksum:
+            self.storage.refresh()
+        read.assert_not_called()
+        checksum.assert_not_called()
+
+    def test_wal_merges_appended_records(self):
+        """Checks that the records of other processes are replayed"""
+        self.patcher.stop()
+        self.storage = WALStorage()
+        self.storage.reload()
+        self.patcher = patch("models.storage", self.storage)
+        self.patcher.start()
+        user = User()
+        self.storage.save()
+        run("from models.user import User\n"
+            "models.storage.get(User, {!r}).last_name = 'Holberton'\n"
+            "User()\n"
+            "models.storage.save()\n".format(user.id), "wal")
+        user.first_name = "Betty"
+        self.storage.save()
+        self.assertEqual(self.storage.count(User), 2)
+        self.assertEqual(user.last_name, "Holberton")
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        user = self.storage.get(User, user.id)
+        self.assertEqual((user.first_name, user.last_name),
+                         ("Betty", "Holberton"))
+
+
+if __name__ == "__main__":
+    unittest.main()
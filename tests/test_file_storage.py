@@ -1,9 +1,16 @@
 #!/usr/bin/python3
 """Test Suite for FileStorage in models/file_storage.py"""
+from datetime import datetime
+import json
 import os.path
+import shutil
+import threading
 import unittest
+from io import StringIO
+from unittest.mock import patch
 
 import models
+from console import HBNBCommand
 from models import base_model
 from models.engine.file_storage import FileStorage
 from models.base_model import BaseModel
@@ -13,6 +20,7 @@ from models.amenity import Amenity
 from models.city import City
 from models.review import Review
 from models.place import Place
+from storage_case import StorageCase, setUpModule, tearDownModule
 
 
 class TestFileStorageInit(unittest.TestCase):
@@ -71,10 +79,32 @@ class TestStorageMethods(unittest.TestCase):
     def test_all_method(self):
         """Tests all() method of the FileStorage class"""
         self.assertTrue(type(models.storage.all()) is dict)
+        self.assertIs(models.storage.all(None), models.storage.all())
 
-        # What if arg is passed? Ohh! TypeError, do your job!
+        # What if two args are passed? Ohh! TypeError, do your job!
         with self.assertRaises(TypeError):
-            models.storage.all(None)
+            models.storage.all(None, None)
+
+    def test_all_with_class(self):
+        """Tests all() filtered by a class or a class name"""
+        dummy_user = User()
+        dummy_state = State()
+        users = models.storage.all(User)
+        self.assertEqual(users, models.storage.all("User"))
+        self.assertIn("User." + dummy_user.id, users)
+        self.assertNotIn("State." + dummy_state.id, users)
+
+    def test_get_and_count(self):
+        """Tests get() and count()"""
+        users = models.storage.count("User")
+        total = models.storage.count()
+        dummy_user = User()
+        State()
+        self.assertIs(models.storage.get(User, dummy_user.id), dummy_user)
+        self.assertIs(models.storage.get("User", dummy_user.id), dummy_user)
+        self.assertIsNone(models.storage.get("State", dummy_user.id))
+        self.assertEqual(models.storage.count("User"), users + 1)
+        self.assertEqual(models.storage.count(), total + 2)
 
     def test_new_method(self):
         """Tests the new() method of the FileStorage class"""
@@ -168,5 +198,470 @@ class TestStorageMethods(unittest.TestCase):
             models.storage.reload(None)
 
 
+class TestClassIndex(StorageCase):
+    """Contains test cases against the per-class index of FileStorage"""
+
+    def test_counts_follow_new_and_delete(self):
+        """Checks that counts are kept up to date"""
+        users = [User() for _ in range(3)]
+        State()
+        self.assertEqual(models.storage.count(User), 3)
+        self.assertEqual(models.storage.count("State"), 1)
+        self.assertEqual(models.storage.count("City"), 0)
+        models.storage.delete(users[0])
+        self.assertEqual(models.storage.count(User), 2)
+        self.assertEqual(models.storage.count(), 3)
+
+    def test_all_with_class_returns_a_copy(self):
+        """Checks that changing all(cls) leaves the storage alone"""
+        user = User()
+        models.storage.all(User).clear()
+        self.assertIs(models.storage.get(User, user.id), user)
+
+    def test_index_rebuilt_when_objects_replaced(self):
+        """Checks that the index follows a replaced __objects"""
+        User()
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual(models.storage.count(User), 0)
+        self.assertEqual(models.storage.all(User), {})
+        user = User()
+        self.assertEqual(models.storage.all(User), {"User." + user.id: user})
+
+
+class TestLookup(StorageCase):
+    """Contains test cases against the foreign-key lookups"""
+
+    def test_lookup_by_foreign_key(self):
+        """Checks that lookup() returns the matching objects only"""
+        nairobi = City()
+        nairobi.state_id = "ke"
+        mombasa = City()
+        mombasa.state_id = "ke"
+        kampala = City()
+        kampala.state_id = "ug"
+        found = models.storage.lookup(City, "state_id", "ke")
+        self.assertEqual(sorted(found), sorted(["City." + nairobi.id,
+                                                "City." + mombasa.id]))
+        self.assertEqual(models.storage.lookup("City", "state_id", "tz"), {})
+
+    def test_lookup_follows_updates(self):
+        """Checks that the index follows new, setattr and delete"""
+        review = Review()
+        review.place_id = "p1"
+        self.assertIn("Review." + review.id,
+                      models.storage.lookup(Review, "place_id", "p1"))
+        review.place_id = "p2"
+        self.assertEqual(models.storage.lookup(Review, "place_id", "p1"), {})
+        self.assertIn("Review." + review.id,
+                      models.storage.lookup(Review, "place_id", "p2"))
+        other = Review()
+        other.place_id = "p2"
+        self.assertEqual(len(models.storage.lookup(Review, "place_id", "p2")),
+                         2)
+        models.storage.delete(review)
+        self.assertEqual(list(models.storage.lookup(Review, "place_id", "p2")),
+                         ["Review." + other.id])
+
+    def test_lookup_after_reload(self):
+        """Checks that reloaded objects are indexed"""
+        place = Place()
+        place.city_id = "c1"
+        models.storage.lookup(Place, "city_id", "c1")
+        with patch.object(FileStorage, "_FileStorage__file_path",
+                          "test_lookup.json"):
+            models.storage.save()
+            FileStorage._FileStorage__objects = {}
+            models.storage.reload()
+        found = models.storage.lookup(Place, "city_id", "c1")
+        self.assertEqual(list(found), ["Place." + place.id])
+
+    def test_lookup_without_index(self):
+        """Checks that attributes without an index are scanned"""
+        user = User()
+        user.email = "betty@mail.com"
+        User()
+        found = models.storage.lookup(User, "email", "betty@mail.com")
+        self.assertEqual(found, {"User." + user.id: user})
+
+
+class TestBetween(StorageCase):
+    """Contains test cases against the numeric range queries"""
+
+    def setUp(self):
+        """Starts every test with five places"""
+        super().setUp()
+        self.places = []
+        for price in (120, 40, 80, 200, 80):
+            place = Place()
+            place.price_by_night = price
+            self.places.append(place)
+
+    def prices(self, places):
+        """Returns the prices of places"""
+        return [place.price_by_night for place in places]
+
+    def test_between_bounds(self):
+        """Checks the objects returned between two bounds"""
+        found = models.storage.between(Place, "price_by_night", 50, 120)
+        self.assertEqual(self.prices(found), [80, 80, 120])
+        found = models.storage.between(Place, "price_by_night", high=80)
+        self.assertEqual(self.prices(found), [40, 80, 80])
+        found = models.storage.between(Place, "price_by_night", low=121)
+        self.assertEqual(self.prices(found), [200])
+
+    def test_between_limit_and_reverse(self):
+        """Checks cheapest-N and most expensive-N queries"""
+        found = models.storage.between(Place, "price_by_night", limit=2)
+        self.assertEqual(self.prices(found), [40, 80])
+        found = models.storage.between(Place, "price_by_night", limit=2,
+                                       reverse=True)
+        self.assertEqual(self.prices(found), [200, 120])
+
+    def test_between_follows_updates(self):
+        """Checks that the index follows setattr and delete"""
+        models.storage.between(Place, "price_by_night")
+        self.places[3].price_by_night = 10
+        models.storage.delete(self.places[0])
+        found = models.storage.between(Place, "price_by_night")
+        self.assertEqual(self.prices(found), [10, 40, 80, 80])
+
+    def test_between_after_console_update(self):
+        """Checks that values coerced by do_update are indexed"""
+        models.storage.between(Place, "price_by_night")
+        with patch("sys.stdout", new=StringIO()):
+            HBNBCommand().onecmd("update Place {} price_by_night 60"
+                                 .format(self.places[3].id))
+        self.assertEqual(self.places[3].price_by_night, 60)
+        found = models.storage.between(Place, "price_by_night", 50, 70)
+        self.assertEqual(found, [self.places[3]])
+
+    def test_between_without_index(self):
+        """Checks that attributes without an index are sorted too"""
+        self.places[0].latitude = 1.5
+        self.places[1].latitude = -3.0
+        found = models.storage.between(Place, "latitude", 0.5, 2)
+        self.assertEqual(found, [self.places[0]])
+
+
+class TestGeoQueries(StorageCase):
+    """Contains test cases against the geospatial queries"""
+
+    def setUp(self):
+        """Starts every test with three places"""
+        super().setUp()
+        self.places = {}
+        for name, lat, lon in (("nairobi", -1.2864, 36.8172),
+                               ("thika", -1.0333, 37.0693),
+                               ("mombasa", -4.0435, 39.6682)):
+            self.places[name] = Place()
+            self.places[name].latitude = lat
+            self.places[name].longitude = lon
+
+    def test_near_and_nearest(self):
+        """Checks radius and nearest-neighbour queries"""
+        self.assertEqual(models.storage.near(Place, -1.29, 36.82, 50),
+                         [self.places["nairobi"], self.places["thika"]])
+        self.assertEqual(models.storage.nearest(Place, -4, 39.6),
+                         [self.places["mombasa"]])
+
+    def test_within_follows_updates(self):
+        """Checks that a moved place is found at its new position"""
+        self.assertEqual(models.storage.within(Place, -5, 39, -3, 40),
+                         [self.places["mombasa"]])
+        self.places["thika"].latitude = -3.5
+        self.places["thika"].longitude = 39.5
+        self.assertEqual(len(models.storage.within(Place, -5, 39, -3, 40)), 2)
+        models.storage.delete(self.places["mombasa"])
+        self.assertEqual(models.storage.within(Place, -5, 39, -3, 40),
+                         [self.places["thika"]])
+
+
+class TestSearch(StorageCase):
+    """Contains test cases against the full-text search"""
+
+    def setUp(self):
+        """Starts every test with two places and a review"""
+        super().setUp()
+        self.loft = Place()
+        self.loft.name = "Cozy loft"
+        self.loft.description = "A quiet loft in town"
+        self.house = Place()
+        self.house.name = "Beach house"
+        self.review = Review()
+        self.review.text = "The loft was lovely"
+
+    def test_search(self):
+        """Checks that search() ranks the objects of one class"""
+        self.assertEqual(models.storage.search(Place, "loft"), [self.loft])
+        self.assertEqual(models.storage.search("Review", "loft"),
+                         [self.review])
+        self.assertEqual(models.storage.search(User, "loft"), [])
+        self.house.description = "Loft by the sea"
+        self.assertEqual(models.storage.search(Place, "loft sea")[0],
+                         self.house)
+
+    def test_search_command(self):
+        """Checks the search command of the console"""
+        with patch("sys.stdout", new=StringIO()) as f:
+            HBNBCommand().onecmd("search Place cozy")
+        self.assertEqual(f.getvalue(), "{}\n".format([str(self.loft)]))
+        with patch("sys.stdout", new=StringIO()) as f:
+            HBNBCommand().onecmd('Place.search("beach house")')
+        self.assertEqual(f.getvalue(), "{}\n".format([str(self.house)]))
+        with patch("sys.stdout", new=StringIO()) as f:
+            HBNBCommand().onecmd("search Place")
+        self.assertEqual(f.getvalue(), "** search words missing **\n")
+
+    def test_index_is_saved_and_reused(self):
+        """Checks that reload() restores the index instead of
+        tokenizing every object again"""
+        models.storage.search(Place, "loft")
+        models.storage.save()
+        self.assertTrue(os.path.exists("file.json.text"))
+        FileStorage._FileStorage__objects = {}
+        with patch("models.engine.indexes.tokenize",
+                   side_effect=AssertionError):
+            models.storage.reload()
+        found = models.storage.search(Place, "loft")
+        self.assertEqual([place.id for place in found], [self.loft.id])
+
+    def test_only_changed_indexes_are_saved(self):
+        """Checks that a save only writes the indexes of the classes
+        that changed, and that the others are still reused"""
+        models.storage.search(Place, "loft")
+        models.storage.search(Review, "loft")
+        models.storage.save()
+        self.assertEqual([name for name in sorted(os.listdir(
+                              "file.json.text")) if name.endswith(".json")],
+                         ["Place.json", "Review.json", "manifest.json"])
+        place = os.stat("file.json.text/Place.json").st_ino
+        User()
+        with patch("models.engine.indexes.TextIndex.state",
+                   side_effect=AssertionError):
+            models.storage.save()
+        self.review.text = "A lovely house"
+        models.storage.save()
+        self.assertEqual(os.stat("file.json.text/Place.json").st_ino, place)
+        self.restart()
+        with patch("models.engine.indexes.TextIndex.add",
+                   side_effect=AssertionError):
+            self.assertEqual(models.storage.search(Place, "beach"),
+                             [models.storage.get(Place, self.house.id)])
+        found = models.storage.search(Review, "house")
+        self.assertEqual([review.id for review in found], [self.review.id])
+
+    def test_stale_index_is_ignored(self):
+        """Checks that an index saved for another file is rebuilt"""
+        models.storage.search(Place, "loft")
+        models.storage.save()
+        self.house.name = "Loft house"
+        with patch.object(FileStorage, "_FileStorage__text_dir", "x"):
+            models.storage.save()
+            shutil.rmtree("x")
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        found = models.storage.search(Place, "house")
+        self.assertEqual([place.id for place in found], [self.house.id])
+
+    def test_built_index_is_saved_once_changed(self):
+        """Checks that an index built from the objects is only saved,
+        and listed as saved, once its class changes"""
+        models.storage.save()
+        self.restart()
+        models.storage.search(Place, "loft")
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json.text"))
+        models.storage.get(Place, self.house.id).name = "Loft house"
+        models.storage.save()
+        with open("file.json.text/manifest.json") as f:
+            self.assertEqual(json.load(f)["classes"], ["Place"])
+        self.restart()
+        with patch("models.engine.indexes.TextIndex.add",
+                   side_effect=AssertionError):
+            found = models.storage.search(Place, "house")
+        self.assertEqual([place.id for place in found], [self.house.id])
+
+    def test_index_is_serialized_without_the_lock(self):
+        """Checks that objects can change while an index is dumped"""
+        models.storage.search(Place, "loft")
+        dumps = json.dumps
+        changed = []
+
+        def dump(obj, *args, **kwargs):
+            """Changes a place from another thread on dumping an index"""
+            if isinstance(obj, dict) and "postings" in obj:
+                thread = threading.Thread(target=setattr, args=(
+                    self.loft, "name", "Loft"))
+                thread.start()
+                thread.join(5)
+                changed.append(not thread.is_alive())
+            return dumps(obj, *args, **kwargs)
+
+        with patch("models.engine.file_storage.json.dumps", dump):
+            models.storage.save()
+        self.assertEqual(changed, [True])
+
+
+class TestDirtyTracking(StorageCase):
+    """Contains test cases against the tracking of changed objects"""
+
+    def test_new_object_is_dirty(self):
+        """Checks that a new object is dirty as a whole"""
+        user = User()
+        self.assertIsNone(models.storage.dirty()["User." + user.id])
+
+    def test_save_clears_dirty(self):
+        """Checks that save() flushes the dirty set"""
+        User()
+        models.storage.save()
+        self.assertEqual(models.storage.dirty(), {})
+
+    def test_setattr_marks_attribute(self):
+        """Checks that setting an attribute records its name"""
+        user = User()
+        models.storage.save()
+        user.first_name = "Betty"
+        self.assertEqual(models.storage.dirty()["User." + user.id],
+                         {"first_name"})
+
+    def test_unstored_object_is_not_tracked(self):
+        """Checks that objects outside storage are ignored"""
+        user = User(id="1234", created_at=datetime.now().isoformat())
+        user.first_name = "Betty"
+        self.assertNotIn("User.1234", models.storage.dirty())
+
+    def test_delete_marks_dirty(self):
+        """Checks that delete() records the deleted object"""
+        user = User()
+        models.storage.save()
+        models.storage.delete(user)
+        self.assertIn("User." + user.id, models.storage.dirty())
+        self.assertNotIn("User." + user.id, models.storage.all())
+
+    def test_save_reencodes_dirty_objects_only(self):
+        """Checks that a save writes the new value of a changed object"""
+        user = User()
+        place = Place()
+        models.storage.save()
+        with patch.object(Place, "to_dict") as to_dict:
+            user.first_name = "Betty"
+            models.storage.save()
+            to_dict.assert_not_called()
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual(saved["User." + user.id]["first_name"], "Betty")
+        self.assertIn("Place." + place.id, saved)
+
+
+class TestBatch(StorageCase):
+    """Contains test cases against storage.batch()"""
+
+    def test_saves_are_written_once(self):
+        """Checks that the saves of a batch share one write"""
+        with patch.object(FileStorage, "write") as write:
+            with models.storage.batch():
+                for _ in range(10):
+                    User().save()
+                self.assertEqual(write.call_count, 0)
+        write.assert_called_once_with()
+
+    def test_batch_without_save(self):
+        """Checks that the changes of a batch are written at its end"""
+        with models.storage.batch():
+            user = User()
+        with open("file.json") as f:
+            self.assertIn("User." + user.id, json.load(f))
+
+    def test_rollback(self):
+        """Checks that an exception undoes the changes of the batch"""
+        kept = User()
+        kept.first_name = "Betty"
+        gone = City()
+        gone.state_id = "s1"
+        models.storage.save()
+        with self.assertRaises(KeyError):
+            with models.storage.batch():
+                created = Place()
+                kept.first_name = "Holberton"
+                kept.last_name = "School"
+                models.storage.delete(gone)
+                kept.save()
+                raise KeyError("failure")
+        self.assertEqual(kept.first_name, "Betty")
+        self.assertNotIn("last_name", kept.__dict__)
+        self.assertIs(models.storage.get(City, gone.id), gone)
+        self.assertIsNone(models.storage.get(Place, created.id))
+        self.assertEqual(models.storage.lookup(City, "state_id", "s1"),
+                         {"City." + gone.id: gone})
+        with open("file.json") as f:
+            saved = json.load(f)
+        self.assertNotIn("last_name", saved["User." + kept.id])
+
+    def test_batches_of_other_threads(self):
+        """Checks that the batch of a thread neither holds back nor
+        rolls back the changes of the other threads"""
+        user = User()
+        models.storage.save()
+        entered, changed = threading.Event(), threading.Event()
+
+        def change():
+            """Changes user and saves while the batch is open"""
+            entered.wait()
+            user.first_name = "Betty"
+            user.save()
+            changed.set()
+
+        thread = threading.Thread(target=change)
+        thread.start()
+        with self.assertRaises(ValueError):
+            with models.storage.batch():
+                State()
+                entered.set()
+                changed.wait()
+                with open("file.json") as f:
+                    saved = json.load(f)
+                self.assertEqual(saved["User." + user.id]["first_name"],
+                                 "Betty")
+                raise ValueError
+        thread.join()
+        self.assertEqual(user.first_name, "Betty")
+        self.assertEqual(models.storage.count(State), 0)
+
+    def test_nested_batches(self):
+        """Checks that inner batches join the outer one"""
+        user = User()
+        with patch.object(FileStorage, "write") as write:
+            with models.storage.batch():
+                user.first_name = "Betty"
+                try:
+                    with models.storage.batch():
+                        user.first_name = "Holberton"
+                        State().save()
+                        raise ValueError
+                except ValueError:
+                    pass
+                self.assertEqual(user.first_name, "Betty")
+                self.assertEqual(models.storage.count(State), 0)
+                with models.storage.batch():
+                    user.last_name = "School"
+                    user.save()
+                self.assertEqual(write.call_count, 0)
+        write.assert_called_once_with()
+        self.assertEqual(user.last_name, "School")
+
+    def test_outer_rollback_undoes_inner_batches(self):
+        """Checks that a failed outer batch undoes its inner batches"""
+        user = User()
+        user.first_name = "Betty"
+        with self.assertRaises(ValueError):
+            with models.storage.batch():
+                with models.storage.batch():
+                    user.first_name = "Holberton"
+                    review = Review()
+                raise ValueError
+        self.assertEqual(user.first_name, "Betty")
+        self.assertIsNone(models.storage.get(Review, review.id))
+
+
 if __name__ == "__main__":
     unittest.main()
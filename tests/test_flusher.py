@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+"""Test Suite for the flush policies in models/engine/flusher.py"""
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from models.engine import safe_file
+from models.engine.file_storage import FileStorage
+from models.engine.flusher import Flusher
+from models.user import User
+from storage_case import StorageCase
+
+
+class TestFlusher(unittest.TestCase):
+    """Contains test cases against the Flusher class"""
+
+    def setUp(self):
+        """Counts the writes of every flusher"""
+        self.writes = 0
+        self.atexit = patch("atexit.register")
+        self.atexit.start()
+
+    def tearDown(self):
+        """Stops patching atexit"""
+        self.atexit.stop()
+
+    def write(self):
+        """Counts one write"""
+        self.writes += 1
+
+    def test_policies(self):
+        """Checks the parsing of flush policies"""
+        self.assertEqual(Flusher(self.write).count, 1)
+        self.assertEqual(Flusher(self.write, "count:5").count, 5)
+        self.assertEqual(Flusher(self.write, "interval:250").interval,
+                         0.25)
+        for policy in ("", "never", "count", "count:0", "count:x",
+                       "interval:-1", "immediate:3"):
+            with self.assertRaises(ValueError):
+                Flusher(self.write, policy)
+
+    def test_immediate(self):
+        """Checks that every save writes with the default policy"""
+        flusher = Flusher(self.write)
+        flusher.request()
+        flusher.request()
+        self.assertEqual(self.writes, 2)
+
+    def test_count(self):
+        """Checks that every nth save writes the n of them"""
+        flusher = Flusher(self.write, "count:3")
+        for _ in range(7):
+            flusher.request()
+        self.assertEqual(self.writes, 2)
+        self.assertEqual(flusher.pending(), 1)
+        flusher.flush()
+        self.assertEqual(self.writes, 3)
+        flusher.flush()
+        self.assertEqual(self.writes, 3)
+
+    def test_interval(self):
+        """Checks that a burst of saves is written once, later"""
+        flusher = Flusher(self.write, "interval:50")
+        done = threading.Event()
+        for _ in range(100):
+            flusher.request()
+        flusher.on_flush(lambda error: done.set())
+        self.assertEqual(self.writes, 0)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(self.writes, 1)
+        flusher.request()
+        flusher.flush()
+        self.assertEqual(self.writes, 2)
+
+    def test_saves_during_write(self):
+        """Checks that saves made during a background write do not wait
+        for it, and are written by the next one"""
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            """Counts one write, once released"""
+            started.set()
+            self.assertTrue(release.wait(5))
+            self.write()
+
+        flusher = Flusher(slow, "interval:1")
+        flusher.request()
+        self.assertTrue(started.wait(5))
+        done = threading.Event()
+        thread = threading.Thread(target=lambda: (
+            flusher.request(), flusher.on_flush(lambda error: done.set())))
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(flusher.pending(), 1)
+        release.set()
+        self.assertTrue(done.wait(5))
+        self.assertEqual(self.writes, 2)
+
+    def test_on_flush(self):
+        """Checks that callbacks wait for the write of pending saves"""
+        flusher = Flusher(self.write, "count:2")
+        calls = []
+        flusher.on_flush(calls.append)
+        self.assertEqual(calls, [None])
+        flusher.request()
+        flusher.on_flush(calls.append)
+        self.assertEqual(calls, [None])
+        flusher.request()
+        self.assertEqual(calls, [None, None])
+
+    def test_failed_write(self):
+        """Checks that a failed write is raised and reported"""
+        error = OSError("disk full")
+
+        def fail():
+            """Fails to write"""
+            raise error
+
+        flusher = Flusher(fail, "count:2")
+        calls = []
+        flusher.request()
+        flusher.on_flush(calls.append)
+        with self.assertRaises(OSError):
+            flusher.request()
+        self.assertEqual(calls, [error])
+
+
+class TestStorageFlush(StorageCase):
+    """Contains test cases against the flush policy of FileStorage"""
+
+    def setUp(self):
+        """Keeps the flushers from registering with atexit"""
+        super().setUp()
+        self.atexit = patch("atexit.register")
+        self.atexit.start()
+
+    def tearDown(self):
+        """Lets flushers register with atexit again"""
+        self.atexit.stop()
+        super().tearDown()
+
+    def test_default_policy(self):
+        """Checks that saves are written at once by default"""
+        self.assertEqual(self.storage.flusher().policy, "immediate")
+        User().save()
+        self.assertTrue(os.path.exists("file.json"))
+
+    def test_count_policy(self):
+        """Checks that saves are grouped into one write"""
+        self.storage.set_flush_policy("count:3")
+        calls = []
+        with patch.object(FileStorage, "write") as write:
+            for _ in range(4):
+                User().save()
+                calls.append(write.call_count)
+        self.assertEqual(calls, [0, 0, 1, 1])
+
+    def test_flush(self):
+        """Checks that flush() writes what is pending"""
+        self.storage.set_flush_policy("interval:60000")
+        user = User()
+        user.save()
+        self.assertFalse(os.path.exists("file.json"))
+        self.storage.flush()
+        with open("file.json") as f:
+            self.assertIn("User." + user.id, f.read())
+        self.assertEqual(self.storage.dirty(), {})
+
+    def test_background_write(self):
+        """Checks that the background thread writes the changes"""
+        self.storage.set_flush_policy("interval:10")
+        done = threading.Event()
+        User().save()
+        self.storage.on_flush(lambda error: done.set())
+        self.assertTrue(done.wait(5))
+        self.assertTrue(os.path.exists("file.json"))
+
+    def test_changes_during_write_stay_dirty(self):
+        """Checks that a change made while writing is not lost"""
+        user = User()
+        self.storage.save()
+        write = safe_file.write
+        started = threading.Event()
+
+        def slow_write(*args):
+            """Writes, giving another thread the time to change user"""
+            started.set()
+            time.sleep(0.05)
+            write(*args)
+
+        self.storage.set_flush_policy("interval:1")
+        with patch("models.engine.safe_file.write", slow_write):
+            done = threading.Event()
+            user.first_name = "Betty"
+            self.storage.save()
+            self.storage.on_flush(lambda error: done.set())
+            self.assertTrue(started.wait(5))
+            user.last_name = "Holberton"
+            self.assertTrue(done.wait(5))
+        self.assertEqual(self.storage.dirty(), {"User." + user.id:
+                                                {"last_name"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
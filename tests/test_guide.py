@@ -10,6 +10,7 @@ from uuid import uuid4
 
 import models
 from models.base_model import BaseModel
+from storage_case import setUpModule, tearDownModule
 
 
 class TestBaseModel(unittest.TestCase):
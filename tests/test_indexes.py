@@ -0,0 +1,215 @@
+#!/usr/bin/python3
+"""Test Suite for the indexes in models/engine/indexes.py"""
+import json
+import random
+import unittest
+from unittest.mock import patch
+
+from models.engine.indexes import (GeoIndex, HashIndex, RangeIndex,
+                                   TextIndex, haversine, tokenize)
+
+
+class Thing:
+    """A plain object to index"""
+
+    def __init__(self, **kwargs):
+        """Sets kwargs as attributes"""
+        self.__dict__.update(kwargs)
+
+
+class TestHashIndex(unittest.TestCase):
+    """Contains test cases against HashIndex"""
+
+    def test_add_lookup_remove(self):
+        """Checks that keys move with their value"""
+        index = HashIndex("color")
+        red = Thing(color="red")
+        index.add("a", red)
+        index.add("b", Thing(color="blue"))
+        self.assertEqual(index.lookup("red"), {"a": red})
+        red.color = "blue"
+        index.add("a", red)
+        self.assertEqual(index.lookup("red"), {})
+        self.assertEqual(sorted(index.lookup("blue")), ["a", "b"])
+        index.remove("b")
+        index.remove("b")
+        self.assertEqual(list(index.lookup("blue")), ["a"])
+
+    def test_unhashable_values(self):
+        """Checks that unhashable values are left out"""
+        index = HashIndex("color")
+        index.add("a", Thing(color=["red"]))
+        self.assertEqual(index.lookup(["red"]), {})
+        index.remove("a")
+
+
+class TestRangeIndex(unittest.TestCase):
+    """Contains test cases against RangeIndex"""
+
+    def test_between(self):
+        """Checks range, limit and reverse queries"""
+        index = RangeIndex("n")
+        things = {str(n): Thing(n=n) for n in (5, 1, 3, 3, 9)}
+        for key, thing in things.items():
+            index.add(key, thing)
+        self.assertEqual([t.n for t in index.between()], [1, 3, 5, 9])
+        self.assertEqual([t.n for t in index.between(2, 5)], [3, 5])
+        self.assertEqual([t.n for t in index.between(limit=2)], [1, 3])
+        self.assertEqual([t.n for t in index.between(2, limit=2,
+                                                     reverse=True)],
+                         [9, 5])
+        self.assertEqual(index.between(6, 2), [])
+
+    def test_duplicates_and_remove(self):
+        """Checks that removing one of equal values keeps the others"""
+        index = RangeIndex("n")
+        first, second = Thing(n=2), Thing(n=2)
+        index.add("a", first)
+        index.add("b", second)
+        index.remove("a")
+        self.assertEqual(index.between(2, 2), [second])
+
+    @patch("models.engine.indexes.BUCKET_SIZE", 4)
+    def test_many_equal_values(self):
+        """Checks that objects sharing a value are kept in key order
+        and each removed on its own, across many buckets"""
+        index = RangeIndex("n")
+        things = {"k{:03}".format(i): Thing(n=0) for i in range(200)}
+        for key in sorted(things, reverse=True):
+            index.add(key, things[key])
+        for i in range(0, 200, 2):
+            things["k{:03}".format(i)].n = i
+            index.add("k{:03}".format(i), things["k{:03}".format(i)])
+        self.assertEqual(index.between(0, 0),
+                         [things["k{:03}".format(i)] for i in range(200)
+                          if i % 2 or i == 0])
+        self.assertEqual([t.n for t in index.between(1)],
+                         list(range(2, 200, 2)))
+        self.assertEqual([t.n for t in index.between(high=100, limit=3,
+                                                     reverse=True)],
+                         [100, 98, 96])
+        for i in range(200):
+            index.remove("k{:03}".format(i))
+        self.assertEqual(index.between(), [])
+
+    def test_non_numbers_are_left_out(self):
+        """Checks that strings, booleans and NaN are not indexed"""
+        index = RangeIndex("n")
+        index.add("a", Thing(n="12"))
+        index.add("b", Thing(n=True))
+        index.add("c", Thing(n=float("nan")))
+        index.add("d", Thing())
+        self.assertEqual(index.between(), [])
+
+
+class TestGeoIndex(unittest.TestCase):
+    """Contains test cases against GeoIndex"""
+
+    def setUp(self):
+        """Indexes random points, some around the antimeridian"""
+        rand = random.Random(12)
+        self.index = GeoIndex("lat", "lon", cell_size=1)
+        self.points = {}
+        for i in range(2000):
+            if i % 4:
+                lat, lon = rand.uniform(-90, 90), rand.uniform(-180, 180)
+            else:
+                lat = rand.uniform(-10, 10)
+                lon = rand.uniform(175, 185) % 360 - 180
+            self.points[str(i)] = Thing(lat=lat, lon=lon)
+            self.index.add(str(i), self.points[str(i)])
+
+    def test_haversine(self):
+        """Checks a known distance: Nairobi to Mombasa"""
+        self.assertAlmostEqual(haversine(-1.2864, 36.8172, -4.0435, 39.6682),
+                               440, delta=5)
+
+    def test_near_matches_a_scan(self):
+        """Checks near() against the distance to every point"""
+        for lat, lon, radius in ((0, 180, 500), (89, 10, 800),
+                                 (-30, -60, 3000), (0, 0, 30000)):
+            expected = sorted(
+                (haversine(lat, lon, t.lat, t.lon), t)
+                for t in self.points.values()
+                if haversine(lat, lon, t.lat, t.lon) <= radius)
+            self.assertEqual(self.index.near(lat, lon, radius),
+                             [t for d, t in expected])
+
+    def test_nearest_matches_a_scan(self):
+        """Checks nearest() against the distance to every point"""
+        by_distance = sorted(self.points.values(),
+                             key=lambda t: haversine(5, -179.5, t.lat, t.lon))
+        self.assertEqual(self.index.nearest(5, -179.5, 7), by_distance[:7])
+        self.assertEqual(len(self.index.nearest(0, 0, 5000)), 2000)
+
+    def test_within(self):
+        """Checks boxes, including one crossing the antimeridian"""
+        for south, west, north, east in ((-5, 170, 5, -170),
+                                         (-90, -180, 90, 180),
+                                         (10, 20, 40, 60)):
+            found = self.index.within(south, west, north, east)
+            expected = [t for t in self.points.values()
+                        if south <= t.lat <= north and
+                        (west <= t.lon <= east if west <= east
+                         else t.lon >= west or t.lon <= east)]
+            self.assertEqual(sorted(map(id, found)), sorted(map(id, expected)))
+
+    def test_invalid_coordinates_are_left_out(self):
+        """Checks that bad coordinates are not indexed"""
+        index = GeoIndex("lat", "lon")
+        index.add("a", Thing(lat="1", lon=2))
+        index.add("b", Thing(lat=91, lon=2))
+        index.add("c", Thing(lat=1, lon=float("inf")))
+        self.assertEqual(index.within(-90, -180, 90, 180), [])
+
+    def test_remove(self):
+        """Checks that a removed key is no longer found"""
+        self.index.remove("1")
+        self.assertNotIn(self.points["1"], self.index.nearest(
+            self.points["1"].lat, self.points["1"].lon, 1))
+
+
+class TestTextIndex(unittest.TestCase):
+    """Contains test cases against TextIndex"""
+
+    def setUp(self):
+        """Indexes a few documents"""
+        self.index = TextIndex("title", "body")
+        self.index.add("a", Thing(title="Cozy loft", body="Quiet and cozy"))
+        self.index.add("b", Thing(title="Beach house", body="Sea view"))
+        self.index.add("c", Thing(title="Loft",
+                                  body="Near the beach, the shops and town"))
+        self.index.add("d", Thing(title=None, body=12))
+
+    def test_tokenize(self):
+        """Checks that words are split and lowercased"""
+        self.assertEqual(tokenize("Cozy, LOFT-2!"), ["cozy", "loft", "2"])
+
+    def test_search_ranks_with_bm25(self):
+        """Checks the order of the results"""
+        self.assertEqual(self.index.search("cozy loft"), ["a", "c"])
+        self.assertEqual(self.index.search("beach"), ["b", "c"])
+        self.assertEqual(self.index.search("beach", k=1), ["b"])
+        self.assertEqual(self.index.search("castle"), [])
+
+    def test_add_replaces_and_remove(self):
+        """Checks that re-adding a key drops its old words"""
+        self.index.add("a", Thing(title="Castle", body=""))
+        self.assertEqual(self.index.search("cozy"), [])
+        self.assertEqual(self.index.search("castle"), ["a"])
+        self.index.remove("a")
+        self.assertEqual(self.index.search("castle"), [])
+        self.assertNotIn("a", self.index)
+
+    def test_state_and_restore(self):
+        """Checks that a restored index answers like the original"""
+        copy = TextIndex("title", "body")
+        copy.restore(json.loads(json.dumps(self.index.state())))
+        self.assertEqual(copy.search("cozy loft beach"),
+                         self.index.search("cozy loft beach"))
+        copy.remove("a")
+        self.assertEqual(copy.search("cozy"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+"""Test Suite for models/engine/json_stream.py"""
+import json
+import threading
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from models.engine import json_stream
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+from storage_case import StorageCase
+
+
+class TestRead(unittest.TestCase):
+    """Contains test cases against json_stream.read()"""
+
+    def pairs(self, text, size=4):
+        """Returns the list of pairs read from text, size at a time"""
+        return list(json_stream.read(StringIO(text), size))
+
+    def test_same_as_json_load(self):
+        """Checks that any chunk size gives what json.load gives"""
+        objdict = {"User.{}".format(i): {"id": str(i), "n": i * 1.5,
+                                         "name": "café \"{}\"".format(i),
+                                         "list": [i, None, True, {}]}
+                   for i in range(20)}
+        text = json.dumps(objdict, indent=2)
+        for size in (1, 3, 7, 64, 1 << 16):
+            self.assertEqual(self.pairs(text, size), list(objdict.items()))
+
+    def test_numbers_cut_by_chunks(self):
+        """Checks that a number split across chunks is read whole"""
+        self.assertEqual(self.pairs('{"a": 12345, "b": -6.5e10}', 2),
+                         [("a", 12345), ("b", -6.5e10)])
+
+    def test_empty_object(self):
+        """Checks that an empty object yields nothing"""
+        self.assertEqual(self.pairs(" { } "), [])
+
+    def test_invalid_json(self):
+        """Checks that malformed files raise like json.load does"""
+        for text in ("", "[]", '{"a": 1', '{"a" 1}', '{"a": 1 "b": 2}',
+                     "{1: 2}", '{"a": tru}'):
+            with self.assertRaises(json.JSONDecodeError):
+                self.pairs(text)
+
+    def test_pairs_are_yielded_as_parsed(self):
+        """Checks that the first pair comes before the rest is read"""
+        f = StringIO('{"a": {"id": "1"}, ' + " " * 1000 + '"b": 2}')
+        pairs = json_stream.read(f, 8)
+        self.assertEqual(next(pairs), ("a", {"id": "1"}))
+        self.assertLess(f.tell(), 100)
+
+    def test_member_offsets(self):
+        """Checks that each value is found where members() says"""
+        text = '{"a": {"id": "1"},\n  "b" :  12.5 , "c": [1, {}]}'
+        for size in (1, 3, 1 << 16):
+            members = list(json_stream.members(StringIO(text), size))
+            self.assertEqual([m[0] for m in members], ["a", "b", "c"])
+            for key, value, start, end in members:
+                self.assertEqual(json.loads(text[start:end]), value)
+
+    def test_texts_are_not_parsed(self):
+        """Checks that texts() gives the text of each value as it is in
+        the file, whatever it holds, without parsing it"""
+        values = [{"id": "1", "name": "a} \"b\" {c"}, {"a": {"b": [{}]}},
+                  {"ids": ["x", "y]"], "n": -1.5e3}, "s}", [1, "]"], 12, {}]
+        text = "{" + ", ".join('"k{}":  {}'.format(i, json.dumps(v))
+                               for i, v in enumerate(values)) + "}"
+        decode = json_stream.JSONStream.decoder.raw_decode
+        with patch.object(json_stream.JSONStream.decoder, "raw_decode",
+                          wraps=decode) as raw_decode:
+            for size in (1, 3, 1 << 16):
+                self.assertEqual(
+                    list(json_stream.texts(StringIO(text), size)),
+                    [("k{}".format(i), json.dumps(v))
+                     for i, v in enumerate(values)])
+        for call in raw_decode.call_args_list:
+            self.assertIn(call.args[0][call.args[1]], '"1')
+
+
+class TestWrite(unittest.TestCase):
+    """Contains test cases against json_stream.write()"""
+
+    def test_same_as_json_dumps(self):
+        """Checks that the output is the text json.dumps gives"""
+        objdict = {"User.1": {"id": "1", "name": "café"}, "City.2": {}}
+        f = StringIO()
+        json_stream.write(f, ((k, json.dumps(v)) for k, v in objdict.items()))
+        self.assertEqual(f.getvalue(), json.dumps(objdict))
+        self.assertEqual(list(json_stream.read(StringIO(f.getvalue()))),
+                         list(objdict.items()))
+
+    def test_empty_object(self):
+        """Checks that no pairs give an empty object"""
+        f = StringIO()
+        json_stream.write(f, iter(()))
+        self.assertEqual(f.getvalue(), "{}")
+
+    def test_pairs_are_written_as_produced(self):
+        """Checks that each pair is written before the next is asked"""
+        f = StringIO()
+
+        def pairs():
+            """Yields two pairs, checking what was written in between"""
+            yield "a", "1"
+            self.assertEqual(f.getvalue(), '{"a": 1')
+            yield "b", "2"
+
+        json_stream.write(f, pairs())
+        self.assertEqual(f.getvalue(), '{"a": 1, "b": 2}')
+
+
+class TestStreamingReload(StorageCase):
+    """Contains test cases against the streaming save() and reload()"""
+
+    def test_reload_does_not_parse_whole_file(self):
+        """Checks that reload() never calls json.load on the file"""
+        user = User()
+        user.first_name = "Betty"
+        place = Place()
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        with patch("json.load", wraps=json.load) as load:
+            self.storage.reload()
+        for call in load.call_args_list:
+            self.assertNotEqual(call.args[0].name, "file.json")
+        self.assertEqual(self.storage.get(User, user.id).to_dict(),
+                         user.to_dict())
+        self.assertEqual(self.storage.get(Place, place.id).to_dict(),
+                         place.to_dict())
+
+    def test_saved_file_format(self):
+        """Checks that save() writes the same text as json.dump would"""
+        user = User()
+        place = Place()
+        self.storage.save()
+        with open("file.json") as f:
+            self.assertEqual(f.read(), json.dumps(
+                {"User." + user.id: user.to_dict(),
+                 "Place." + place.id: place.to_dict()}))
+
+    def test_records_are_encoded_while_writing(self):
+        """Checks that save() encodes the changed objects as it writes
+        them, without holding the lock, as they were when it started"""
+        first, second = User(), User()
+        first.first_name = second.first_name = "Betty"
+        to_dict = User.to_dict
+        changed = []
+
+        def encode(obj):
+            """Changes second from another thread on the first call"""
+            if not changed:
+                thread = threading.Thread(target=setattr, args=(
+                    second, "first_name", "Holberton"))
+                thread.start()
+                thread.join(5)
+                changed.append(not thread.is_alive())
+            return to_dict(obj)
+
+        with patch.object(User, "to_dict", encode):
+            self.storage.save()
+        self.assertEqual(changed, [True])
+        with open("file.json") as f:
+            saved = json.load(f)
+        self.assertEqual(saved["User." + second.id]["first_name"], "Betty")
+        self.assertEqual(self.storage.dirty(),
+                         {"User." + second.id: {"first_name"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
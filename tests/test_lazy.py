@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+"""Test Suite for the stand-ins of models/engine/lazy.py"""
+import os
+import unittest
+from datetime import datetime
+from io import StringIO
+from unittest.mock import patch
+
+from console import HBNBCommand
+from models.base_model import classes
+from models.engine.lazy import Lazy, lazy, materialize
+from models.place import Place
+from models.user import User
+from storage_case import StorageCase
+
+
+class TestLazy(StorageCase):
+    """Contains test cases against the stand-ins reload() loads"""
+
+    def test_stand_in(self):
+        """Checks that a stand-in parses its record on first access"""
+        obj = lazy(User, '{"id": "1", "__class__": "User", "email": "a",'
+                         ' "created_at": "2020-01-02T03:04:05"}')
+        self.assertIsInstance(obj, User)
+        self.assertIsInstance(obj, Lazy)
+        self.assertEqual(obj.__class__.__name__, "User")
+        self.assertEqual(obj.email, "a")
+        self.assertIs(type(obj), User)
+        self.assertEqual(obj.created_at, datetime(2020, 1, 2, 3, 4, 5))
+        self.assertNotIn("__class__", obj.__dict__)
+        materialize(obj)
+        self.assertEqual(obj.id, "1")
+        self.assertIs(classes["User"], User)
+
+    def test_reload_is_lazy(self):
+        """Checks that reloaded objects are parsed when used only"""
+        user = User()
+        user.first_name = "Betty"
+        self.storage.save()
+        self.restart()
+        loaded = self.storage.all()["User." + user.id]
+        self.assertIsNot(type(loaded), User)
+        self.assertEqual(loaded.to_dict(), user.to_dict())
+        self.assertIs(type(loaded), User)
+
+    def test_update_command_coerces(self):
+        """Checks that the console converts values to the type of the
+        class attribute on a reloaded object"""
+        place = Place()
+        self.storage.save()
+        self.restart()
+        with patch("sys.stdout", new=StringIO()), \
+                patch.object(HBNBCommand, "storage", self.storage):
+            HBNBCommand().onecmd("update Place {} price_by_night 120"
+                                 .format(place.id))
+        self.assertEqual(self.storage.get(Place, place.id).price_by_night,
+                         120)
+        self.assertEqual([p.id for p in self.storage.between(
+            Place, "price_by_night", 100, 130)], [place.id])
+
+    def test_untouched_objects_are_not_encoded(self):
+        """Checks that save() writes unchanged records as they were"""
+        kept, changed = User(), User()
+        self.storage.save()
+        with open("file.json") as f:
+            before = f.read()
+        self.restart()
+        changed = self.storage.get(User, changed.id)
+        changed.first_name = "Betty"
+        with patch.object(User, "to_dict", autospec=True,
+                          side_effect=User.to_dict) as to_dict:
+            self.storage.save()
+        self.assertEqual([c.args[0].id for c in to_dict.call_args_list],
+                         [changed.id])
+        self.assertIsNot(type(self.storage.get(User, kept.id)), User)
+        with open("file.json") as f:
+            after = f.read()
+        self.assertIn(before[before.index('"User.' + kept.id):]
+                      .split("}")[0], after)
+
+    def test_unchanged_file_stays_lazy(self):
+        """Checks that merging a file holding the same records parses
+        none of them"""
+        user = User()
+        self.storage.save()
+        self.restart()
+        stat = os.stat("file.json")
+        os.utime("file.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertTrue(self.storage.catch_up())
+        self.assertIsNot(type(self.storage.get(User, user.id)), User)
+
+    def test_text_index_after_changes(self):
+        """Checks that the saved full-text index is dropped when its
+        class changes before it is first used"""
+        place = Place()
+        place.description = "quiet loft"
+        self.storage.search(Place, "loft")
+        self.storage.save()
+        self.restart()
+        self.storage.get(Place, place.id).description = "noisy barn"
+        self.assertEqual(self.storage.search(Place, "loft"), [])
+        self.assertEqual(self.storage.search(Place, "barn"),
+                         [self.storage.get(Place, place.id)])
+
+
+if __name__ == "__main__":
+    unittest.main()
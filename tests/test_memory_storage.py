@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""Test Suite for the engine in models/engine/memory_storage.py"""
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+from models.engine.file_storage import FileStorage
+from models.engine.memory_storage import MemoryStorage
+from models.state import State
+from models.user import User
+from storage_case import StorageCase
+
+
+class TestMemoryStorage(StorageCase):
+    """Contains test cases against the MemoryStorage class"""
+
+    engine = MemoryStorage
+
+    def tearDown(self):
+        """Stops the background dumps"""
+        self.storage.configure(snapshot_interval=0)
+        super().tearDown()
+
+    def test_save_writes_nothing(self):
+        """Checks that saves and reloads never touch the disk"""
+        user = User()
+        user.save()
+        self.storage.reload()
+        self.assertEqual(os.listdir(), [])
+        self.assertEqual(self.storage.dirty(), {})
+        self.assertIs(self.storage.get(User, user.id), user)
+
+    def test_refresh_ignores_the_file(self):
+        """Checks that refresh() neither reads a file another process
+        wrote nor takes its lock"""
+        with open("file.json", mode="w") as f:
+            f.write("{}")
+        self.storage.refresh()
+        self.assertEqual(os.listdir(), ["file.json"])
+
+    def test_dump_and_restore(self):
+        """Checks that restore() brings back the objects dumped"""
+        user, state = User(), State()
+        user.first_name = "Betty"
+        self.storage.dump("memory.json")
+        self.storage.delete(state)
+        user.first_name = "Holberton"
+        extra = User()
+        self.storage.restore("memory.json")
+        self.assertEqual(self.storage.count(), 2)
+        self.assertIsNone(self.storage.get(User, extra.id))
+        self.assertEqual(self.storage.get(User, user.id).first_name,
+                         "Betty")
+        self.assertIsNotNone(self.storage.get(State, state.id))
+        self.assertEqual(self.storage.dirty(), {})
+
+    def test_failed_restore(self):
+        """Checks that a missing file leaves the objects as they were"""
+        user = User()
+        with self.assertRaises(FileNotFoundError):
+            self.storage.restore("missing.json")
+        self.assertEqual(list(self.storage.all()), ["User." + user.id])
+
+    def test_periodic_dump(self):
+        """Checks that saved objects are dumped in the background"""
+        with patch("atexit.register") as register:
+            self.storage.configure(snapshot_interval=0.01,
+                                   path="memory.json")
+        self.assertEqual(len(register.call_args_list), 1)
+        user = User()
+        self.storage.save()
+        for _ in range(200):
+            if os.path.exists("memory.json"):
+                break
+            time.sleep(0.01)
+        self.storage.configure(snapshot_interval=0, path="file.json")
+        FileStorage._FileStorage__objects = {}
+        self.storage.restore("memory.json")
+        self.assertIsNotNone(self.storage.get(User, user.id))
+
+    def test_negative_interval(self):
+        """Checks that the interval must not be negative"""
+        with self.assertRaises(ValueError):
+            self.storage.configure(snapshot_interval=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
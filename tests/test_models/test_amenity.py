@@ -12,6 +12,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.amenity import Amenity
+from storage_case import setUpModule, tearDownModule
 
 
 class TestAmenity_instantiation(unittest.TestCase):
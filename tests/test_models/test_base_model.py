@@ -10,6 +10,7 @@ import unittest
 
 import models
 from models.base_model import BaseModel
+from storage_case import setUpModule, tearDownModule
 
 
 class TestBaseModel(unittest.TestCase):
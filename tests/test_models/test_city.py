@@ -12,6 +12,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.city import City
+from storage_case import setUpModule, tearDownModule
 
 
 class TestCity_instantiation(unittest.TestCase):
@@ -12,6 +12,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.place import Place
+from storage_case import setUpModule, tearDownModule
 
 
 class TestPlace_instantiation(unittest.TestCase):
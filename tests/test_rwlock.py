@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+"""Test Suite for the storage locks in models/engine/rwlock.py"""
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from models.engine.file_storage import FileStorage
+from models.engine.rwlock import RWLock, WriteLock
+from models.user import User
+from storage_case import StorageCase
+
+
+class TestRWLock(unittest.TestCase):
+    """Contains test cases against the RWLock class"""
+
+    def run_in_thread(self, target):
+        """Runs target in a thread, returning the thread started"""
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        return thread
+
+    def test_readers_share(self):
+        """Checks that readers hold the lock together"""
+        lock = RWLock()
+        inside = threading.Barrier(3, timeout=5)
+
+        def read():
+            """Waits for the other readers inside the read side"""
+            with lock.read():
+                inside.wait()
+
+        threads = [self.run_in_thread(read) for _ in range(2)]
+        inside.wait()
+        for thread in threads:
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+
+    def test_writer_excludes(self):
+        """Checks that a writer waits for the reader holding the lock"""
+        lock = RWLock()
+        events = []
+        lock.acquire_read()
+
+        def write():
+            """Takes the write side"""
+            with lock.write():
+                events.append("write")
+
+        thread = self.run_in_thread(write)
+        time.sleep(0.05)
+        events.append("read done")
+        lock.release_read()
+        thread.join(5)
+        self.assertEqual(events, ["read done", "write"])
+
+    def test_waiting_writer_goes_first(self):
+        """Checks that new readers wait behind a waiting writer"""
+        lock = RWLock()
+        events = []
+        lock.acquire_read()
+
+        def write():
+            """Takes the write side"""
+            with lock.write():
+                events.append("write")
+
+        def read():
+            """Takes the read side"""
+            with lock.read():
+                events.append("read")
+
+        writer = self.run_in_thread(write)
+        time.sleep(0.05)
+        reader = self.run_in_thread(read)
+        time.sleep(0.05)
+        self.assertEqual(events, [])
+        lock.release_read()
+        writer.join(5)
+        reader.join(5)
+        self.assertEqual(events, ["write", "read"])
+
+    def test_reentrant(self):
+        """Checks that both sides can be taken again by their holder"""
+        lock = RWLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    pass
+        with lock.read():
+            with lock.read():
+                with self.assertRaises(RuntimeError):
+                    lock.acquire_write()
+        with lock.write():
+            pass
+
+    def test_write_lock(self):
+        """Checks that WriteLock only locks its write side"""
+        lock = WriteLock()
+        with lock.read():
+            with lock.write():
+                with lock.write():
+                    pass
+
+
+class TestConcurrentStorage(StorageCase):
+    """Contains test cases against FileStorage used from many threads"""
+
+    def setUp(self):
+        """Guards the storage with a RWLock"""
+        super().setUp()
+        self.storage.configure(locking="rw")
+
+    def test_readers_and_writers(self):
+        """Checks that concurrent changes, queries and saves agree"""
+        errors = []
+
+        def create():
+            """Creates and saves users"""
+            try:
+                for i in range(50):
+                    user = User()
+                    user.email = "{}@hbnb.io".format(i)
+                    user.save()
+            except Exception as error:
+                errors.append(error)
+
+        def query():
+            """Counts and looks users up while they are created"""
+            try:
+                for _ in range(200):
+                    self.storage.count(User)
+                    self.storage.lookup(User, "email", "0@hbnb.io")
+                    len(self.storage.all())
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=create) for _ in range(4)]
+        threads += [threading.Thread(target=query) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.storage.count(User), 200)
+        self.assertEqual(len(self.storage.lookup(User, "email",
+                                                 "7@hbnb.io")), 4)
+        self.assertEqual(self.storage.dirty(), {})
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.count(User), 200)
+
+    def test_failed_write_stays_dirty(self):
+        """Checks that the changes of a failed write are kept dirty"""
+        user = User()
+        with patch("models.engine.safe_file.write",
+                   side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.storage.save()
+        self.assertEqual(self.storage.dirty(), {"User." + user.id: None})
+
+    def test_saves_during_background_write(self):
+        """Checks that changes, queries and saves made while the
+        background thread writes do not wait for the write"""
+        started, release = threading.Event(), threading.Event()
+
+        def slow_write(*args):
+            """Waits to be released before writing nothing"""
+            started.set()
+            self.assertTrue(release.wait(5))
+
+        with patch("atexit.register"):
+            self.storage.set_flush_policy("interval:1")
+        with patch("models.engine.safe_file.write", slow_write):
+            User().save()
+            self.assertTrue(started.wait(5))
+            thread = threading.Thread(target=lambda: (
+                User().save(), self.storage.count(User)))
+            thread.start()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+            done = threading.Event()
+            self.storage.on_flush(lambda error: done.set())
+            release.set()
+            self.assertTrue(done.wait(5))
+        self.assertEqual(self.storage.dirty(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
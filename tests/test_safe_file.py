@@ -0,0 +1,158 @@
+#!/usr/bin/python3
+"""Test Suite for the crash-safe files in models/engine/safe_file.py"""
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+from models.engine import safe_file
+from models.engine.file_storage import FileStorage
+from models.user import User
+from storage_case import StorageCase, TempDirCase
+
+
+class TestSafeFile(TempDirCase):
+    """Contains test cases against safe_file.write() and recover()"""
+
+    def write(self, data):
+        """Writes data to data.bin through safe_file"""
+        safe_file.write("data.bin", lambda f: f.write(data))
+
+    def read(self, path="data.bin"):
+        """Returns the content of path"""
+        with open(path, mode="rb") as f:
+            return f.read()
+
+    def test_write_keeps_backup(self):
+        """Checks that the previous content is kept as the backup"""
+        self.write(b"one")
+        self.write(b"two")
+        self.assertEqual(self.read(), b"two")
+        self.assertEqual(self.read("data.bin.bak"), b"one")
+        self.assertFalse(os.path.exists("data.bin.tmp"))
+
+    def test_write_under_lock(self):
+        """Checks that the lock is only held to replace the file"""
+        held = []
+
+        class Lock:
+            """Records when it is held"""
+
+            def __enter__(self):
+                """Takes the lock"""
+                held.append(os.path.exists("data.bin"))
+
+            def __exit__(self, *exc):
+                """Gives the lock back"""
+                held.append(os.path.exists("data.bin"))
+
+        def fill(f):
+            """Writes while the lock is not held"""
+            held.append("fill")
+            f.write(b"one")
+
+        safe_file.write("data.bin", fill, lock=Lock())
+        self.assertEqual(held, ["fill", False, True])
+        self.assertEqual(self.read(), b"one")
+        self.assertEqual(os.listdir().count("data.bin.sum"), 1)
+        self.assertFalse([name for name in os.listdir()
+                          if name.endswith(".tmp")])
+
+    def test_checksum_blocks(self):
+        """Checks that a record holds one CRC32 per block"""
+        data = os.urandom(safe_file.BLOCK_SIZE * 2 + 10)
+
+        def fill(f):
+            """Writes data in small pieces"""
+            for i in range(0, len(data), 1000):
+                f.write(data[i:i + 1000])
+
+        safe_file.write("data.bin", fill)
+        record = safe_file.checksum("data.bin")
+        self.assertEqual(record["size"], len(data))
+        self.assertEqual(len(record["crc32"]), 3)
+        self.assertTrue(safe_file.matches(
+            record, safe_file.read_sums("data.bin")["file"]))
+
+    def test_failed_write_keeps_file(self):
+        """Checks that an error while writing leaves the file as it was"""
+        self.write(b"one")
+
+        def fail(f):
+            """Writes part of the content, then fails"""
+            f.write(b"tw")
+            raise OSError("disk full")
+
+        with self.assertRaises(OSError):
+            safe_file.write("data.bin", fail)
+        safe_file.recover("data.bin")
+        self.assertEqual(self.read(), b"one")
+
+    def test_recover_from_damaged_file(self):
+        """Checks that a file damaged in place is replaced by its backup"""
+        self.write(b"one")
+        self.write(b"two")
+        with open("data.bin", mode="r+b") as f:
+            f.truncate(1)
+        safe_file.recover("data.bin")
+        self.assertEqual(self.read(), b"one")
+        self.assertEqual(self.read("data.bin.corrupt"), b"t")
+        safe_file.recover("data.bin")
+        self.assertEqual(self.read(), b"one")
+
+    def test_recover_without_backup(self):
+        """Checks that a damaged file without a valid backup raises"""
+        self.write(b"one")
+        with open("data.bin", mode="r+b") as f:
+            f.write(b"x")
+        with self.assertRaises(ValueError):
+            safe_file.recover("data.bin")
+
+    def test_replaced_files_are_trusted(self):
+        """Checks that files replaced or never checked are left alone"""
+        with open("data.bin", mode="wb") as f:
+            f.write(b"legacy")
+        safe_file.recover("data.bin")
+        self.assertEqual(self.read(), b"legacy")
+        self.write(b"one")
+        os.replace("data.bin", "moved.bin")
+        with open("data.bin", mode="wb") as f:
+            f.write(b"restored by hand")
+        safe_file.recover("data.bin")
+        self.assertEqual(self.read(), b"restored by hand")
+        safe_file.recover("missing.bin")
+
+
+class TestCrashSafeStorage(StorageCase):
+    """Contains test cases against crash-safe FileStorage saves"""
+
+    def test_crash_while_saving(self):
+        """Checks that a save interrupted midway loses nothing saved"""
+        user = User()
+        self.storage.save()
+        User()
+        with patch("models.engine.json_stream.write",
+                   side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(list(self.storage.all()), ["User." + user.id])
+
+    def test_reload_falls_back_to_previous_snapshot(self):
+        """Checks that a truncated file is replaced on reload"""
+        user = User()
+        self.storage.save()
+        User()
+        self.storage.save()
+        with open("file.json", mode="r+") as f:
+            f.truncate(10)
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(list(self.storage.all()), ["User." + user.id])
+        with open("file.json") as f:
+            self.assertIn("User." + user.id, json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
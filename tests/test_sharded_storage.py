@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""Test Suite for ShardedStorage in models/engine/sharded_storage.py"""
+import json
+import os
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from console import HBNBCommand
+from models.engine.sharded_storage import ShardedStorage
+from models.review import Review
+from models.state import State
+from models.user import User
+from storage_case import StorageCase
+
+
+class TestShardedStorage(StorageCase):
+    """Contains test cases against the per-class sharded engine"""
+
+    engine = ShardedStorage
+
+    def test_save_writes_one_shard_per_class(self):
+        """Checks that each class is saved to its own file"""
+        user = User()
+        state = State()
+        self.storage.save()
+        shards = [name for name in os.listdir("file.json.d")
+                  if name.endswith(".json")]
+        self.assertEqual(sorted(shards), ["State.json", "User.json"])
+        with open(os.path.join("file.json.d", "User.json")) as f:
+            self.assertEqual(list(json.load(f)), ["User." + user.id])
+
+    def test_save_rewrites_changed_shards_only(self):
+        """Checks that an untouched class keeps its shard"""
+        User()
+        state = State()
+        self.storage.save()
+        user_shard = os.path.join("file.json.d", "User.json")
+        os.remove(user_shard)
+        state.name = "Nairobi"
+        self.storage.save()
+        self.assertFalse(os.path.exists(user_shard))
+
+    def test_get_loads_one_class_only(self):
+        """Checks that get() does not parse other shards"""
+        state = State()
+        Review()
+        self.storage.save()
+        self.restart()
+        with open(os.path.join("file.json.d", "Review.json"), "w") as f:
+            f.write("not json")
+        self.assertEqual(self.storage.get("State", state.id).id, state.id)
+        self.assertEqual(self.storage.count(State), 1)
+        self.assertNotIn("Review", ShardedStorage._ShardedStorage__loaded)
+
+    def test_all_command_loads_one_class_only(self):
+        """Checks that the all command of a class does not parse other
+        shards"""
+        state = State()
+        Review()
+        self.storage.save()
+        self.restart()
+        with open(os.path.join("file.json.d", "Review.json"), "w") as f:
+            f.write("not json")
+        with patch("sys.stdout", new=StringIO()) as f, \
+                patch.object(HBNBCommand, "storage", self.storage):
+            HBNBCommand().onecmd("all State")
+        self.assertIn(state.id, f.getvalue())
+        self.assertNotIn("Review", ShardedStorage._ShardedStorage__loaded)
+
+    def test_all_loads_every_shard(self):
+        """Checks that all() without a class returns everything"""
+        user = User()
+        state = State()
+        self.storage.save()
+        self.restart()
+        objects = self.storage.all()
+        self.assertIn("User." + user.id, objects)
+        self.assertIn("State." + state.id, objects)
+
+    def test_new_object_keeps_unloaded_objects(self):
+        """Checks that saving a class merges its shard first"""
+        old = User()
+        self.storage.save()
+        self.restart()
+        new = User()
+        new.save()
+        self.restart()
+        self.assertEqual(sorted(self.storage.all(User)),
+                         sorted(["User." + old.id, "User." + new.id]))
+
+    def test_delete_is_not_undone_by_a_later_load(self):
+        """Checks that a deleted object does not come back on save"""
+        user = User()
+        self.storage.save()
+        self.storage.reload()
+        self.storage.delete(user)
+        self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.all(User), {})
+
+    def test_rollback_keeps_loaded_objects(self):
+        """Checks that objects loaded in a batch that fails are not
+        deleted by its rollback"""
+        State()
+        State()
+        self.storage.save()
+        self.restart()
+        with self.assertRaises(ValueError):
+            with self.storage.batch():
+                self.assertEqual(self.storage.count(State), 2)
+                raise ValueError
+        self.assertEqual(self.storage.dirty(), {})
+        self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.count(State), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
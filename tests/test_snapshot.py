@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+"""Test Suite for the storage snapshots in models/engine/snapshot.py"""
+import unittest
+
+from models.engine.file_storage import FileStorage
+from models.engine.snapshot import Snapshot
+from models.state import State
+from models.user import User
+from storage_case import StorageCase
+
+
+class TestSnapshot(StorageCase):
+    """Contains test cases against FileStorage.snapshot()"""
+
+    def history(self):
+        """Returns the versions kept for the open snapshots"""
+        return FileStorage._FileStorage__history
+
+    def test_point_in_time(self):
+        """Checks that a snapshot does not see later changes"""
+        user, deleted = User(), User()
+        user.first_name = "Betty"
+        with self.storage.snapshot() as snapshot:
+            self.assertIsInstance(snapshot, Snapshot)
+            user.first_name = "Holberton"
+            self.storage.delete(deleted)
+            State()
+            self.assertEqual(snapshot.count(), 2)
+            self.assertEqual(snapshot.count(State), 0)
+            seen = snapshot.all(User)
+            self.assertEqual(set(seen), {"User." + user.id,
+                                         "User." + deleted.id})
+            self.assertEqual(seen["User." + user.id].first_name, "Betty")
+            self.assertEqual(snapshot.get(User, deleted.id).id, deleted.id)
+        self.assertEqual(user.first_name, "Holberton")
+        self.assertEqual(self.storage.count(), 2)
+
+    def test_class_snapshot(self):
+        """Checks that a snapshot of a class holds its objects only"""
+        user = User()
+        State()
+        with self.storage.snapshot(User) as snapshot:
+            user.first_name = "Betty"
+            User()
+            self.assertEqual(list(snapshot.all()), ["User." + user.id])
+            self.assertNotIn("first_name",
+                             snapshot.get(User, user.id).__dict__)
+            self.assertEqual(snapshot.count(State), 0)
+
+    def test_copies_are_detached(self):
+        """Checks that changing a copy changes neither storage nor it"""
+        user = User()
+        with self.storage.snapshot() as snapshot:
+            copy = snapshot.get("User", user.id)
+            copy.first_name = "Betty"
+            self.assertNotIn("first_name", user.__dict__)
+            self.assertNotIn("first_name",
+                             snapshot.get("User", user.id).__dict__)
+            self.assertNotIn("User." + user.id, self.history())
+
+    def test_nested_snapshots(self):
+        """Checks that each snapshot sees its own version"""
+        user = User()
+        user.first_name = "one"
+        first = self.storage.snapshot()
+        user.first_name = "two"
+        user.first_name = "three"
+        second = self.storage.snapshot()
+        user.first_name = "four"
+        self.assertEqual(first.get(User, user.id).first_name, "one")
+        self.assertEqual(second.get(User, user.id).first_name, "three")
+        self.assertEqual(len(self.history()["User." + user.id]), 2)
+        first.close()
+        self.assertEqual(len(self.history()["User." + user.id]), 1)
+        self.assertEqual(second.get(User, user.id).first_name, "three")
+        second.close()
+        self.assertEqual(self.history(), {})
+        with self.assertRaises(ValueError):
+            second.get(User, user.id)
+
+    def test_no_history_without_snapshots(self):
+        """Checks that changes keep no version when no one reads them"""
+        user = User()
+        user.first_name = "Betty"
+        self.storage.delete(user)
+        self.assertEqual(self.history(), {})
+
+    def test_batch_rollback(self):
+        """Checks that a rolled back batch is seen as never made"""
+        user = User()
+        user.first_name = "Betty"
+        with self.storage.snapshot() as snapshot:
+            with self.assertRaises(ValueError):
+                with self.storage.batch():
+                    user.first_name = "Holberton"
+                    raise ValueError
+            self.assertEqual(snapshot.get(User, user.id).first_name,
+                             "Betty")
+        self.assertEqual(user.first_name, "Betty")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+#!/usr/bin/python3
+"""Test Suite for SQLiteStorage in models/engine/sqlite_storage.py"""
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from console import HBNBCommand
+from models.engine.sqlite_storage import SQLiteStorage
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+from storage_case import StorageCase
+
+
+class TestSQLiteStorage(StorageCase):
+    """Contains test cases against the SQLite engine"""
+
+    engine = SQLiteStorage
+
+    def tearDown(self):
+        """Closes the database"""
+        self.storage.close()
+        super().tearDown()
+
+    def restart(self):
+        """Forgets every object, as a new process would"""
+        self.storage.close()
+        super().restart()
+
+    def rows(self, table):
+        """Returns the ids stored in table"""
+        return sorted(row[0] for row in self.storage.connection().execute(
+            'SELECT id FROM "{}"'.format(table)))
+
+    def test_journal_mode_is_wal(self):
+        """Checks that the database uses write-ahead logging"""
+        mode = self.storage.connection().execute(
+            "PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_indexes_are_created(self):
+        """Checks that the declared indexes exist in the database"""
+        names = {row[0] for row in self.storage.connection().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn("City_state_id", names)
+        self.assertIn("Place_price_by_night", names)
+        self.assertIn("Review_place_id", names)
+
+    def test_save_and_reload(self):
+        """Checks that objects round-trip through the database"""
+        user = User()
+        user.first_name = "Betty"
+        place = Place()
+        place.price_by_night = 80
+        place.amenity_ids = ["a", "b"]
+        self.storage.save()
+        self.assertEqual(self.rows("User"), [user.id])
+        self.restart()
+        loaded = self.storage.get(Place, place.id)
+        self.assertIsNot(loaded, place)
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+        self.assertEqual(self.storage.get("User", user.id).first_name,
+                         "Betty")
+
+    def test_save_writes_changed_rows_only(self):
+        """Checks that unchanged rows are not written again"""
+        user = User()
+        Place()
+        self.storage.save()
+        conn = self.storage.connection()
+        conn.execute('DELETE FROM "Place"')
+        conn.commit()
+        user.first_name = "Betty"
+        self.storage.save()
+        self.assertEqual(self.rows("Place"), [])
+        self.assertEqual(self.rows("User"), [user.id])
+
+    def test_delete(self):
+        """Checks that a deleted object loses its row"""
+        user = User()
+        self.storage.save()
+        self.storage.delete(user)
+        self.storage.save()
+        self.assertEqual(self.rows("User"), [])
+
+    def test_tables_load_lazily(self):
+        """Checks that a class is read on first access only"""
+        review = Review()
+        User()
+        self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.count(Review), 1)
+        self.assertNotIn("User", SQLiteStorage._SQLiteStorage__loaded)
+        self.assertEqual(self.storage.lookup(Review, "place_id", ""),
+                         {"Review." + review.id: self.storage.get(
+                             Review, review.id)})
+
+    def test_queries_read_matching_rows(self):
+        """Checks that lookup() and between() on a class not loaded
+        only read the matching rows, through the indexes, and see the
+        unsaved changes"""
+        places = [Place() for i in range(5)]
+        for i, place in enumerate(places):
+            place.city_id = "Nairobi"
+            place.price_by_night = 10 * i
+        review = Review()
+        review.place_id = places[0].id
+        Review().place_id = places[1].id
+        self.storage.save()
+        self.restart()
+        plan = " ".join(str(row) for row in self.storage.connection().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM \"Review\" "
+            "WHERE json_extract(data, '$.place_id') = ?", ("",)))
+        self.assertIn("Review_place_id", plan)
+        found = self.storage.lookup(Review, "place_id", places[0].id)
+        self.assertEqual(list(found), ["Review." + review.id])
+        self.assertEqual(self.storage.peek("Review." + review.id),
+                         found["Review." + review.id])
+        loaded = self.storage.lookup(Place, "city_id", "Nairobi")
+        loaded["Place." + places[4].id].price_by_night = 15
+        self.storage.delete(loaded["Place." + places[2].id])
+        place = Place()
+        place.price_by_night = 30
+        found = self.storage.between(Place, "price_by_night", 10, 30,
+                                     limit=3)
+        self.assertEqual([p.price_by_night for p in found], [10, 15, 30])
+        self.assertEqual(found[2].id, min(place.id, places[3].id))
+        found = self.storage.between(Place, "price_by_night", 5,
+                                     reverse=True)
+        self.assertEqual(SQLiteStorage._SQLiteStorage__loaded, set())
+        self.assertEqual(len(self.storage.lookup(Place, "city_id", "")), 1)
+        self.assertEqual(SQLiteStorage._SQLiteStorage__loaded, {"Place"})
+        self.assertEqual(len(found), 4)
+        self.assertEqual(found, self.storage.between(
+            Place, "price_by_night", 5, reverse=True))
+
+    def test_failed_save_keeps_changes(self):
+        """Checks that a failed transaction leaves the objects dirty"""
+        user = User()
+        with patch.object(User, "to_dict", side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                self.storage.save()
+        self.assertIn("User." + user.id, self.storage.dirty())
+        self.storage.save()
+        self.assertEqual(self.rows("User"), [user.id])
+
+    def test_console_commands(self):
+        """Checks that the console works unchanged on this engine"""
+        console = patch.object(HBNBCommand, "storage", self.storage)
+        console.start()
+        self.addCleanup(console.stop)
+        with patch("sys.stdout", new=StringIO()) as f:
+            HBNBCommand().onecmd("create State")
+        state_id = f.getvalue().strip()
+        with patch("sys.stdout", new=StringIO()):
+            HBNBCommand().onecmd("update State {} name Kenya".format(state_id))
+        self.restart()
+        self.assertEqual(self.storage.get("State", state_id).name, "Kenya")
+        with patch("sys.stdout", new=StringIO()) as f:
+            HBNBCommand().onecmd("destroy State {}".format(state_id))
+            HBNBCommand().onecmd("count State")
+        self.assertEqual(f.getvalue(), "0\n")
+        self.assertEqual(self.rows("State"), [])
+
+    def test_rollback_keeps_loaded_objects(self):
+        """Checks that objects loaded in a batch that fails are not
+        deleted by its rollback"""
+        State()
+        State()
+        self.storage.save()
+        self.restart()
+        with self.assertRaises(ValueError):
+            with self.storage.batch():
+                self.assertEqual(self.storage.count(State), 2)
+                raise ValueError
+        self.assertEqual(self.storage.dirty(), {})
+        self.storage.save()
+        self.restart()
+        self.assertEqual(self.storage.count(State), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,265 @@
+#!/usr/bin/python3
+"""Test Suite for WALStorage in models/engine/wal_storage.py"""
+import json
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+from models.engine import safe_file
+from models.engine.file_storage import FileStorage
+from models.engine.throttle import Throttle
+from models.engine.wal_storage import WALStorage
+from models.user import User
+from models.place import Place
+from storage_case import StorageCase
+
+
+class TestWALStorage(StorageCase):
+    """Contains test cases against the write-ahead log engine"""
+
+    engine = WALStorage
+
+    def read_log(self):
+        """Returns the records currently in the log"""
+        with open("file.json.wal") as f:
+            return [json.loads(line) for line in f]
+
+    def test_save_appends_only_the_mutation(self):
+        """Checks that a save logs the changed object only"""
+        for _ in range(5):
+            User()
+        self.storage.save()
+        self.assertEqual(len(self.read_log()), 5)
+        user = User()
+        user.save()
+        log = self.read_log()
+        self.assertEqual(len(log), 6)
+        self.assertEqual(log[-1]["op"], "put")
+        self.assertEqual(log[-1]["class"], "User")
+        self.assertEqual(log[-1]["id"], user.id)
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_update_logs_changed_fields_only(self):
+        """Checks that a changed object only logs its changed attributes,
+        and the whole object when saved with save()"""
+        user = User()
+        self.storage.save()
+        user.first_name = "Betty"
+        self.storage.save()
+        self.assertEqual(self.read_log()[-1]["fields"],
+                         {"first_name": "Betty"})
+        user.save()
+        self.assertEqual(sorted(self.read_log()[-1]["fields"]),
+                         ["created_at", "first_name", "id", "updated_at"])
+
+    def test_delete_is_logged(self):
+        """Checks that delete() appends a delete record"""
+        user = User()
+        self.storage.save()
+        self.storage.delete(user)
+        self.storage.save()
+        self.assertEqual(self.read_log()[-1],
+                         {"op": "delete", "class": "User", "id": user.id})
+
+    def test_reload_replays_the_log(self):
+        """Checks that reload() rebuilds objects from the log"""
+        user = User()
+        user.first_name = "Betty"
+        user.save()
+        place = Place()
+        place.save()
+        self.storage.delete(place)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        objects = self.storage.all()
+        self.assertIn("User." + user.id, objects)
+        self.assertEqual(objects["User." + user.id].first_name, "Betty")
+        self.assertNotIn("Place." + place.id, objects)
+
+    def test_refresh_replays_records_of_others(self):
+        """Checks that refresh() replays the records another process
+        appended to the log, and only takes the file lock then"""
+        user = User()
+        user.save()
+        other = User()
+        fields = other.to_dict()
+        self.storage.delete(other)
+        self.storage.dirty().clear()
+        with patch.object(FileStorage, "file_lock") as file_lock:
+            self.storage.refresh()
+        file_lock.assert_not_called()
+        with open("file.json.wal", "a") as f:
+            f.write(json.dumps({"op": "put", "class": "User",
+                                "id": other.id, "fields": fields}) + "\n")
+        self.storage.refresh()
+        self.assertEqual(self.storage.get(User, other.id).to_dict(), fields)
+
+    def test_reload_ignores_torn_record(self):
+        """Checks that a partially written last record is skipped"""
+        user = User()
+        user.save()
+        with open("file.json.wal", "a") as f:
+            f.write('{"op": "put", "class": "Us')
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(list(self.storage.all()), ["User." + user.id])
+
+    def test_checkpoint_writes_snapshot_and_truncates(self):
+        """Checks that checkpoint() folds the log into file.json"""
+        user = User()
+        user.save()
+        self.storage.checkpoint()
+        self.assertEqual(self.read_log(), [])
+        with open("file.json") as f:
+            self.assertIn("User." + user.id, json.load(f))
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertIn("User." + user.id, self.storage.all())
+
+    def test_background_checkpoint(self):
+        """Checks that enough records start a checkpoint in a thread"""
+        users = [User() for _ in range(3)]
+        with patch.object(WALStorage, "_WALStorage__checkpoint_size", 3):
+            self.storage.save()
+        WALStorage._WALStorage__checkpointer.join(5)
+        self.assertEqual(self.read_log(), [])
+        self.assertFalse(os.path.exists("file.json.wal.1"))
+        with open("file.json") as f:
+            self.assertEqual(sorted(json.load(f)),
+                             sorted("User." + u.id for u in users))
+
+    def test_saves_during_checkpoint(self):
+        """Checks that saves go on, to the new log, while checkpointing"""
+        user = User()
+        self.storage.save()
+        write_snapshot = FileStorage.write_snapshot
+        started, saved = threading.Event(), threading.Event()
+
+        def slow(storage, snapshot, pace=None):
+            """Waits for a save made meanwhile, then writes"""
+            started.set()
+            self.assertTrue(saved.wait(5))
+            write_snapshot(storage, snapshot, pace)
+
+        with patch.object(FileStorage, "write_snapshot", slow):
+            thread = self.storage.compact()
+            self.assertTrue(started.wait(5))
+            user.first_name = "Betty"
+            late = User()
+            self.storage.save()
+            saved.set()
+            thread.join(5)
+        with open("file.json") as f:
+            snapshot = json.load(f)
+        self.assertNotIn("first_name", snapshot["User." + user.id])
+        self.assertNotIn("User." + late.id, snapshot)
+        self.assertEqual(len(self.read_log()), 2)
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.get(User, user.id).first_name, "Betty")
+        self.assertIsNotNone(self.storage.get(User, late.id))
+
+    def test_checkpoint_writes_logged_state_only(self):
+        """Checks that a checkpoint leaves out the unsaved changes, such
+        as those of a batch rolled back after it"""
+        kept, deleted, changed = User(), User(), User()
+        changed.first_name = "Betty"
+        self.storage.save()
+        changed.first_name = "Holberton"
+        changed.save()
+        with self.assertRaises(ValueError):
+            with self.storage.batch():
+                ghost = User()
+                kept.first_name = "Ghost"
+                changed.first_name = "Ghost"
+                self.storage.delete(deleted)
+                self.storage.compact().join(5)
+                raise ValueError
+        with open("file.json") as f:
+            snapshot = json.load(f)
+        self.assertEqual(sorted(snapshot), sorted(
+            "User." + u.id for u in (kept, deleted, changed)))
+        self.assertNotIn("first_name", snapshot["User." + kept.id])
+        self.assertEqual(snapshot["User." + changed.id]["first_name"],
+                         "Holberton")
+        self.restart()
+        self.assertIsNone(self.storage.get(User, ghost.id))
+        self.assertEqual(self.storage.count(User), 3)
+
+    def test_save_right_after_checkpoint_write(self):
+        """Checks that a save made as soon as a checkpoint replaced the
+        file does not take it for the write of another process"""
+        user = User()
+        user.first_name = "Betty"
+        user.save()
+        user.last_name = "Holberton"
+        user.save()
+        write = safe_file.write
+
+        def replace(path, *args):
+            """Replaces the file, then saves a change at once"""
+            write(path, *args)
+            if path == "file.json":
+                user.first_name = "Ada"
+                user.save()
+
+        with patch.object(safe_file, "write", replace), \
+                patch.object(WALStorage, "_WALStorage__replay") as replay:
+            self.storage.compact().join(5)
+        replay.assert_not_called()
+        self.restart()
+        self.assertEqual(self.storage.get(User, user.id).first_name, "Ada")
+
+    def test_partial_record_without_object(self):
+        """Checks that a record of changed attributes is skipped when
+        its object is not held"""
+        user = User()
+        self.storage.save()
+        with open("file.json.wal", "a") as f:
+            f.write(json.dumps({"op": "put", "class": "User", "id": "gone",
+                                "fields": {"last_name": "Holberton"}})
+                    + "\n")
+        self.restart()
+        self.assertEqual(list(self.storage.all()), ["User." + user.id])
+
+    def test_interrupted_checkpoint(self):
+        """Checks that the log of an unfinished checkpoint is replayed"""
+        user = User()
+        self.storage.save()
+        with patch.object(FileStorage, "write_snapshot",
+                          side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.storage.checkpoint()
+        self.assertTrue(os.path.exists("file.json.wal.1"))
+        late = User()
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(sorted(self.storage.all()),
+                         sorted(["User." + user.id, "User." + late.id]))
+        self.storage.checkpoint()
+        self.assertFalse(os.path.exists("file.json.wal.1"))
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.count(User), 2)
+
+
+class TestThrottle(unittest.TestCase):
+    """Contains test cases against the Throttle class"""
+
+    def test_sleeps_when_ahead(self):
+        """Checks that writes ahead of the rate wait for it"""
+        with patch("time.sleep") as sleep:
+            throttle = Throttle(1000)
+            throttle(10)
+            throttle(990)
+        self.assertEqual(throttle.written, 1000)
+        self.assertGreater(sleep.call_args[0][0], 0.9)
+        with self.assertRaises(ValueError):
+            Throttle(0)
+
+
+if __name__ == "__main__":
+    unittest.main()